@@ -33,12 +33,15 @@ import getopt
 
 import sickbeard
 
-from sickbeard import db
-from sickbeard.tv import TVShow
+from sickbeard import classes
+from sickbeard import tv
+from sickbeard import image_cache
+from sickbeard import encodingKludge as ek
 from sickbeard import logger
 from sickbeard.version import SICKBEARD_VERSION
 
 from sickbeard.webserveInit import initWebServer
+from sickbeard.webserve import precompileTemplates
 
 from lib.configobj import ConfigObj
 
@@ -47,22 +50,41 @@ signal.signal(signal.SIGTERM, sickbeard.sig_handler)
 
 def loadShowsFromDB():
     """
-    Populates the showList with shows from the database
+    Populates the showList with shows from the database, the slower checks of the shows are left to a
+    background thread
     """
 
-    myDB = db.DBConnection()
-    sqlResults = myDB.select("SELECT * FROM tv_shows")
+    shows = tv.loadShowsFromDB()
+    logger.log(u"Loaded %d shows", logger.MESSAGE, len(shows))
+
+    checkThread = threading.Thread(target=checkShows, args=(shows,), name="SHOWCHECK")
+    checkThread.setDaemon(True)
+    checkThread.start()
+
+    #TODO: make it update the existing shows if the showlist has something in it
+
+def checkShows(shows):
+    """
+    Warns about the shows whose folder is gone and caches the images of the ones that don't have them yet
+    """
+
+    cache_obj = image_cache.ImageCache()
+
+    for curShow in shows:
+
+        if not ek.ek(os.path.isdir, curShow._location):
+            logger.log(u"The folder of "+curShow.name+" doesn't exist: "+curShow._location, logger.WARNING)
+            continue
+
+        if ek.ek(os.path.isfile, cache_obj.poster_path(curShow.tvdbid)) and ek.ek(os.path.isfile, cache_obj.banner_path(curShow.tvdbid)):
+            continue
 
-    for sqlShow in sqlResults:
         try:
-            curShow = TVShow(int(sqlShow["tvdb_id"]))
-            sickbeard.showList.append(curShow)
+            cache_obj.fill_cache(curShow)
         except Exception, e:
-            logger.log(u"There was an error creating the show in "+sqlShow["location"]+": "+str(e).decode('utf-8'), logger.ERROR)
+            logger.log(u"Unable to cache the images of "+curShow.name+": "+str(e).decode('utf-8'), logger.ERROR)
             logger.log(traceback.format_exc(), logger.DEBUG)
 
-        #TODO: make it update the existing shows if the showlist has something in it
-
 def daemonize():
     """
     Fork off as a daemon
@@ -95,6 +117,9 @@ def daemonize():
     dev_null = file('/dev/null', 'r')
     os.dup2(dev_null.fileno(), sys.stdin.fileno())
 
+    # the log writer thread didn't make it through the forks
+    logger.sb_log_instance.start()
+
     if sickbeard.CREATEPID:
         pid = str(os.getpid())
         logger.log(u"Writing PID " + pid + " to " + str(sickbeard.PIDFILE))
@@ -229,7 +254,7 @@ def main():
     # initialize the config and our threads
     sickbeard.initialize(consoleLogging=consoleLogging)
 
-    sickbeard.showList = []
+    sickbeard.showList = classes.ShowList()
 
     if sickbeard.DAEMON:
         daemonize()
@@ -278,6 +303,10 @@ def main():
             sickbeard.launchBrowser(startPort)
         sys.exit()
 
+    # compile the pages in the background instead of on their first view
+    if sickbeard.PRECOMPILE_TEMPLATES:
+        threading.Thread(target=precompileTemplates, name="TEMPLATES").start()
+
     # build from the DB to start with
     logger.log(u"Loading initial show list")
     loadShowsFromDB()
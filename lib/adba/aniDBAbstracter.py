@@ -17,8 +17,7 @@
 
 from time import time,sleep
 import aniDBfileInfo as fileInfo
-import xml.etree.cElementTree as etree
-import os, re, string
+from aniDBtitles import get_anime_titles
 from aniDBmaper import AniDBMaper
 from aniDBtvDBmaper import TvDBMap
 from aniDBerrors import *
@@ -107,7 +106,6 @@ class Anime(aniDBabstractObject):
        
         self.maper = AniDBMaper()
         self.tvDBMap = TvDBMap()
-        self.allAnimeXML = None 
         
         self.name = name
         self.aid = aid
@@ -154,45 +152,11 @@ class Anime(aniDBabstractObject):
             self.release_groups.append(unicode(line["name"], "utf-8"))
         return self.release_groups
     
-    #TODO: refactor and use the new functions in anidbFileinfo
     def _get_aid_from_xml(self,name):
-        if not self.allAnimeXML:
-            self.allAnimeXML = self._read_animetitels_xml()
+        return get_anime_titles().get_aid(name)
     
-        regex = re.compile('[%s]' % re.escape(string.punctuation))
-        name = regex.sub('', name.lower())
-        lastAid = 0
-        for element in self.allAnimeXML.getiterator():
-            if element.get("aid",False):
-                lastAid = int(element.get("aid"))
-            if element.text:
-                testname = regex.sub('', element.text.lower())
-                if testname == name:
-                    return lastAid
-        return 0
-    
-    #TODO: refactor and use the new functions in anidbFileinfo
     def _get_name_from_xml(self,aid,onlyMain=True):
-        if not self.allAnimeXML:
-            self.allAnimeXML = self._read_animetitels_xml()
-
-        for anime in self.allAnimeXML.findall("anime"):
-            if int(anime.get("aid",False)) == aid:
-                for title in anime.getiterator():
-                    currentLang = title.get("{http://www.w3.org/XML/1998/namespace}lang",False)
-                    currentType = title.get("type",False)
-                    if (currentLang == "en" and not onlyMain) or currentType == "main":
-                        return title.text    
-        return ""     
-        
-    
-    def _read_animetitels_xml(self,path=None):
-        if not path:
-            path = os.path.join(os.path.dirname(os.path.abspath( __file__ )), "animetitles.xml")
-        
-        f = open(path,"r")
-        allAnimeXML = etree.ElementTree(file = f)
-        return allAnimeXML
+        return get_anime_titles().get_name(aid,onlyMain)
     
     def _builPreSequal(self):
         if self.related_aid_list and self.related_aid_type:
@@ -16,42 +16,143 @@
 # along with aDBa.  If not, see <http://www.gnu.org/licenses/>.
 
 from __future__ import with_statement
+import cPickle as pickle
 import hashlib
 import os
+import threading
 import xml.etree.cElementTree as etree
 
+# where the xml indexes and the ed2k hash cache are written, None puts the indexes next to the xml
+# they were made from and keeps the hashes in memory only
+indexDir = None
+
+_indexes = {}
+_indexesLock = threading.Lock()
+
+# ed2k hashes a file in pieces of this size
+ED2K_CHUNK_SIZE = 9728000
+
+
+class HashCache(object):
+    """
+    The ed2k hashes of the files we hashed before, keyed by (path, size, mtime, inode) so a file that
+    changed is hashed again. Only the most recent MAX_SIZE hashes are kept.
+    """
+
+    MAX_SIZE = 1000
+    FILE_NAME = "ed2k_hashes.cache"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hashes = None
+        # the keys of the hashes, oldest first
+        self.order = None
+        self.cacheDir = None
+
+    def _cachePath(self):
+        return os.path.join(self.cacheDir, self.FILE_NAME)
+
+    def _load(self):
+        # the cache is loaded again when the cache dir was changed
+        if self.hashes is not None and self.cacheDir == indexDir:
+            return
+
+        self.hashes = {}
+        self.order = []
+        self.cacheDir = indexDir
+        if not self.cacheDir:
+            return
+
+        try:
+            with open(self._cachePath(), "rb") as f:
+                for key, ed2k in pickle.load(f):
+                    self._add(key, ed2k)
+        except (IOError, EOFError, pickle.UnpicklingError, ValueError, AttributeError, ImportError, TypeError):
+            pass
+
+    def _save(self):
+        if not self.cacheDir:
+            return
+
+        tmpPath = self._cachePath() + ".tmp"
+        try:
+            with open(tmpPath, "wb") as f:
+                pickle.dump([(x, self.hashes[x]) for x in self.order], f, pickle.HIGHEST_PROTOCOL)
+            # windows can't rename over an existing file
+            if os.path.exists(self._cachePath()):
+                os.remove(self._cachePath())
+            os.rename(tmpPath, self._cachePath())
+        except (IOError, OSError):
+            pass
+
+    def get(self, key):
+        with self.lock:
+            self._load()
+            return self.hashes.get(key)
+
+    def _add(self, key, ed2k):
+        if key in self.hashes:
+            self.order.remove(key)
+        self.hashes[key] = ed2k
+        self.order.append(key)
+        while len(self.order) > self.MAX_SIZE:
+            del self.hashes[self.order.pop(0)]
+
+    def add(self, key, ed2k):
+        with self.lock:
+            self._load()
+            self._add(key, ed2k)
+            self._save()
+
+hashCache = HashCache()
+
+
+def _file_key(filePath):
+    stat = os.stat(filePath)
+    return (os.path.abspath(filePath), stat.st_size, stat.st_mtime, stat.st_ino)
+
 
 # http://www.radicand.org/blog/orz/2010/2/21/edonkey2000-hash-in-python/
+def calculate_ed2k(filePath):
+    """Hashes the file a piece at a time so big files don't use more memory."""
+    chunkHashes = hashlib.new('md4')
+    firstHash = None
+    chunks = 0
+
+    with open(filePath, 'rb') as f:
+        while True:
+            chunk = f.read(ED2K_CHUNK_SIZE)
+            if not chunk:
+                break
+            chunkHash = hashlib.new('md4', chunk).digest()
+            if not chunks:
+                firstHash = chunkHash
+            chunkHashes.update(chunkHash)
+            chunks += 1
+            if len(chunk) < ED2K_CHUNK_SIZE:
+                break
+
+    # a file of a single piece uses the hash of the piece, otherwise it is the hash of all the piece hashes
+    if chunks == 1:
+        return firstHash.encode("hex")
+    return chunkHashes.hexdigest()
+
+
 def get_file_hash(filePath):
     """ Returns the ed2k hash of a given file."""
     if not filePath:
         return None
-    md4 = hashlib.new('md4').copy
-
-    def gen(f):
-        while True:
-            x = f.read(9728000)
-            if x: yield x
-            else: return
-
-    def md4_hash(data):
-        m = md4()
-        m.update(data)
-        return m
 
-    with open(filePath, 'rb') as f:
-        a = gen(f)
-        hashes = [md4_hash(data).digest() for data in a]
-        if len(hashes) == 1:
-            return hashes[0].encode("hex")
-        else: return md4_hash(reduce(lambda a,d: a + d, hashes, "")).hexdigest()
+    key = _file_key(filePath)
+    ed2k = hashCache.get(key)
+    if not ed2k:
+        ed2k = calculate_ed2k(filePath)
+        hashCache.add(key, ed2k)
+    return ed2k
         
         
 def get_file_size(path):
-    f = open(path)
-    size = len(f.read())
-    f.close()
-    return size
+    return os.path.getsize(path)
 
 
 
@@ -74,4 +175,76 @@ def read_xml_into_etree(filePath):
         f = open(filePath,"r")
         xmlASetree = etree.ElementTree(file = f)
         return xmlASetree
+
+
+class XMLIndex(object):
+    """
+    Lookup tables built from one of the xml files.
+
+    The xml is only parsed when there is no index file made from this version of it (same mtime),
+    after that the tables are loaded straight from the index. Subclasses name their tables in
+    TABLES and pass the function that fills them from the xml as build, it is called with the index.
+    """
+
+    TABLES = ()
+
+    # bump this when the layout of the index changes so old index files are rebuilt
+    INDEX_VERSION = 1
+
+    def __init__(self, filePath, build):
+        self.filePath = filePath
+        self.mtime = os.path.getmtime(filePath)
+
+        for name in self.TABLES:
+            setattr(self, name, {})
+
+        if not self._load():
+            build(self)
+            self._save()
+
+    def _indexPath(self):
+        if indexDir:
+            return os.path.join(indexDir, os.path.basename(self.filePath) + ".idx")
+        return self.filePath + ".idx"
+
+    def _load(self):
+        try:
+            with open(self._indexPath(), "rb") as f:
+                data = pickle.load(f)
+        except (IOError, EOFError, pickle.UnpicklingError, ValueError, AttributeError, ImportError):
+            return False
+
+        if data.get("version") != self.INDEX_VERSION or data.get("mtime") != self.mtime:
+            return False
+
+        for name in self.TABLES:
+            setattr(self, name, data[name])
+        return True
+
+    def _save(self):
+        indexPath = self._indexPath()
+        tmpPath = indexPath + ".tmp"
+        data = {"version": self.INDEX_VERSION, "mtime": self.mtime}
+        for name in self.TABLES:
+            data[name] = getattr(self, name)
+        try:
+            with open(tmpPath, "wb") as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            # windows can't rename over an existing file
+            if os.path.exists(indexPath):
+                os.remove(indexPath)
+            os.rename(tmpPath, indexPath)
+        except (IOError, OSError):
+            # not being able to write the index only means it is built again next time
+            pass
+
+
+def get_xml_index(indexClass, filePath):
+    """Returns the process wide indexClass instance for the xml, (re)building it when the xml changed."""
+    with _indexesLock:
+        index = _indexes.get((indexClass, filePath))
+        if not index or index.mtime != os.path.getmtime(filePath):
+            index = indexClass(filePath)
+            _indexes[(indexClass, filePath)] = index
+        return index
     
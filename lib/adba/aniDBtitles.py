@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+#
+# This file is part of aDBa.
+#
+# aDBa is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# aDBa is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with aDBa.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import re
+import string
+import xml.etree.cElementTree as etree
+
+import aniDBfileInfo as fileInfo
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+_punctuation = re.compile('[%s]' % re.escape(string.punctuation))
+
+
+def normalize_title(name):
+    """The form titles are compared in: lower case without any punctuation."""
+    return _punctuation.sub('', name.lower())
+
+
+def _build_anime_titles(titles):
+    """Fills the tables of an AnimeTitles from its xml."""
+    aid = 0
+    mainTitle = None
+    enTitle = None
+    root = None
+
+    for event, element in etree.iterparse(titles.filePath, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            elif element.tag == "anime":
+                aid = int(element.get("aid"))
+                mainTitle = None
+                enTitle = None
+            continue
+
+        if element.tag == "title":
+            if element.text:
+                titles.aids.setdefault(normalize_title(element.text), aid)
+                isMain = element.get("type") == "main"
+                if isMain and mainTitle is None:
+                    mainTitle = element.text
+                if (isMain or element.get(XML_LANG) == "en") and enTitle is None:
+                    enTitle = element.text
+
+        elif element.tag == "anime":
+            if aid not in titles.names:
+                titles.names[aid] = (mainTitle, enTitle)
+            # the titles have been indexed, there is no need to keep them around
+            root.clear()
+
+
+class AnimeTitles(fileInfo.XMLIndex):
+    """Lookup tables built from animetitles.xml."""
+
+    # aids: normalized title -> aid of the first anime that has it
+    # names: aid -> (main title, first title that is english or main)
+    TABLES = ("aids", "names")
+
+    def __init__(self, filePath):
+        fileInfo.XMLIndex.__init__(self, filePath, _build_anime_titles)
+
+    def get_aid(self, name):
+        """Returns the aid of the anime with the given title, 0 if there is none."""
+        return self.aids.get(normalize_title(name), 0)
+
+    def get_name(self, aid, onlyMain=True):
+        """Returns the main title of the anime (or the first english one if onlyMain is False), "" if there is none."""
+        mainTitle, enTitle = self.names.get(aid, (None, None))
+        if onlyMain:
+            return mainTitle or ""
+        return enTitle or ""
+
+
+def get_anime_titles(filePath=None):
+    """Returns the process wide AnimeTitles for the xml."""
+    if not filePath:
+        filePath = os.path.join(os.path.dirname(os.path.abspath( __file__ )), "animetitles.xml")
+    return fileInfo.get_xml_index(AnimeTitles, filePath)
@@ -20,46 +20,124 @@ import xml.etree.cElementTree as etree
 import aniDBfileInfo as fileInfo
 
 
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _build_anime_list(animeList):
+    """Fills the tables of an AnimeList from its xml."""
+    for anime in etree.parse(animeList.filePath).getroot().findall("anime"):
+        anidbid = _to_int(anime.get("anidbid"))
+        tvdbid = _to_int(anime.get("tvdbid"))
+        # "unknown", "movie" and the like don't map to anything
+        if anidbid is None or tvdbid is None or anidbid in animeList.anidb:
+            continue
+
+        defaultSeason = _to_int(anime.get("defaulttvdbseason"))
+        episodes = {}
+        offsets = []
+        splitSeasons = False
+
+        for mapping in anime.findall("mapping-list/mapping"):
+            anidbSeason = _to_int(mapping.get("anidbseason"))
+            tvdbSeason = _to_int(mapping.get("tvdbseason"))
+            if anidbSeason is None or tvdbSeason is None:
+                continue
+            if anidbSeason == 1 and tvdbSeason != defaultSeason:
+                splitSeasons = True
+
+            # ;1-27;2-28; maps anidb episode 1 to tvdb episode 27 and 2 to 28
+            for pair in (mapping.text or "").split(";"):
+                anidbEp, sep, tvdbEp = pair.partition("-")
+                anidbEp = _to_int(anidbEp)
+                # an anidb episode can be split into several tvdb episodes (1-2+3), we go with the first
+                tvdbEp = _to_int(tvdbEp.split("+")[0])
+                if anidbEp is not None and tvdbEp:
+                    episodes.setdefault((anidbSeason, anidbEp), (tvdbSeason, tvdbEp))
+
+            offset = _to_int(mapping.get("offset"))
+            if offset is not None:
+                start = _to_int(mapping.get("start")) or 1
+                end = _to_int(mapping.get("end"))
+                offsets.append((anidbSeason, tvdbSeason, start, end, offset))
+
+        animeList.anidb[anidbid] = (tvdbid, defaultSeason, episodes, offsets, splitSeasons)
+        animeList.tvdb.setdefault(tvdbid, []).append(anidbid)
+
+
+class AnimeList(fileInfo.XMLIndex):
+    """
+    Lookup tables built from anime-list.xml.
+
+    anidb: anidbid -> (tvdbid, defaulttvdbseason, episodes, offsets, splitSeasons) where
+        episodes is {(anidbseason, anidb episode): (tvdbseason, tvdb episode)} from the mapping texts,
+        offsets is [(anidbseason, tvdbseason, start, end, offset)] from the mapping attributes and
+        splitSeasons tells if the regular anidb episodes are spread over more than one tvdb season.
+        defaulttvdbseason is None when it isn't a season number (e.g. "a" for absolute numbering).
+    tvdb: tvdbid -> [anidbid, ...] in the order of the xml
+    """
+
+    TABLES = ("anidb", "tvdb")
+
+    def __init__(self, filePath):
+        fileInfo.XMLIndex.__init__(self, filePath, _build_anime_list)
+
 
 class TvDBMap():
     
     def __init__(self,filePath=None):
-        self.xmlMap = fileInfo.read_tvdb_map_xml(filePath)
+        if not filePath:
+            filePath = os.path.join(os.path.dirname(os.path.abspath( __file__ )), "anime-list.xml")
+        self.animeList = fileInfo.get_xml_index(AnimeList, filePath)
         
     def get_tvdb_for_anidb(self,anidb_id):
-        return self._get_x_for_y(anidb_id,"anidbid","tvdbid")
+        anime = self.animeList.anidb.get(_to_int(anidb_id))
+        if not anime:
+            return 0
+        return anime[0]
             
     def get_anidb_for_tvdb(self,tvdb_id):
-        return self._get_x_for_y(tvdb_id,"tvdbid","anidbid")
-        
-
-    def _get_x_for_y(self,xValue,x,y):
-        #print("searching "+x+" with the value "+str(xValue)+" and want to give back "+y)
-        xValue = str(xValue)
-        for anime in self.xmlMap.findall("anime"):
-            try:
-                if anime.get(x,False) == xValue:
-                    return int(anime.get(y,0))
-            except ValueError, e:
-                continue
-        return 0
-            
+        anidb_ids = self.animeList.tvdb.get(_to_int(tvdb_id))
+        if not anidb_ids:
+            return 0
+        return anidb_ids[0]
             
     def get_season_episode_for_anidb_absoluteNumber(self,anidb_id,absoluteNumber):
-        # NOTE: this cant be done without the length of each season from thetvdb
-        #TODO: implement
-        season = 0
-        episode = 0
-        
-        for anime in self.xmlMap.findall("anime"):
-            if int(anime.get("anidbid",False)) == anidb_id:
-                defaultSeason = int(anime.get("defaulttvdbseason",1))
-        
-        
-        return (season,episode)
+        """
+        Returns the tvdb (season, episode) of the regular anidb episode absoluteNumber of the anime,
+        (0, 0) if the list doesn't tell.
+        """
+        anime = self.animeList.anidb.get(_to_int(anidb_id))
+        absoluteNumber = _to_int(absoluteNumber)
+        if not anime or not absoluteNumber:
+            return (0, 0)
+
+        (tvdb_id, defaultSeason, episodes, offsets, splitSeasons) = anime
+
+        if (1, absoluteNumber) in episodes:
+            return episodes[(1, absoluteNumber)]
+
+        for (anidbSeason, tvdbSeason, start, end, offset) in offsets:
+            if anidbSeason == 1 and start <= absoluteNumber and (end is None or absoluteNumber <= end):
+                return (tvdbSeason, absoluteNumber + offset)
+
+        # the episodes that aren't listed are in the default season unless the anime is spread over
+        # several seasons, then we can't know which one without the length of each season
+        if defaultSeason is None or splitSeasons or offsets:
+            return (0, 0)
+        return (defaultSeason, absoluteNumber)
             
-    def get_season_episode_for_tvdb_absoluteNumber(self,anidb_id,absoluteNumber):
-        #TODO: implement
-        season = 0
-        episode = 0
-        return (season,episode)
\ No newline at end of file
+    def get_season_episode_for_tvdb_absoluteNumber(self,tvdb_id,absoluteNumber):
+        """
+        Returns the tvdb (season, episode) of the absolute number of the show, (0, 0) if the list doesn't tell.
+
+        This only works when the regular episodes of the show are a single anidb anime, its anidb episode
+        numbers are the absolute numbers then.
+        """
+        anidb_ids = [x for x in self.animeList.tvdb.get(_to_int(tvdb_id), []) if self.animeList.anidb[x][1] != 0]
+        if len(anidb_ids) != 1:
+            return (0, 0)
+        return self.get_season_episode_for_anidb_absoluteNumber(anidb_ids[0], absoluteNumber)
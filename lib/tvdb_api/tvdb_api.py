@@ -30,6 +30,14 @@ import datetime
 import time
 import traceback
 import socket
+import threading
+import zipfile
+import cPickle as pickle
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    OrderedDict = None
 
 try:
     import xml.etree.cElementTree as ElementTree
@@ -84,6 +92,9 @@ def clean_cache(cachedir):
 
     for file in files:
         ffile = os.path.join(cachedir,file)
+        # the show store keeps its own dir
+        if os.path.isdir(ffile):
+            continue
         # If modified time is > 24 hrs ago, die!
         # log().debug("Comparing %s mtime" % ffile)
         if now - os.stat(ffile).st_mtime > day:
@@ -92,6 +103,294 @@ def clean_cache(cachedir):
             except:
                 raise tvdb_error("Couldn't remove %s" % ffile)
 
+class ShowStore(object):
+    """Process wide store of the shows parsed from thetvdb.com, shared by
+    all the Tvdb instances so a show is only downloaded and parsed once.
+
+    A show is fresh for MAX_AGE seconds, after that it is fetched again (the
+    httplib2 cache revalidates the xml with its ETag then). A recache request
+    is answered from the store if the show was fetched less than
+    RECACHE_WINDOW seconds ago, so the several Tvdb instances that refresh a
+    show in one go still only fetch it once.
+
+    The last MEMORY_SIZE shows are kept in memory, all of them are written to
+    the store dir (if there is one) so they survive a restart. The files older
+    than MAX_AGE are deleted when a show is written, at most once every
+    PRUNE_INTERVAL seconds.
+    """
+
+    MAX_AGE = 24 * 60 * 60
+    RECACHE_WINDOW = 60
+    MEMORY_SIZE = 50
+    PRUNE_INTERVAL = 60 * 60
+
+    # bump this when the layout of the stored records changes
+    RECORD_VERSION = 1
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        if OrderedDict:
+            self.shows = OrderedDict()
+        else:
+            self.shows = {}
+        # sid -> time thetvdb.com last changed the show, if we know it
+        self.updated = {}
+        self.lastPrune = 0
+
+    def _fileName(self, storeDir, key):
+        return os.path.join(storeDir, "%s-%s-%s.pickle" % key)
+
+    def _isFresh(self, sid, fetched, maxAge):
+        if time.time() - fetched > maxAge:
+            return False
+        return self.updated.get(sid, 0) <= fetched
+
+    def get(self, key, storeDir, recache = False):
+        """Returns the stored Show for key (sid, series language, episode
+        language) if it is fresh enough, None otherwise
+        """
+        maxAge = recache and self.RECACHE_WINDOW or self.MAX_AGE
+
+        self.lock.acquire()
+        try:
+            if key in self.shows:
+                fetched, show = self.shows.pop(key)
+                self.shows[key] = (fetched, show)
+                if self._isFresh(key[0], fetched, maxAge):
+                    return show
+        finally:
+            self.lock.release()
+
+        if not storeDir:
+            return None
+
+        try:
+            f = open(self._fileName(storeDir, key), "rb")
+            try:
+                record = pickle.load(f)
+            finally:
+                f.close()
+        except (IOError, EOFError, pickle.UnpicklingError, ValueError, AttributeError, ImportError, TypeError):
+            return None
+
+        if record.get("version") != self.RECORD_VERSION or not self._isFresh(key[0], record["fetched"], maxAge):
+            return None
+
+        show = _recordToShow(record)
+        self._remember(key, record["fetched"], show)
+        return show
+
+    def add(self, key, show, storeDir, fetched = None):
+        """Stores a freshly fetched Show
+        """
+        if fetched is None:
+            fetched = time.time()
+        self._remember(key, fetched, show)
+
+        if not storeDir:
+            return
+
+        record = _showToRecord(show)
+        record["version"] = self.RECORD_VERSION
+        record["fetched"] = fetched
+
+        fileName = self._fileName(storeDir, key)
+        try:
+            if not os.path.isdir(storeDir):
+                os.makedirs(storeDir)
+            f = open(fileName + ".tmp", "wb")
+            try:
+                pickle.dump(record, f, pickle.HIGHEST_PROTOCOL)
+            finally:
+                f.close()
+            # windows can't rename over an existing file
+            if os.path.exists(fileName):
+                os.remove(fileName)
+            os.rename(fileName + ".tmp", fileName)
+        except (IOError, OSError), e:
+            log().debug("Couldn't store show %s: %s" % (key[0], e))
+
+        self._prune(storeDir)
+
+    def _prune(self, storeDir):
+        """Deletes the stored shows that are too old to be used again
+        """
+        self.lock.acquire()
+        try:
+            if time.time() - self.lastPrune < self.PRUNE_INTERVAL:
+                return
+            self.lastPrune = time.time()
+        finally:
+            self.lock.release()
+
+        oldest = time.time() - self.MAX_AGE
+        try:
+            fileNames = os.listdir(storeDir)
+        except OSError:
+            return
+
+        for fileName in fileNames:
+            if not (fileName.endswith(".pickle") or fileName.endswith(".pickle.tmp")):
+                continue
+            try:
+                if os.path.getmtime(os.path.join(storeDir, fileName)) < oldest:
+                    os.remove(os.path.join(storeDir, fileName))
+            except OSError:
+                # another thread got to it first
+                pass
+
+    def _remember(self, key, fetched, show):
+        self.lock.acquire()
+        try:
+            self.shows.pop(key, None)
+            self.shows[key] = (fetched, show)
+            while len(self.shows) > self.MEMORY_SIZE:
+                if OrderedDict:
+                    self.shows.popitem(False)
+                else:
+                    del self.shows[min(self.shows, key = lambda x: self.shows[x][0])]
+        finally:
+            self.lock.release()
+
+    def setUpdated(self, sid, updated):
+        """Tells the store when thetvdb.com last changed the show, anything
+        stored before that is fetched again
+        """
+        self.lock.acquire()
+        try:
+            self.updated[sid] = max(self.updated.get(sid, 0), updated)
+        finally:
+            self.lock.release()
+
+    def clear(self):
+        self.lock.acquire()
+        try:
+            self.shows.clear()
+            self.updated.clear()
+            self.lastPrune = 0
+        finally:
+            self.lock.release()
+
+showStore = ShowStore()
+
+
+def _showToRecord(show):
+    """Turns a Show into plain dicts and lists for the store
+    """
+    data = dict(show.data)
+    if isinstance(data.get('_actors'), Actors):
+        data['_actors'] = [dict(x) for x in data['_actors']]
+    seasons = {}
+    for seas_no, season in show.items():
+        seasons[seas_no] = dict((ep_no, dict(ep)) for (ep_no, ep) in season.items())
+    return {"data": data, "seasons": seasons}
+
+
+def _copyShow(show):
+    """Returns a Show with the seasons of show and a copy of its data, so
+    data can be added to it without changing the Show other instances use
+    """
+    copy = Show()
+    copy.update(show)
+    copy.data.update(show.data)
+    return copy
+
+
+def _recordToShow(record):
+    show = Show()
+    show.data.update(record["data"])
+    if '_actors' in show.data:
+        actors = Actors()
+        for cur_actor in show.data['_actors']:
+            actor = Actor()
+            actor.update(cur_actor)
+            actors.append(actor)
+        show.data['_actors'] = actors
+    for seas_no, episodes in record["seasons"].items():
+        season = Season()
+        for ep_no, values in episodes.items():
+            ep = Episode()
+            ep.update(values)
+            season[ep_no] = ep
+        show[seas_no] = season
+    return show
+
+
+class Updates(object):
+    """What thetvdb.com lists as changed in one of its updates feeds
+
+    series maps every changed show id to the time of its latest change,
+    episodes maps show ids to the ids of their changed episodes. A show
+    only in episodes had none of its own data changed.
+    """
+    # the feeds thetvdb.com publishes, with how far back each one goes
+    PERIODS = (("day", 24 * 60 * 60), ("week", 7 * 24 * 60 * 60), ("month", 30 * 24 * 60 * 60))
+    # how far past its length a feed is still used, so the daily show
+    # update, which runs a little over a day after the last one, gets the
+    # day feed and not the week one
+    PERIOD_SLACK = 60 * 60
+
+    def __init__(self):
+        self.time = 0
+        self.series = {}
+        self.episodes = {}
+
+    def changedShows(self):
+        """Returns the ids of all shows with changed show or episode data
+        """
+        return set(self.series) | set(self.episodes)
+
+    def changedEpisodes(self, sid):
+        """Returns the ids of the changed episodes of the show
+        """
+        return self.episodes.get(sid, set())
+
+    @classmethod
+    def period(cls, since, now = None):
+        """Returns the name of the smallest feed that covers everything
+        changed after since
+        """
+        if now is None:
+            now = time.time()
+        for name, length in cls.PERIODS:
+            if now - since <= length + cls.PERIOD_SLACK:
+                return name
+        return "all"
+
+
+def parseUpdates(src, since = 0):
+    """Parses the xml of an updates feed into an Updates, leaving out
+    everything changed at or before since
+    """
+    updates = Updates()
+
+    root = None
+    for event, element in ElementTree.iterparse(StringIO.StringIO(src), events = ("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+                # when the feed was made, 0 if it doesn't say
+                updates.time = int(root.get("time") or 0)
+            continue
+
+        if element.tag == "Series" and element.find("id") is not None:
+            sid = int(element.findtext("id"))
+            changed = int(element.findtext("time") or 0)
+            if changed > since:
+                updates.series[sid] = max(updates.series.get(sid, 0), changed)
+        elif element.tag == "Episode":
+            sid = int(element.findtext("Series"))
+            changed = int(element.findtext("time") or 0)
+            if changed > since:
+                updates.series[sid] = max(updates.series.get(sid, 0), changed)
+                updates.episodes.setdefault(sid, set()).add(int(element.findtext("id")))
+        else:
+            continue
+        root.clear()
+
+    return updates
+
+
 class ShowContainer(dict):
     """Simple dict that holds a series of Show instances
     """
@@ -104,6 +403,8 @@ class Show(dict):
     def __init__(self):
         dict.__init__(self)
         self.data = {}
+        # firstaired -> episodes, built by airedOn
+        self._airdates = None
 
     def __repr__(self):
         return "<Show %s (containing %s seasons)>" % (
@@ -130,7 +431,15 @@ class Show(dict):
             raise tvdb_attributenotfound("Cannot find attribute %s" % (repr(key)))
 
     def airedOn(self, date):
-        ret = self.search(str(date), 'firstaired')
+        if self._airdates is None:
+            airdates = {}
+            for cur_season in self.values():
+                for cur_ep in cur_season.values():
+                    if 'firstaired' in cur_ep:
+                        airdates.setdefault(unicode(cur_ep.get('firstaired')).lower(), []).append(cur_ep)
+            self._airdates = airdates
+
+        ret = list(self._airdates.get(unicode(date).lower(), []))
         if len(ret) == 0:
             raise tvdb_episodenotfound("Could not find any episodes that aired on %s" % date)
         return ret
@@ -489,6 +798,8 @@ class Tvdb:
         self.config['url_seriesBanner'] = "%(base_url)s/api/%(apikey)s/series/%%s/banners.xml" % self.config
         self.config['url_artworkPrefix'] = "%(base_url)s/banners/%%s" % self.config
 
+        self.config['url_updates'] = "%(base_url)s/api/%(apikey)s/updates/updates_%%s.zip" % self.config
+
     #end __init__
 
     def _getTempDir(self):
@@ -556,6 +867,25 @@ class Tvdb:
                 raise tvdb_error(errormsg)
     #end _getetsrc
 
+    def getUpdates(self, since, now = None):
+        """Returns an Updates with everything changed on thetvdb.com after
+        since (a unix timestamp), from the smallest feed covering it
+        """
+        period = Updates.period(since, now)
+        log().debug("Getting the %s updates" % period)
+        src = self._loadUrl(self.config['url_updates'] % (period), recache=True)
+        try:
+            zipped = zipfile.ZipFile(StringIO.StringIO(src))
+            src = zipped.read(zipped.namelist()[0])
+        except (zipfile.BadZipfile, IndexError), errormsg:
+            raise tvdb_error("The updates retrieved from thetvdb.com aren't a valid zip: %s" % (errormsg))
+
+        try:
+            return parseUpdates(src, since)
+        except (SyntaxError, ValueError, TypeError), errormsg:
+            raise tvdb_error("There was an error with the updates retrieved from thetvdb.com: %s" % (errormsg))
+    #end getUpdates
+
     def _setItem(self, sid, seas, ep, attrib, value):
         """Creates a new episode, creating Show(), Season() and
         Episode()s as required. Called by _getShowData to populate show
@@ -749,6 +1079,36 @@ class Tvdb:
             )
             getShowInLanguage = self.config['language']
 
+        storeKey = (sid, getShowInLanguage, language)
+        if self.config['cache_enabled'] and self.config['cache_location']:
+            storeDir = os.path.join(self.config['cache_location'], "shows")
+        else:
+            storeDir = None
+
+        if self.config['cache_enabled']:
+            recache = str(self.config['cache_enabled']).lower() == 'recache'
+            show = showStore.get(storeKey, storeDir, recache)
+            if show is not None:
+                log().debug('Using the stored data for %s' % (sid))
+
+                # the store might not have the extras this instance wants yet, they
+                # are added to a copy as other instances might be using the show
+                wantBanners = self.config['banners_enabled'] and '_banners' not in show.data
+                wantActors = self.config['actors_enabled'] and '_actors' not in show.data
+                if wantBanners or wantActors:
+                    show = _copyShow(show)
+                self.shows[sid] = show
+
+                if wantBanners:
+                    self._parseBanners(sid)
+                if wantActors:
+                    self._parseActors(sid)
+                if wantBanners or wantActors:
+                    showStore.add(storeKey, show, storeDir)
+                return
+
+        fetched = time.time()
+
         # Parse show information
         log().debug('Getting all series data for %s' % (sid))
         seriesInfoEt = self._getetsrc(
@@ -792,6 +1152,8 @@ class Tvdb:
                         value = self._cleanData(value)
                 self._setItem(sid, seas_no, ep_no, tag, value)
         #end for cur_ep
+
+        showStore.add(storeKey, self.shows[sid], storeDir, fetched)
     #end _geEps
 
     def _nameToSid(self, name):
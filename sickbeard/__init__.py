@@ -34,6 +34,7 @@ from providers import ezrss, tvtorrents, nzbs_org, nzbmatrix, nzbsrus, newznab,
 
 from sickbeard import searchCurrent, searchBacklog, showUpdater, versionChecker, properFinder, autoPostProcesser
 from sickbeard import helpers, db, exceptions, show_queue, search_queue, scheduler
+from sickbeard import name_cache, classes
 from sickbeard import logger
 
 from sickbeard.common import *
@@ -41,6 +42,7 @@ from sickbeard.common import *
 from sickbeard.databases import mainDB, cache_db
 
 from lib.configobj import ConfigObj
+from lib.adba import aniDBfileInfo
 
 invoked_command = None
 
@@ -97,6 +99,8 @@ WEB_HOST = None
 WEB_IPV6 = None
 
 LAUNCH_BROWSER = None
+DEBUG = None
+PRECOMPILE_TEMPLATES = None
 CACHE_DIR = None
 ACTUAL_CACHE_DIR = None
 ROOT_DIRS = None
@@ -358,7 +362,7 @@ def initialize(consoleLogging=True):
                 XBMC_UPDATE_LIBRARY, XBMC_HOST, XBMC_USERNAME, XBMC_PASSWORD, \
                 USE_PLEX, PLEX_NOTIFY_ONSNATCH, PLEX_NOTIFY_ONDOWNLOAD, PLEX_UPDATE_LIBRARY, \
                 PLEX_SERVER_HOST, PLEX_HOST, PLEX_USERNAME, PLEX_PASSWORD, \
-                showUpdateScheduler, __INITIALIZED__, LAUNCH_BROWSER, showList, loadingShowList, \
+                showUpdateScheduler, __INITIALIZED__, LAUNCH_BROWSER, DEBUG, PRECOMPILE_TEMPLATES, showList, loadingShowList, \
                 NZBS, NZBS_UID, NZBS_HASH, EZRSS, TVTORRENTS, TVTORRENTS_DIGEST, TVTORRENTS_HASH, TORRENT_DIR, USENET_RETENTION, SOCKET_TIMEOUT, \
                 SEARCH_FREQUENCY, DEFAULT_SEARCH_FREQUENCY, BACKLOG_SEARCH_FREQUENCY, \
                 QUALITY_DEFAULT, SEASON_FOLDERS_FORMAT, SEASON_FOLDERS_DEFAULT, ANIME_DEFAULT, STATUS_DEFAULT, \
@@ -416,6 +420,8 @@ def initialize(consoleLogging=True):
         WEB_USERNAME = check_setting_str(CFG, 'General', 'web_username', '')
         WEB_PASSWORD = check_setting_str(CFG, 'General', 'web_password', '')
         LAUNCH_BROWSER = bool(check_setting_int(CFG, 'General', 'launch_browser', 1))
+        DEBUG = bool(check_setting_int(CFG, 'General', 'debug', 1))
+        PRECOMPILE_TEMPLATES = bool(check_setting_int(CFG, 'General', 'precompile_templates', 0))
 
         ACTUAL_CACHE_DIR = check_setting_str(CFG, 'General', 'cache_dir', 'cache')
         # fix bad configs due to buggy code
@@ -431,6 +437,9 @@ def initialize(consoleLogging=True):
         if not helpers.makeDir(CACHE_DIR):
             logger.log(u"!!! Creating local cache dir failed, using system default", logger.ERROR)
             CACHE_DIR = None
+
+        # keep the anidb xml indexes with the rest of our cache instead of in the program dir
+        aniDBfileInfo.indexDir = CACHE_DIR
         
         ROOT_DIRS = check_setting_str(CFG, 'General', 'root_dirs', '')
         if not re.match(r'\d+\|[^|]+(?:\|[^|]+)*', ROOT_DIRS):
@@ -668,7 +677,7 @@ def initialize(consoleLogging=True):
 
         providerList = providers.makeProviderList()
         
-        logger.sb_log_instance.initLogging(consoleLogging=consoleLogging)
+        logger.sb_log_instance.initLogging(consoleLogging=consoleLogging, debugLogging=DEBUG)
 
         # initialize the main SB database
         db.upgradeDatabase(db.DBConnection(), mainDB.InitialSchema)
@@ -696,13 +705,14 @@ def initialize(consoleLogging=True):
                                                      threadName="CHECKVERSION",
                                                      runImmediately=True)
 
+        # the queues run their items as soon as they're added, the scheduler only makes sure their worker is alive
         showQueueScheduler = scheduler.Scheduler(show_queue.ShowQueue(),
-                                               cycleTime=datetime.timedelta(seconds=3),
+                                               cycleTime=datetime.timedelta(minutes=1),
                                                threadName="SHOWQUEUE",
                                                silent=True)
 
         searchQueueScheduler = scheduler.Scheduler(search_queue.SearchQueue(),
-                                               cycleTime=datetime.timedelta(seconds=3),
+                                               cycleTime=datetime.timedelta(minutes=1),
                                                threadName="SEARCHQUEUE",
                                                silent=True)
 
@@ -724,7 +734,7 @@ def initialize(consoleLogging=True):
         backlogSearchScheduler.action.cycleTime = BACKLOG_SEARCH_FREQUENCY
 
 
-        showList = []
+        showList = classes.ShowList()
         loadingShowList = {}
 
         __INITIALIZED__ = True
@@ -856,6 +866,9 @@ def saveAll():
     for show in showList:
         show.saveToDB()
 
+    # write the names we've cached
+    name_cache.flushCache()
+
     # save config
     logger.log(u"Saving config file to disk")
     save_config()
@@ -896,6 +909,9 @@ def saveAndShutdown(restart=False):
             logger.log(u"Restarting Sick Beard with " + str(popen_list))
             subprocess.Popen(popen_list, cwd=os.getcwd())
 
+    # os._exit doesn't wait for the log writer
+    logger.close()
+
     os._exit(0)
 
 
@@ -965,6 +981,8 @@ def save_config():
     new_config['General']['naming_dates'] = int(NAMING_DATES)
     new_config['General']['naming_anime'] = int(NAMING_ANIME)
     new_config['General']['launch_browser'] = int(LAUNCH_BROWSER)
+    new_config['General']['debug'] = int(DEBUG)
+    new_config['General']['precompile_templates'] = int(PRECOMPILE_TEMPLATES)
 
     new_config['General']['use_banner'] = int(USE_BANNER)
     new_config['General']['use_listview'] = int(USE_LISTVIEW)
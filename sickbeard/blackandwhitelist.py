@@ -16,8 +16,27 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
+import re
+import threading
+
 from sickbeard import db, logger
 
+# show_id -> BlackAndWhiteList, see get_black_and_white_list()
+_bwl_cache = {}
+_bwl_cache_lock = threading.Lock()
+
+def get_black_and_white_list(show_id):
+    """
+    Returns the BlackAndWhiteList for the given show. It's only loaded from the db the first time
+    and is kept up to date by the BlackAndWhiteList objects that change the keywords.
+    """
+    with _bwl_cache_lock:
+        if show_id not in _bwl_cache:
+            _bwl_cache[show_id] = BlackAndWhiteList(show_id)
+        return _bwl_cache[show_id]
+
 class BlackAndWhiteList(object):
     _tableBlack = "blacklist"
     _tableWhite = "whitelist"
@@ -25,6 +44,8 @@ class BlackAndWhiteList(object):
     whiteList = []
     blackDict = {}
     whiteDict = {}
+    blackMatchers = {}
+    whiteMatchers = {}
     
     def __init__(self,show_id):
         if not show_id:
@@ -39,6 +60,17 @@ class BlackAndWhiteList(object):
         (self.blackList,self.blackDict) = self.load_blacklist()
         (self.whiteList,self.whiteDict) = self.load_whitelist()
 
+        self.blackMatchers = self._build_matchers(self.blackDict)
+        self.whiteMatchers = self._build_matchers(self.whiteDict)
+
+    def _changed(self):
+        """
+        Reloads the keywords after we changed them and makes this the cached list for the show.
+        """
+        self.refresh()
+        with _bwl_cache_lock:
+            _bwl_cache[self.show_id] = self
+
     def load_blacklist(self):
         return self._load_list(self._tableBlack)
     
@@ -80,9 +112,8 @@ class BlackAndWhiteList(object):
         self._add_keywords(self._tableWhite, range, [value])
     
     def _add_keywords(self,table,range,values):
-        for value in values:
-            self.myDB.action("INSERT INTO "+table+" (show_id, range , keyword) VALUES (?,?,?)", [self.show_id,range,value])        
-        self.refresh()
+        self.myDB.mass_action([["INSERT INTO "+table+" (show_id, range , keyword) VALUES (?,?,?)", [self.show_id,range,value]] for value in values])
+        self._changed()
         
     def _del_all_black_keywors(self):
         self._del_all_keywords(self._tableBlack)
@@ -99,12 +130,12 @@ class BlackAndWhiteList(object):
     def _del_all_keywords(self,table):
         logger.log(u"Deleting all "+table+" keywords for "+str(self.show_id), logger.DEBUG)
         self.myDB.action("DELETE FROM "+table+" WHERE show_id = ?", [self.show_id])
-        self.refresh()
+        self._changed()
     
     def _del_all_keywords_for(self,table,range):
         logger.log(u"Deleting all "+range+" "+table+" keywords for "+str(self.show_id), logger.DEBUG)
         self.myDB.action("DELETE FROM "+table+" WHERE show_id = ? and range = ?", [self.show_id,range])
-        self.refresh()
+        self._changed()
         
     def _load_list(self,table):
         sqlResults = self.myDB.select("SELECT range,keyword FROM "+table+" WHERE show_id = ? ", [self.show_id])
@@ -124,50 +155,43 @@ class BlackAndWhiteList(object):
                 dict[row["range"]] = [row["keyword"]]
         
         return (list,dict)
+
+    def _build_matchers(self,keyword_dict):
+        """
+        Returns a dict of range -> one compiled regex that finds any of the keywords of that range
+        """
+        matchers = {}
+        for range in keyword_dict:
+            matchers[range] = re.compile("|".join([re.escape(keyword) for keyword in keyword_dict[range]]))
+        return matchers
     
     def is_valid_for_black(self,haystack):
-        return self._is_valid_for(self.blackDict, False, haystack)
+        return self._is_valid_for(self.blackMatchers, False, haystack)
 
     def is_valid_for_white(self,haystack):
-        return self._is_valid_for(self.whiteDict, True, haystack)
+        return self._is_valid_for(self.whiteMatchers, True, haystack)
 
     def is_valid(self,haystack):
         return self.is_valid_for_black(haystack) and self.is_valid_for_white(haystack)
     
-    def _is_valid_for(self,list,mood,haystack):
-        if not len(list):
-            return True
-
-        results = []
-        for range in list:
-            for keyword in list[range]:
-                string = None
-                if range == "global":
-                    string = haystack.name
-                elif haystack.__dict__.has_key(range):
-                    string = haystack.__dict__[range]
-                elif not haystack.__dict__.has_key(range):
-                    results.append((not mood))
-                else:
-                    results.append(False)
-                
-                if string:
-                    results.append(self._is_keyword_in_string(string, keyword) == mood)
-
-        # black: mood = False
-        # white: mood = True
-        if mood in results:
-            return mood
-        else:
-            return (not mood)
-    
-    def _is_keyword_in_string(self,fromPost,fromBWList):
+    def _is_valid_for(self,matchers,mood,haystack):
         """
-        will return true if fromBWList is found in fromPost
-        for now a basic find is used
+        black: mood = False, the haystack is valid if none of the keywords are found
+        white: mood = True, the haystack is valid if any of the keywords is found
         """
+        if not len(matchers):
+            return True
+
+        for range in matchers:
+            if range == "global":
+                string = haystack.name
+            else:
+                string = haystack.__dict__.get(range)
+
+            if string and matchers[range].search(string):
+                return mood
 
-        return (fromPost.find(fromBWList) >= 0)
+        return (not mood)
 
 class BlackWhiteKeyword(object):
     range = ""
@@ -122,6 +122,94 @@ class TorrentSearchResult(SearchResult):
     resultType = "torrent"
 
 
+class ShowList(list):
+    """
+    The list of TVShow objects, indexed by tvdb id and tvrage id so that
+    helpers.findCertainShow and helpers.findCertainTVRageShow don't have to search it.
+
+    A show can only be in it once, adding a second show with the same tvdb id raises
+    a MultipleShowObjectsException. Shows must be passed to updateShow() after their
+    tvrage id changes.
+    """
+
+    def __init__(self, shows=()):
+        list.__init__(self)
+        self._byTVDB = {}
+        self._byTVRage = {}
+        self.extend(shows)
+
+    def _index(self, show):
+        if show.tvdbid in self._byTVDB:
+            raise sickbeard.exceptions.MultipleShowObjectsException("Show "+str(show.tvdbid)+" is already in the show list")
+        self._byTVDB[show.tvdbid] = show
+        if show.tvrid:
+            self._byTVRage[show.tvrid] = show
+
+    def _reindex(self):
+        self._byTVDB = {}
+        self._byTVRage = {}
+        for show in self:
+            self._index(show)
+
+    def append(self, show):
+        self._index(show)
+        list.append(self, show)
+
+    def insert(self, index, show):
+        self._index(show)
+        list.insert(self, index, show)
+
+    def extend(self, shows):
+        for show in shows:
+            self.append(show)
+
+    def remove(self, show):
+        list.remove(self, show)
+        self._reindex()
+
+    def pop(self, index=-1):
+        show = list.pop(self, index)
+        self._reindex()
+        return show
+
+    def __setitem__(self, index, value):
+        list.__setitem__(self, index, value)
+        self._reindex()
+
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        self._reindex()
+
+    def __setslice__(self, i, j, sequence):
+        list.__setslice__(self, i, j, sequence)
+        self._reindex()
+
+    def __delslice__(self, i, j):
+        list.__delslice__(self, i, j)
+        self._reindex()
+
+    def __iadd__(self, shows):
+        self.extend(shows)
+        return self
+
+    def updateShow(self, show):
+        """
+        Updates the tvrage id index for a show in the list.
+        """
+        if self._byTVDB.get(show.tvdbid) is not show:
+            return
+
+        for tvrid in [x for x in self._byTVRage if self._byTVRage[x] is show and x != show.tvrid]:
+            del self._byTVRage[tvrid]
+        if show.tvrid:
+            self._byTVRage[show.tvrid] = show
+
+    def findShow(self, tvdbid):
+        return self._byTVDB.get(tvdbid)
+
+    def findTVRageShow(self, tvrid):
+        return self._byTVRage.get(tvrid)
+
 class ShowListUI:
     """
     This class is for tvdb-api. Instead of prompting with a UI to pick the
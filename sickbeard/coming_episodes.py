@@ -0,0 +1,198 @@
+# Author: Nic Wolfe <nic@wolfeden.ca>
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import with_statement
+
+import datetime
+import threading
+
+import sickbeard
+
+from sickbeard import db
+from sickbeard import logger
+from sickbeard.common import Quality, ARCHIVED, IGNORED, WANTED
+
+# episodes in the coming week with one of these aren't shown
+_comingSkipStatuses = frozenset(Quality.DOWNLOADED + Quality.SNATCHED + [ARCHIVED, IGNORED])
+# nor is the next episode of a show with nothing on in the coming week
+_laterSkipStatuses = frozenset(Quality.DOWNLOADED + Quality.SNATCHED)
+
+sorts = {
+    'date': lambda x: (x["airdate"], x["show_name"], x["season"], x["episode"]),
+    'show': lambda x: (x["show_name"], x["airdate"], x["season"], x["episode"]),
+    'network': lambda x: (x["network"], x["airdate"], x["show_name"], x["season"], x["episode"]),
+}
+
+class ComingEpisodes(object):
+    """
+    Process wide list of the episodes the coming episodes page is made of, so it can be shown without
+    querying the database.
+
+    Every episode that aired at most MISSED_DAYS days ago or has yet to air is read from the database
+    when the list is first needed and again on every daily show update, in between the code that
+    changes tv_episodes patches it. The episodes that aired since the last rebuild are kept until the
+    next one, the page only looks at the ones in its date range.
+    """
+
+    # how many days back missed episodes are shown
+    MISSED_DAYS = 3
+
+    # how many days ahead coming episodes are shown, after that only the next episode of every show
+    COMING_DAYS = 7
+
+    def __init__(self):
+        self.lock = threading.RLock()
+
+        # tvdbid -> {(season, episode): {name, description, airdate, status}}
+        self.episodes = None
+
+        # the episodes that aired before this airdate aren't in the list
+        self.since = None
+
+    def _fromDB(self, result):
+        return {"name": result["name"], "description": result["description"], "airdate": int(result["airdate"]),
+                "status": int(result["status"])}
+
+    def rebuild(self):
+        """
+        Reads all the episodes that can be on the page from the database. The lock is held the whole time so
+        no change made while the episodes are read is lost when they replace the list.
+        """
+        since = (datetime.date.today() - datetime.timedelta(days=self.MISSED_DAYS)).toordinal()
+
+        with self.lock:
+            episodes = {}
+            myDB = db.DBConnection()
+            for curEp in myDB.select("SELECT showid, season, episode, name, description, airdate, status FROM tv_episodes WHERE airdate >= ?", [since]):
+                episodes.setdefault(int(curEp["showid"]), {})[(int(curEp["season"]), int(curEp["episode"]))] = self._fromDB(curEp)
+
+            self.episodes = episodes
+            self.since = since
+
+        logger.log(u"Loaded %d episodes for the coming episodes", logger.DEBUG, sum(len(x) for x in episodes.values()))
+
+    def reset(self):
+        with self.lock:
+            self.episodes = None
+            self.since = None
+
+    def updateEpisode(self, tvdbid, season, episode, name, description, airdate, status, location):
+        """
+        Records the new values of an episode that was saved to the database.
+        """
+        with self.lock:
+            if self.episodes == None:
+                return
+
+            showEpisodes = self.episodes.setdefault(tvdbid, {})
+            if airdate >= self.since:
+                showEpisodes[(season, episode)] = {"name": name, "description": description, "airdate": airdate, "status": status}
+            else:
+                showEpisodes.pop((season, episode), None)
+
+    def removeEpisode(self, tvdbid, season, episode):
+        with self.lock:
+            if self.episodes == None:
+                return
+            self.episodes.get(tvdbid, {}).pop((season, episode), None)
+
+    def removeShow(self, tvdbid):
+        with self.lock:
+            if self.episodes == None:
+                return
+            self.episodes.pop(tvdbid, None)
+
+    def reloadShow(self, tvdbid):
+        """
+        Reads the episodes of the show from the database again, for code that changes them with its own SQL.
+        """
+        with self.lock:
+            if self.episodes == None:
+                return
+
+            showEpisodes = {}
+            myDB = db.DBConnection()
+            for curEp in myDB.select("SELECT season, episode, name, description, airdate, status FROM tv_episodes WHERE showid = ? AND airdate >= ?", [tvdbid, self.since]):
+                showEpisodes[(int(curEp["season"]), int(curEp["episode"]))] = self._fromDB(curEp)
+            self.episodes[tvdbid] = showEpisodes
+
+    def getEpisodes(self, sort='date'):
+        """
+        Returns the episodes for the coming episodes page sorted by sort (date, show or network): the ones in the
+        coming week that we don't have yet, for every show with nothing in the coming week its next episode and
+        the wanted ones that aired in the last few days.
+
+        Every episode is a dict of its showid, season, episode, name, description, airdate and status and the
+        show_name, network, airs, paused, quality and show_status of its show.
+        """
+        today = datetime.date.today()
+        next_week = (today + datetime.timedelta(days=self.COMING_DAYS)).toordinal()
+        recently = (today - datetime.timedelta(days=self.MISSED_DAYS)).toordinal()
+        today = today.toordinal()
+
+        with self.lock:
+            if self.episodes == None or recently < self.since:
+                self.rebuild()
+            allEpisodes = self.episodes.items()
+
+        results = []
+        showsById = dict((x.tvdbid, x) for x in sickbeard.showList)
+
+        for tvdbid, showEpisodes in allEpisodes:
+            curShow = showsById.get(tvdbid)
+            if not curShow:
+                continue
+
+            showResults = []
+            nextAirdate = None
+
+            for (season, episode), curEp in showEpisodes.items():
+                airdate = curEp["airdate"]
+
+                if airdate >= next_week:
+                    if nextAirdate == None or airdate < nextAirdate:
+                        nextAirdate = airdate
+                    continue
+
+                if season == 0:
+                    continue
+
+                if today <= airdate and curEp["status"] not in _comingSkipStatuses:
+                    showResults.append((season, episode, curEp))
+                elif recently <= airdate < today and curEp["status"] == WANTED:
+                    showResults.append((season, episode, curEp))
+
+            hasComing = [x for x in showResults if x[2]["airdate"] >= today]
+
+            # a show with nothing in the coming week gets its next episode(s)
+            if not hasComing and nextAirdate != None:
+                for (season, episode), curEp in showEpisodes.items():
+                    if curEp["airdate"] == nextAirdate and season != 0 and curEp["status"] not in _laterSkipStatuses:
+                        showResults.append((season, episode, curEp))
+
+            for season, episode, curEp in showResults:
+                result = dict(curEp)
+                result.update({"showid": tvdbid, "season": season, "episode": episode, "show_name": curShow.name,
+                               "network": curShow.network, "airs": curShow.airs, "paused": curShow.paused,
+                               "quality": curShow.quality, "show_status": curShow.status})
+                results.append(result)
+
+        results.sort(key=sorts.get(sort, sorts['date']))
+        return results
+
+comingEpisodes = ComingEpisodes()
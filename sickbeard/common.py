@@ -108,65 +108,15 @@ class Quality:
 
     @staticmethod
     def nameQuality(name, anime=False):
-
-        name = os.path.basename(name)
-
-        # if we have our exact text then assume we put it there
-        for x in Quality.qualityStrings:
-            if x == Quality.UNKNOWN:
-                continue
-
-            regex = '\W'+Quality.qualityStrings[x].replace(' ','\W')+'\W'
-            regex_match = re.search(regex, name, re.I)
-            if regex_match:
-                return x
-
-        if not anime:
-            return Quality.nameQualityNormal(name)
-        else:
-            return Quality.nameQualityAnime(name)
+        return qualityClassifier.nameQuality(name, anime)
 
     @staticmethod
     def nameQualityNormal(name):
-        checkName = lambda list, func: func([re.search(x, name, re.I) for x in list])
-        
-        if checkName(["pdtv.xvid", "hdtv.xvid", "dsr.xvid"], any) and not checkName(["720p"], all):
-            return Quality.SDTV
-        elif checkName(["dvdrip.xvid", "bdrip.xvid", "dvdrip.divx", "dvdrip.ws.xvid"], any) and not checkName(["720p"], all):
-            return Quality.SDDVD
-        elif checkName(["720p", "hdtv", "x264"], all) or checkName(["hr.ws.pdtv.x264"], any):
-            return Quality.HDTV
-        elif checkName(["720p", "web.dl"], all) or checkName(["720p", "itunes", "h.?264"], all):
-            return Quality.HDWEBDL
-        elif checkName(["720p", "bluray", "x264"], all) or checkName(["720p", "hddvd", "x264"], all):
-            return Quality.HDBLURAY
-        elif checkName(["1080p", "bluray", "x264"], all) or checkName(["1080p", "hddvd", "x264"], all):
-            return Quality.FULLHDBLURAY
-        else:
-            return Quality.UNKNOWN
+        return qualityClassifier.nameQualityNormal(name)
         
     @staticmethod
     def nameQualityAnime(name):
-        checkName = lambda list, func: func([re.search(x, name, re.I) for x in list])
-        
-        
-        blueRayOptions = checkName(["bluray","blu-ray"],any)
-        hdOptions = checkName(["720p","1280x720"], any)
-
-        if checkName(["360p","XviD"], any):
-            return Quality.SDTV
-        elif checkName(["dvd","480p","848x480"], any):
-            return Quality.SDDVD
-        elif hdOptions and not blueRayOptions:
-            return Quality.HDTV
-        elif hdOptions and not blueRayOptions:
-            return Quality.HDWEBDL
-        elif blueRayOptions and hdOptions:
-            return Quality.HDBLURAY
-        elif blueRayOptions and checkName(["1080p", "1920x1080"],any):
-            return Quality.FULLHDBLURAY
-        else:
-            return Quality.assumeQuality(name)
+        return qualityClassifier.nameQualityAnime(name)
 
     @staticmethod
     def assumeQuality(name):
@@ -206,6 +156,92 @@ class Quality:
     SNATCHED = None
     SNATCHED_PROPER = None
 
+class QualityClassifier:
+    """
+    Works out the quality of a release name. All the patterns are compiled once and each of them is
+    searched for at most once per name, the quality rules only look at which patterns were found.
+    """
+
+    def __init__(self):
+        self._patterns = {}
+
+        # if we have our exact text then assume we put it there
+        self._qualityStringPatterns = []
+        for x in Quality.qualityStrings:
+            if x == Quality.UNKNOWN:
+                continue
+            self._qualityStringPatterns.append((x, re.compile('\W'+Quality.qualityStrings[x].replace(' ','\W')+'\W', re.I)))
+
+    def _tokens(self, name):
+        """
+        Returns a function that tells if a pattern is in the name, remembering the answers.
+        """
+        found = {}
+
+        def has(pattern):
+            if pattern not in found:
+                if pattern not in self._patterns:
+                    self._patterns[pattern] = re.compile(pattern, re.I)
+                found[pattern] = self._patterns[pattern].search(name) != None
+            return found[pattern]
+
+        return has
+
+    def nameQuality(self, name, anime=False):
+
+        name = os.path.basename(name)
+
+        for x, regex in self._qualityStringPatterns:
+            if regex.search(name):
+                return x
+
+        if not anime:
+            return self.nameQualityNormal(name)
+        else:
+            return self.nameQualityAnime(name)
+
+    def nameQualityNormal(self, name):
+        has = self._tokens(name)
+        hasAny = lambda list: any([has(x) for x in list])
+        hasAll = lambda list: all([has(x) for x in list])
+
+        if hasAny(["pdtv.xvid", "hdtv.xvid", "dsr.xvid"]) and not has("720p"):
+            return Quality.SDTV
+        elif hasAny(["dvdrip.xvid", "bdrip.xvid", "dvdrip.divx", "dvdrip.ws.xvid"]) and not has("720p"):
+            return Quality.SDDVD
+        elif hasAll(["720p", "hdtv", "x264"]) or has("hr.ws.pdtv.x264"):
+            return Quality.HDTV
+        elif hasAll(["720p", "web.dl"]) or hasAll(["720p", "itunes", "h.?264"]):
+            return Quality.HDWEBDL
+        elif hasAll(["720p", "bluray", "x264"]) or hasAll(["720p", "hddvd", "x264"]):
+            return Quality.HDBLURAY
+        elif hasAll(["1080p", "bluray", "x264"]) or hasAll(["1080p", "hddvd", "x264"]):
+            return Quality.FULLHDBLURAY
+        else:
+            return Quality.UNKNOWN
+
+    def nameQualityAnime(self, name):
+        has = self._tokens(name)
+        hasAny = lambda list: any([has(x) for x in list])
+
+        blueRayOptions = hasAny(["bluray","blu-ray"])
+        hdOptions = hasAny(["720p","1280x720"])
+
+        if hasAny(["360p","XviD"]):
+            return Quality.SDTV
+        elif hasAny(["dvd","480p","848x480"]):
+            return Quality.SDDVD
+        elif hdOptions and not blueRayOptions:
+            return Quality.HDTV
+        elif blueRayOptions and hdOptions:
+            return Quality.HDBLURAY
+        elif blueRayOptions and hasAny(["1080p", "1920x1080"]):
+            return Quality.FULLHDBLURAY
+        else:
+            return Quality.assumeQuality(name)
+
+qualityClassifier = QualityClassifier()
+
 Quality.DOWNLOADED = [Quality.compositeStatus(DOWNLOADED, x) for x in Quality.qualityStrings.keys()]
 Quality.SNATCHED = [Quality.compositeStatus(SNATCHED, x) for x in Quality.qualityStrings.keys()]
 Quality.SNATCHED_PROPER = [Quality.compositeStatus(SNATCHED_PROPER, x) for x in Quality.qualityStrings.keys()]
@@ -46,7 +46,7 @@ def change_LOG_DIR(log_dir):
     if os.path.normpath(sickbeard.LOG_DIR) != os.path.normpath(log_dir):
         if helpers.makeDir(log_dir):
             sickbeard.LOG_DIR = os.path.normpath(log_dir)
-            logger.sb_log_instance.initLogging()
+            logger.sb_log_instance.initLogging(consoleLogging=logger.sb_log_instance.console_logging, debugLogging=sickbeard.DEBUG)
             logger.log(u"Initialized new log file in " + log_dir)
 
             cherry_log = os.path.join(sickbeard.LOG_DIR, "cherrypy.log")
@@ -48,4 +48,12 @@ class AddSceneNameCache(AddSceneExceptions):
         return self.hasTable("scene_names")
 
     def execute(self):
-        self.connection.action("CREATE TABLE scene_names (tvdb_id INTEGER, name TEXT)")
\ No newline at end of file
+        self.connection.action("CREATE TABLE scene_names (tvdb_id INTEGER, name TEXT)")
+
+class AddSceneIndexes(AddSceneNameCache):
+    def test(self):
+        return self.hasTable("idx_scene_names_name")
+
+    def execute(self):
+        self.connection.action("CREATE INDEX idx_scene_exceptions_tvdb_id ON scene_exceptions(tvdb_id)")
+        self.connection.action("CREATE INDEX idx_scene_names_name ON scene_names(name)")
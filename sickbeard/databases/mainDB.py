@@ -136,6 +136,8 @@ class NewQualitySettings (NumericProviders):
 
             try:
                 logger.log(u"Attempting to back up your sickbeard.db file before migration...")
+                # make sure everything in the WAL journal is in the file we copy
+                self.connection.action("PRAGMA wal_checkpoint")
                 shutil.copy(db.dbFilename(), db.dbFilename(suffix='v0'))
                 logger.log(u"Done backup, proceeding with migration.")
                 break
@@ -435,3 +437,24 @@ class Whitelist(Blacklist):
         query = "CREATE TABLE whitelist (show_id INTEGER, range TEXT, keyword TEXT);"
         self.connection.action(query)
         #self.incDBVersion()
+
+class AddEpisodeIndexes(Whitelist):
+
+    def test(self):
+        return self.hasTable("idx_tv_episodes_showid_season_episode")
+
+    def execute(self):
+
+        # the unique index can't be created while there are duplicates
+        MainSanityCheck(self.connection).fix_duplicate_episodes()
+
+        queries = [
+            "CREATE UNIQUE INDEX idx_tv_episodes_showid_season_episode ON tv_episodes(showid, season, episode);",
+            "CREATE INDEX idx_tv_episodes_showid_absolute_number ON tv_episodes(showid, absolute_number);",
+            "CREATE INDEX idx_tv_episodes_status_airdate ON tv_episodes(status, airdate);",
+            "CREATE INDEX idx_tv_episodes_airdate ON tv_episodes(airdate);",
+            # LIKE can only use an index with the same (case insensitive) collation
+            "CREATE INDEX idx_history_resource ON history(resource COLLATE NOCASE);",
+        ]
+        for query in queries:
+            self.connection.action(query)
@@ -20,17 +20,37 @@ from __future__ import with_statement
 
 import os.path
 import re
+import itertools
 import sqlite3
 import time
 import threading
 
+from contextlib import contextmanager
+
 import sickbeard
 
 from sickbeard import encodingKludge as ek
 from sickbeard import logger
 from sickbeard.exceptions import ex
 
-db_lock = threading.Lock()
+# reentrant so that writes made inside a transaction() don't block on it
+db_lock = threading.RLock()
+
+# every thread keeps one open connection per database file, see _getConnection
+_connection_pool = threading.local()
+
+# bumped by closeAllConnections() so other threads drop their stale connections
+_pool_generation = 0
+
+# (path, table name) -> the table's unique keys and its columns, see DBConnection._tableKeys
+_table_keys = {}
+
+# pragmas applied to every new connection: WAL lets readers run alongside the
+# single writer, and synchronous=NORMAL is safe with WAL while skipping most fsyncs
+CONNECTION_PRAGMAS = ["PRAGMA journal_mode = WAL",
+                      "PRAGMA synchronous = NORMAL",
+                      "PRAGMA temp_store = MEMORY",
+                      "PRAGMA cache_size = 4000"]
 
 def dbFilename(filename="sickbeard.db", suffix=None):
     """
@@ -44,73 +64,235 @@ def dbFilename(filename="sickbeard.db", suffix=None):
         filename = "%s.%s" % (filename, suffix)
     return ek.ek(os.path.join, sickbeard.DATA_DIR, filename)
 
+def _getPool():
+    """
+    Returns the calling thread's pool, dropping its connections first if
+    closeAllConnections() was called since they were opened.
+    """
+    pool = _connection_pool.__dict__
+    if pool.get('generation') != _pool_generation:
+        _closePooledConnections()
+        pool['generation'] = _pool_generation
+
+    return pool
+
+def _getConnection(filename):
+    """
+    Returns the calling thread's connection to the given database file, opening
+    (and tuning) a new one the first time the thread asks for it.
+
+    @param filename: the full path of the sqlite database file
+    """
+    pool = _getPool()
+
+    connection = pool['connections'].get(filename)
+    if connection is None:
+        connection = sqlite3.connect(filename, 20)
+        connection.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            try:
+                connection.execute(pragma).fetchall()
+            except sqlite3.DatabaseError, e:
+                logger.log(u"Unable to set \"" + pragma + "\" on " + filename + ": " + ex(e), logger.DEBUG)
+        pool['connections'][filename] = connection
+
+    return connection
+
+def _closePooledConnections():
+    """
+    Closes all the connections owned by the calling thread.
+    """
+    for connection in _connection_pool.__dict__.get('connections', {}).values():
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+    _connection_pool.connections = {}
+    _connection_pool.transactions = {}
+
+def closeAllConnections():
+    """
+    Closes the calling thread's connections right away and makes every other thread
+    reopen its connections the next time it uses one. Call this before a database
+    file is removed or replaced on disk.
+    """
+    global _pool_generation
+
+    with db_lock:
+        _pool_generation += 1
+        _closePooledConnections()
+        _connection_pool.generation = _pool_generation
+        _table_keys.clear()
+
 class DBConnection:
     def __init__(self, filename="sickbeard.db", suffix=None):
 
         self.filename = filename
-        self.connection = sqlite3.connect(dbFilename(filename), 20)
-        self.connection.row_factory = sqlite3.Row
+        self.path = dbFilename(filename)
+
+    def _getConnection(self):
+        return _getConnection(self.path)
+
+    # the connection belongs to whichever thread is using this object
+    connection = property(_getConnection)
+
+    def _inTransaction(self):
+        return _getPool()['transactions'].get(self.path, 0) > 0
+
+    def _execute(self, query, args=None, commit=False, many=False):
+
+        sqlResult = None
+        attempt = 0
+
+        while attempt < 5:
+            try:
+                if many:
+                    logger.log(self.filename+": "+query+" with "+str(len(args))+" sets of args", logger.DEBUG)
+                    sqlResult = self.connection.executemany(query, args)
+                elif args == None:
+                    logger.log(self.filename+": "+query, logger.DEBUG)
+                    sqlResult = self.connection.execute(query)
+                else:
+                    logger.log(self.filename+": "+query+" with args "+str(args), logger.DEBUG)
+                    sqlResult = self.connection.execute(query, args)
+                if commit:
+                    self.connection.commit()
+                # get out of the connection attempt loop since we were successful
+                break
+            except sqlite3.OperationalError, e:
+                if "unable to open database file" in e.message or "database is locked" in e.message:
+                    logger.log(u"DB error: "+ex(e), logger.WARNING)
+                    attempt += 1
+                    time.sleep(1)
+                else:
+                    logger.log(u"DB error: "+ex(e), logger.ERROR)
+                    raise
+            except sqlite3.DatabaseError, e:
+                logger.log(u"Fatal error executing query: " + ex(e), logger.ERROR)
+                raise
+
+        return sqlResult
 
     def action(self, query, args=None):
 
+        if query == None:
+            return
+
+        # writers are serialized, readers use select() and never wait on this lock
         with db_lock:
+            sqlResult = self._execute(query, args, commit=not self._inTransaction())
 
-            if query == None:
-                return
-    
-            sqlResult = None
-            attempt = 0
-    
-            while attempt < 5:
-                try:
-                    if args == None:
-                        logger.log(self.filename+": "+query, logger.DEBUG)
-                        sqlResult = self.connection.execute(query)
-                    else:
-                        logger.log(self.filename+": "+query+" with args "+str(args), logger.DEBUG)
-                        sqlResult = self.connection.execute(query, args)
-                    self.connection.commit()
-                    # get out of the connection attempt loop since we were successful
-                    break
-                except sqlite3.OperationalError, e:
-                    if "unable to open database file" in e.message or "database is locked" in e.message:
-                        logger.log(u"DB error: "+ex(e), logger.WARNING)
-                        attempt += 1
-                        time.sleep(1)
+        return sqlResult
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups every write made by this thread to this database file into a single
+        transaction, including the ones made through other DBConnection objects.
+        The transaction is committed when the outermost block exits and rolled back
+        if it raises. Other writers wait until it is done, readers keep seeing the
+        last committed data.
+
+        with myDB.transaction():
+            for curEp in episodes:
+                curEp.saveToDB()
+        """
+
+        with db_lock:
+            transactions = _getPool()['transactions']
+            transactions[self.path] = transactions.get(self.path, 0) + 1
+            success = False
+            try:
+                yield self
+                success = True
+            finally:
+                transactions[self.path] -= 1
+                if not transactions[self.path]:
+                    if success:
+                        self.connection.commit()
                     else:
-                        logger.log(u"DB error: "+ex(e), logger.ERROR)
-                        raise
-                except sqlite3.DatabaseError, e:
-                    logger.log(u"Fatal error executing query: " + ex(e), logger.ERROR)
-                    raise
-    
-            return sqlResult
+                        logger.log(u"Rolling back transaction on "+self.filename, logger.WARNING)
+                        self.connection.rollback()
+
+    def mass_action(self, querylist):
+        """
+        Runs a batch of writes in one transaction. Consecutive entries that use the
+        same query are handed to executemany together.
+
+        @param querylist: a list of (query, args) tuples, or (query,) for queries without args
+        @return: a list with the cursor of every executemany/execute call
+        """
+
+        sqlResult = []
+
+        with self.transaction():
+            for query, group in itertools.groupby(querylist, lambda x: x[0]):
+                argsList = [x[1] for x in group if len(x) > 1]
+                if argsList:
+                    sqlResult.append(self._execute(query, argsList, many=True))
+                else:
+                    sqlResult.append(self._execute(query))
 
+        return sqlResult
 
     def select(self, query, args=None):
 
-        sqlResults = self.action(query, args).fetchall()
+        if query == None:
+            return []
+
+        sqlResults = self._execute(query, args)
 
         if sqlResults == None:
             return []
 
-        return sqlResults
+        return sqlResults.fetchall()
+
+    def _tableKeys(self, tableName):
+        """
+        Returns a (uniqueKeys, columns) tuple for the given table. uniqueKeys is a list
+        with the set of columns of every unique index, columns is the set of all the
+        columns that aren't the INTEGER PRIMARY KEY.
+        """
+
+        if (self.path, tableName) not in _table_keys:
+            uniqueKeys = []
+            for index in self.connection.execute("PRAGMA index_list(%s)" % tableName).fetchall():
+                if index["unique"]:
+                    uniqueKeys.append(frozenset([x["name"] for x in self.connection.execute("PRAGMA index_info(%s)" % index["name"])]))
+
+            columns = set([x["name"] for x in self.connection.execute("PRAGMA table_info(%s)" % tableName)
+                           if not (x["pk"] and x["type"].upper() == "INTEGER")])
+
+            _table_keys[(self.path, tableName)] = (uniqueKeys, columns)
+
+        return _table_keys[(self.path, tableName)]
 
     def upsert(self, tableName, valueDict, keyDict):
 
-        changesBefore = self.connection.total_changes
+        # if the keys are backed by a unique index and we're writing every column then a
+        # replace does the same thing as the update/insert pair below in one statement
+        uniqueKeys, columns = self._tableKeys(tableName)
+        if frozenset(keyDict.keys()) in uniqueKeys and columns.issubset(valueDict.keys() + keyDict.keys()):
+            query = "INSERT OR REPLACE INTO "+tableName+" (" + ", ".join(valueDict.keys() + keyDict.keys()) + ")" + \
+                     " VALUES (" + ", ".join(["?"] * len(valueDict.keys() + keyDict.keys())) + ")"
+            self.action(query, valueDict.values() + keyDict.values())
+            return
 
         genParams = lambda myDict : [x + " = ?" for x in myDict.keys()]
 
-        query = "UPDATE "+tableName+" SET " + ", ".join(genParams(valueDict)) + " WHERE " + " AND ".join(genParams(keyDict))
+        # the update and the (optional) insert share one commit
+        with self.transaction():
+            changesBefore = self.connection.total_changes
 
-        self.action(query, valueDict.values() + keyDict.values())
+            query = "UPDATE "+tableName+" SET " + ", ".join(genParams(valueDict)) + " WHERE " + " AND ".join(genParams(keyDict))
 
-        if self.connection.total_changes == changesBefore:
-            query = "INSERT INTO "+tableName+" (" + ", ".join(valueDict.keys() + keyDict.keys()) + ")" + \
-                     " VALUES (" + ", ".join(["?"] * len(valueDict.keys() + keyDict.keys())) + ")"
             self.action(query, valueDict.values() + keyDict.values())
 
+            if self.connection.total_changes == changesBefore:
+                query = "INSERT INTO "+tableName+" (" + ", ".join(valueDict.keys() + keyDict.keys()) + ")" + \
+                         " VALUES (" + ", ".join(["?"] * len(valueDict.keys() + keyDict.keys())) + ")"
+                self.action(query, valueDict.values() + keyDict.values())
+
     def tableInfo(self, tableName):
         # FIXME ? binding is not supported here, but I cannot find a way to escape a string manually
         cursor = self.connection.execute("PRAGMA table_info(%s)" % tableName)
@@ -136,6 +318,8 @@ class DBSanityCheck(object):
 def upgradeDatabase(connection, schema):
     logger.log(u"Checking database structure...", logger.MESSAGE)
     _processUpgrade(connection, schema)
+    # the upgrade may have added indexes that upsert() can use
+    _table_keys.clear()
 
 def prettyName(str):
     return ' '.join([x.group() for x in re.finditer("([A-Z])([a-z0-9]+)", str)])
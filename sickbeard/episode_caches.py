@@ -0,0 +1,52 @@
+# Author: Nic Wolfe <nic@wolfeden.ca>
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+The caches built from the tv_episodes table. Code that changes tv_episodes tells this module
+once and every cache in the list is kept up to date.
+"""
+
+from sickbeard.show_stats import showStats
+from sickbeard.coming_episodes import comingEpisodes
+
+caches = [
+    showStats,
+    comingEpisodes,
+]
+
+def updateEpisode(tvdbid, season, episode, name, description, airdate, status, location):
+    """
+    Records the new values of an episode that was saved to the database.
+    """
+    for c in caches:
+        c.updateEpisode(tvdbid, season, episode, name, description, airdate, status, location)
+
+def removeEpisode(tvdbid, season, episode):
+    for c in caches:
+        c.removeEpisode(tvdbid, season, episode)
+
+def removeShow(tvdbid):
+    for c in caches:
+        c.removeShow(tvdbid)
+
+def reloadShow(tvdbid):
+    """
+    Reads the episodes of the show from the database again, for code that changes them with its own SQL.
+    """
+    for c in caches:
+        c.reloadShow(tvdbid)
@@ -16,10 +16,16 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 import datetime
+import heapq
+import itertools
 import threading
+import traceback
 
 from sickbeard import logger
+from sickbeard.exceptions import ex
 
 class QueuePriorities:
     LOW = 10
@@ -31,16 +37,32 @@ class GenericQueue(object):
     def __init__(self):
 
         self.currentItem = None
+
+        # a heap of QueueItems, the first one is the highest priority item that was added first
         self.queue = []
 
         self.thread = None
 
         self.queue_name = "QUEUE"
 
-        self.min_priority = 0
+        # the worker waits on this until there's an item it can run
+        self.condition = threading.Condition()
+        self.counter = itertools.count()
+
+        self._min_priority = 0
         
         self.currentItem = None
 
+    def _getMinPriority(self):
+        return self._min_priority
+
+    def _setMinPriority(self, min_priority):
+        with self.condition:
+            self._min_priority = min_priority
+            self.condition.notify()
+
+    min_priority = property(_getMinPriority, _setMinPriority)
+
     def pause(self):
         logger.log(u"Pausing queue")
         self.min_priority = 999999999999
@@ -50,56 +72,51 @@ class GenericQueue(object):
         self.min_priority = 0
 
     def add_item(self, item):
-        item.added = datetime.datetime.now()
-        self.queue.append(item)
+        with self.condition:
+            item.added = datetime.datetime.now()
+            item.queue_order = self.counter.next()
+            heapq.heappush(self.queue, item)
+            self.condition.notify()
         
         return item
 
     def run(self):
+        """
+        Starts the worker thread that runs the queue items if it isn't already going. The worker picks
+        up new items as soon as they're added so this only has to be called once, the scheduler calling
+        it again just restarts the worker if it died.
+        """
 
-        # only start a new task if one isn't already going
         if self.thread == None or self.thread.isAlive() == False:
+            self.thread = threading.Thread(None, self._runItems, self.queue_name)
+            self.thread.setDaemon(True)
+            self.thread.start()
 
-            # if the thread is dead then the current item should be finished
-            if self.currentItem != None:
-                self.currentItem.finish()
-                self.currentItem = None
+    def _runItems(self):
+
+        while True:
 
-            # if there's something in the queue then run it in a thread and take it out of the queue
-            if len(self.queue) > 0:
-
-                # sort by priority
-                def sorter(x,y):
-                    """
-                    Sorts by priority descending then time ascending
-                    """
-                    if x.priority == y.priority:
-                        if y.added == x.added:
-                            return 0
-                        elif y.added < x.added:
-                            return 1
-                        elif y.added > x.added:
-                            return -1
-                    else:
-                        return y.priority-x.priority
-
-                self.queue.sort(cmp=sorter)
-                
-                queueItem = self.queue[0]
-
-                if queueItem.priority < self.min_priority:
-                    return
-
-                # launch the queue item in a thread
-                # TODO: improve thread name
-                threadName = self.queue_name + '-' + queueItem.get_thread_name()
-                self.thread = threading.Thread(None, queueItem.execute, threadName)
-                self.thread.start()
+            # wait for an item we're allowed to run
+            with self.condition:
+                while not self.queue or self.queue[0].priority < self.min_priority:
+                    self.condition.wait()
 
+                queueItem = heapq.heappop(self.queue)
                 self.currentItem = queueItem
 
-                # take it out of the queue
-                del self.queue[0]
+            threading.currentThread().setName(self.queue_name + '-' + queueItem.get_thread_name())
+
+            try:
+                queueItem.execute()
+            except Exception, e:
+                logger.log(u"Exception generated in thread "+threading.currentThread().getName()+": " + ex(e), logger.ERROR)
+                logger.log(traceback.format_exc(), logger.DEBUG)
+
+            queueItem.finish()
+            with self.condition:
+                self.currentItem = None
+
+            threading.currentThread().setName(self.queue_name)
 
 class QueueItem:
     def __init__(self, name, action_id = 0):
@@ -114,6 +131,13 @@ class QueueItem:
         self.action_id = action_id
         
         self.added = None
+        self.queue_order = None
+
+    def __lt__(self, other):
+        """
+        Sorts by priority descending then the order they were added in
+        """
+        return (-self.priority, self.added, self.queue_order) < (-other.priority, other.added, other.queue_order)
 
     def get_thread_name(self):
         if self.thread_name:
@@ -147,6 +147,9 @@ def getURL (url, headers=[]):
     return result
 
 def findCertainShow (showList, tvdbid):
+    if isinstance(showList, classes.ShowList):
+        return showList.findShow(tvdbid)
+
     results = filter(lambda x: x.tvdbid == tvdbid, showList)
     if len(results) == 0:
         return None
@@ -160,6 +163,9 @@ def findCertainTVRageShow (showList, tvrid):
     if tvrid == 0:
         return None
 
+    if isinstance(showList, classes.ShowList):
+        return showList.findTVRageShow(tvrid)
+
     results = filter(lambda x: x.tvrid == tvrid, showList)
 
     if len(results) == 0:
@@ -505,8 +511,23 @@ def get_all_episodes_from_absolute_number(show, tvdb_id, absolute_numbers):
     if not show and tvdb_id:
         show = findCertainShow(sickbeard.showList, tvdb_id)
 
+    tvdbMap = adba.TvDBMap()
+
     for absolute_number in absolute_numbers:
-        ep = show.getEpisode(None, None,absolute_number=absolute_number)
+        ep = None
+
+        # the anime list knows where the episodes of most single season anime are, then there is no need to ask the db
+        if show.is_anime:
+            (tvdb_season, tvdb_episode) = tvdbMap.get_season_episode_for_tvdb_absoluteNumber(show.tvdbid, absolute_number)
+            if tvdb_season:
+                # only the episodes we already have in memory, the others are looked up by their absolute number below
+                ep = show.getEpisode(tvdb_season, tvdb_episode, noCreate=True)
+                # tvdb knows better
+                if ep and ep.absolute_number and ep.absolute_number != absolute_number:
+                    ep = None
+
+        if not ep:
+            ep = show.getEpisode(None, None,absolute_number=absolute_number)
         if ep:
             episodes.append(ep.episode)
         else:
@@ -594,12 +615,19 @@ def _check_against_names(name, show):
 
 
 def get_tvdbid(name, showList, useTvdb=False):
-    logger.log(u"Trying to get the tvdbid for "+name, logger.DEBUG)
-            
-    for show in showList:
-        if _check_against_names(name, show):
-            logger.log(u"Matched "+name+" in the showlist to the show "+show.name, logger.DEBUG)
-            return show.tvdbid
+    logger.log(u"Trying to get the tvdbid for %s", logger.DEBUG, name)
+
+    # the names of the shows in our show list are indexed, any other list has to be searched
+    if showList is sickbeard.showList:
+        tvdbid = sickbeard.name_cache.resolver.findShow(name)
+        if tvdbid:
+            logger.log(u"Matched %s in the showlist to the show with tvdbid %s", logger.DEBUG, name, tvdbid)
+            return tvdbid
+    else:
+        for show in showList:
+            if _check_against_names(name, show):
+                logger.log(u"Matched %s in the showlist to the show %s", logger.DEBUG, name, show.name)
+                return show.tvdbid
 
     if useTvdb:
         try:
@@ -16,7 +16,10 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 import os.path
+import threading
 
 import sickbeard
 
@@ -28,6 +31,24 @@ from sickbeard.metadata.generic import GenericMetadata
 from lib.hachoir_parser import createParser
 from lib.hachoir_metadata import extractMetadata
 
+# the sizes the web interface shows the images in
+THUMBNAIL_SIZES = {'banner': (600, 112),
+                   'poster': (136, 200),
+                   }
+
+# the other sizes the images can be asked for in by name, no thumbnails are made in any other size so
+# there's a limit to how many of them there can be
+THUMBNAIL_NAMED_SIZES = {'banner': {'small': (300, 56),
+                                    'large': (758, 140),
+                                    },
+                         'poster': {'small': (68, 100),
+                                    'large': (272, 400),
+                                    },
+                         }
+
+# makes sure a thumbnail is only made by one thread at a time
+thumbnail_lock = threading.Lock()
+
 class ImageCache:
     
     def __init__(self):
@@ -61,6 +82,76 @@ class ImageCache:
         banner_file_name = str(tvdb_id) + '.banner.jpg'
         return ek.ek(os.path.join, self._cache_dir(), banner_file_name)
 
+    def thumbnail_path(self, image_path, size):
+        """
+        Builds up the path to a thumbnail of a cached image, it's kept next to the image
+
+        returns: a full path to the thumbnail of the given size
+
+        image_path: full path to the cached image
+        size: (width, height) the thumbnail fits in
+        """
+        base_path, ext = ek.ek(os.path.splitext, image_path)
+        return base_path + '.' + str(size[0]) + 'x' + str(size[1]) + ext
+
+    def _thumbnail_is_current(self, thumb_path, image_mtime):
+        # thumbnails get the modification time of their image when they're made
+        return ek.ek(os.path.isfile, thumb_path) and int(ek.ek(os.path.getmtime, thumb_path)) == int(image_mtime)
+
+    def get_thumbnail(self, image_path, size):
+        """
+        Makes a thumbnail of a cached image unless there's one already that was made from the image
+        as it is now
+
+        returns: the full path to the thumbnail, or to the image itself if no thumbnail could be made
+        (eg. PIL isn't installed)
+
+        image_path: full path to the cached image
+        size: (width, height) the thumbnail has to fit in
+        """
+
+        thumb_path = self.thumbnail_path(image_path, size)
+
+        try:
+            image_mtime = ek.ek(os.path.getmtime, image_path)
+        except OSError:
+            return image_path
+
+        if self._thumbnail_is_current(thumb_path, image_mtime):
+            return thumb_path
+
+        try:
+            from PIL import Image
+        except ImportError: # PIL isn't installed
+            return image_path
+
+        with thumbnail_lock:
+            # another thread could have made it while we were waiting
+            if self._thumbnail_is_current(thumb_path, image_mtime):
+                return thumb_path
+
+            logger.log(u"Making a "+str(size[0])+"x"+str(size[1])+" thumbnail of "+image_path, logger.DEBUG)
+
+            tmp_path = thumb_path + '.tmp'
+            try:
+                im = Image.open(image_path)
+                if im.mode not in ('RGB', 'L'): # Convert GIFs and PNGs to RGB
+                    im = im.convert('RGB')
+                im.thumbnail(size, Image.ANTIALIAS)
+                im.save(tmp_path, 'JPEG')
+                ek.ek(os.utime, tmp_path, (image_mtime, image_mtime))
+
+                if ek.ek(os.path.isfile, thumb_path):
+                    ek.ek(os.remove, thumb_path)
+                ek.ek(os.rename, tmp_path, thumb_path)
+            except Exception, e:
+                logger.log(u"Unable to make a thumbnail of "+image_path+": "+exceptions.ex(e), logger.WARNING)
+                if ek.ek(os.path.isfile, tmp_path):
+                    ek.ek(os.remove, tmp_path)
+                return image_path
+
+        return thumb_path
+
     def has_poster(self, tvdb_id):
         """
         Returns true if a cached poster exists for the given tvdb id
@@ -18,8 +18,14 @@
 
 from __future__ import with_statement 
 
+import atexit
 import os
+import re
+import sys
 import threading
+import time
+
+from collections import deque
 
 import logging
 
@@ -34,6 +40,19 @@ NUM_LOGS = 3
 # log size in bytes
 LOG_SIZE = 10000000 # 10 megs
 
+# number of messages that can be waiting for the writer, any more debug and info messages are dropped so nobody
+# waits on the disk for them, warnings and errors are written straight away instead
+LOG_QUEUE_SIZE = 10000
+
+# most messages the writer writes in one go
+LOG_BATCH_SIZE = 500
+
+# bytes read at a time when reading the log backwards
+LOG_READ_BLOCK_SIZE = 65536
+
+# most bytes read when following the log, a reader further behind only gets the newest
+LOG_TAIL_SIZE = 1000000
+
 ERROR = logging.ERROR
 WARNING = logging.WARNING
 MESSAGE = logging.INFO
@@ -44,50 +63,101 @@ reverseNames = {u'ERROR': ERROR,
                 u'INFO': MESSAGE,
                 u'DEBUG': DEBUG}
 
+# the first line of every message in the log, the lines that don't match continue the message before them
+log_line_regex = re.compile(r"^(\w{3})\-(\d\d)\s*(\d\d)\:(\d\d):(\d\d)\s*([A-Z]+)\s*(.+?)\s*\:\:\s*(.*)$")
+
 class SBRotatingLogHandler(object):
 
     def __init__(self, log_file, num_files, num_bytes):
         self.num_files = num_files
         self.num_bytes = num_bytes
         
+        self.log_name = log_file
         self.log_file = log_file
-        self.cur_handler = None
+        self.cur_file = None
+        self.cur_size = 0
+
+        self.console_logging = False
 
-        self.writes_since_check = 0
+        # messages below this level aren't written anywhere, until logging is set up only errors are looked at
+        self.log_level = ERROR
 
         self.log_lock = threading.Lock()
 
-    def initLogging(self, consoleLogging=True):
-    
-        self.log_file = os.path.join(sickbeard.LOG_DIR, self.log_file)
-    
-        self.cur_handler = self._config_handler()
-    
-        logging.getLogger('sickbeard').addHandler(self.cur_handler)
-    
-        # define a Handler which writes INFO messages or higher to the sys.stderr
-        if consoleLogging:
-            console = logging.StreamHandler()
-    
-            console.setLevel(logging.INFO)
-    
-            # set a format which is simpler for console use
-            console.setFormatter(logging.Formatter('%(asctime)s %(levelname)s::%(message)s', '%H:%M:%S'))
-    
-            # add the handler to the root logger
-            logging.getLogger('sickbeard').addHandler(console)
-    
-        logging.getLogger('sickbeard').setLevel(logging.DEBUG)
+        # the writer waits on this for messages to be queued
+        self.log_condition = threading.Condition()
+        self.log_queue = None
+        self.writer = None
+        self.dropped = 0
+        self.registered_exit = False
+
+    def initLogging(self, consoleLogging=True, debugLogging=True):
+
+        self.close()
+
+        self.log_file = os.path.join(sickbeard.LOG_DIR, self.log_name)
+        self.console_logging = consoleLogging
+        self.log_level = DEBUG if debugLogging else MESSAGE
+
+        self.start()
+
+        # write out whatever is still waiting when the process exits
+        if not self.registered_exit:
+            atexit.register(self.close)
+            self.registered_exit = True
 
-    def _config_handler(self):
+    def start(self):
         """
-        Configure a file handler to log at file_name and return it.
+        Opens the log and starts the thread that writes the messages to it. After a fork the old thread
+        is gone, the messages still waiting for it are left to the parent.
         """
-    
-        file_handler = logging.FileHandler(self.log_file)
-        file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-8s %(message)s', '%b-%d %H:%M:%S'))
-        return file_handler
+        self.log_lock = threading.Lock()
+        self.log_condition = threading.Condition()
+        self.log_queue = deque()
+        self.dropped = 0
+
+        if self.cur_file:
+            self.cur_file.close()
+        self._open_log()
+
+        self.writer = threading.Thread(target=self._run_writer, name="LOGGER")
+        self.writer.setDaemon(True)
+        self.writer.start()
+
+    def close(self):
+        """
+        Writes everything that's waiting and stops the writer thread, anything logged after this is
+        written straight away.
+        """
+        writer = self.writer
+        if writer:
+            if writer.isAlive():
+                with self.log_condition:
+                    self.writer = None
+                    self.log_condition.notify()
+                writer.join(10)
+            else:
+                # a forked copy, the waiting messages are the parent's to write
+                self.writer = None
+                self.log_lock = threading.Lock()
+                self.log_condition = threading.Condition()
+                self.log_queue = None
+
+        with self.log_lock:
+            # anything that was queued while we were stopping
+            records = self._get_waiting()
+            while records:
+                self._write(records)
+                records = self._get_waiting()
+
+            if self.cur_file:
+                self.cur_file.close()
+                self.cur_file = None
+
+    def _open_log(self):
+        self.cur_file = open(self.log_file, 'a')
+        self.cur_file.seek(0, 2)
+        self.cur_size = self.cur_file.tell()
 
     def _log_file_name(self, i):
         """
@@ -111,69 +181,283 @@ class SBRotatingLogHandler(object):
     
     def _rotate_logs(self):
         
-        sb_logger = logging.getLogger('sickbeard')
-        
-        # delete the old handler
-        if self.cur_handler:
-            self.cur_handler.flush()
-            self.cur_handler.close()
-            sb_logger.removeHandler(self.cur_handler)
+        # close the old file
+        if self.cur_file:
+            self.cur_file.close()
+            self.cur_file = None
     
         # rename or delete all the old log files
         for i in range(self._num_logs(), -1, -1):
             cur_file_name = self._log_file_name(i)
             try:
-                if i >= NUM_LOGS:
+                if i >= self.num_files:
                     os.remove(cur_file_name)
                 else:
                     os.rename(cur_file_name, self._log_file_name(i+1))
-            except WindowsError:
+            except OSError:
                 pass
         
-        # the new log handler will always be on the un-numbered .log file
-        new_file_handler = self._config_handler()
-        
-        self.cur_handler = new_file_handler
-        
-        sb_logger.addHandler(new_file_handler)
+        # the new log will always be the un-numbered .log file
+        self._open_log()
 
-    def log(self, toLog, logLevel=MESSAGE):
-    
-        with self.log_lock:
-    
-            # check the size and see if we need to rotate
-            if self.writes_since_check >= 10:
-                if os.path.isfile(self.log_file) and os.path.getsize(self.log_file) >= LOG_SIZE:
+    def read_log(self, minLevel=MESSAGE, maxLines=500):
+        """
+        Reads the newest messages of at least minLevel from the log, stopping once they make up maxLines lines.
+        The log is read backwards from its end a block at a time, going on to the older log files only when the
+        newer ones don't have enough.
+
+        Returns: the messages newest first, every one of them with its lines in order, and the offset the
+        messages written after them start at in the log (for read_log_since)
+        """
+        messages = []
+        numLines = 0
+
+        offset = 0
+        if os.path.isfile(self.log_file):
+            offset = os.path.getsize(self.log_file)
+
+        for i in range(self.num_files + 1):
+            cur_file_name = self._log_file_name(i)
+            if not os.path.isfile(cur_file_name):
+                break
+
+            # read backwards the lines that continue a message come before its first line
+            continuation = []
+            for line in _reverse_lines(cur_file_name, offset if i == 0 else None):
+                level = _message_level(line)
+                if level is None:
+                    continuation.append(line)
+                    continue
+
+                if level >= minLevel:
+                    continuation.append(line)
+                    continuation.reverse()
+                    messages.append(u"".join(continuation))
+                    numLines += len(continuation)
+                    if numLines >= maxLines:
+                        return messages, offset
+
+                continuation = []
+
+        return messages, offset
+
+    def read_log_since(self, offset, minLevel=MESSAGE):
+        """
+        Reads the messages of at least minLevel that were written to the log after the byte offset. If the log
+        has been rotated since they're read from the start of the new one.
+
+        Returns: the messages oldest first and the offset to read the next ones from
+        """
+        if not os.path.isfile(self.log_file):
+            return [], 0
+
+        f = open(self.log_file, 'rb')
+        try:
+            f.seek(0, 2)
+            size = f.tell()
+
+            if offset < 0 or offset > size:
+                offset = 0
+
+            # too far behind, skip to the end of the log
+            skipFirst = size - offset > LOG_TAIL_SIZE
+            if skipFirst:
+                offset = size - LOG_TAIL_SIZE
+
+            f.seek(offset)
+            data = f.read(size - offset)
+        finally:
+            f.close()
+
+        # a line that's still being written is read next time
+        end = data.rfind('\n') + 1
+        lines = data[:end].split('\n')[:-1]
+        if skipFirst and lines:
+            lines.pop(0)
+
+        messages = []
+        cur_message = None
+        for line in lines:
+            line = line.decode('utf-8', 'replace') + u'\n'
+            level = _message_level(line)
+            if level is None:
+                if cur_message is not None:
+                    cur_message.append(line)
+                continue
+
+            cur_message = None
+            if level >= minLevel:
+                cur_message = [line]
+                messages.append(cur_message)
+
+        return [u"".join(x) for x in messages], offset + end
+
+    def _get_waiting(self):
+        """
+        Returns the messages waiting in the queue, at most LOG_BATCH_SIZE of them.
+        """
+        records = []
+        if self.log_queue is None:
+            return records
+
+        try:
+            while len(records) < LOG_BATCH_SIZE:
+                records.append(self.log_queue.popleft())
+        except IndexError:
+            pass
+        return records
+
+    def _run_writer(self):
+
+        me = threading.currentThread()
+
+        while True:
+            with self.log_condition:
+                while not self.log_queue and self.writer is me:
+                    self.log_condition.wait()
+                records = self._get_waiting()
+
+            # close() takes the writer away, it stops once everything has been written
+            if not records:
+                return
+
+            with self.log_lock:
+                if self.dropped:
+                    records.append((time.time(), WARNING, "LOGGER", u"The log couldn't keep up, %d messages were dropped", (self.dropped,)))
+                    self.dropped = 0
+                self._write(records)
+
+    def _write(self, records):
+        """
+        Writes the messages to the log file and the console, has to be called with the log lock held.
+        """
+        if not records:
+            return
+
+        fileLines = []
+        consoleLines = []
+
+        for created, logLevel, threadName, toLog, args in records:
+            out_line = _format_message(threadName, toLog, args).encode('utf-8')
+            levelName = logging.getLevelName(logLevel)
+            when = time.localtime(created)
+
+            fileLines.append("%s %-8s %s\n" % (time.strftime('%b-%d %H:%M:%S', when), levelName, out_line))
+            if self.console_logging and logLevel >= MESSAGE:
+                consoleLines.append("%s %s::%s\n" % (time.strftime('%H:%M:%S', when), levelName, out_line))
+
+        if self.cur_file:
+            try:
+                data = "".join(fileLines)
+                self.cur_file.write(data)
+                self.cur_file.flush()
+                self.cur_size += len(data)
+
+                # check the size and see if we need to rotate
+                if self.cur_size >= self.num_bytes:
                     self._rotate_logs()
-                self.writes_since_check = 0
-            else:
-                self.writes_since_check += 1
-    
-            meThread = threading.currentThread().getName()
-            message = meThread + u" :: " + toLog
-        
-            out_line = message.encode('utf-8')
-        
-            sb_logger = logging.getLogger('sickbeard')
-    
+            except (IOError, OSError, ValueError):
+                pass
+
+        if consoleLines:
             try:
-                if logLevel == DEBUG:
-                    sb_logger.debug(out_line)
-                elif logLevel == MESSAGE:
-                    sb_logger.info(out_line)
-                elif logLevel == WARNING:
-                    sb_logger.warning(out_line)
-                elif logLevel == ERROR:
-                    sb_logger.error(out_line)
-            
-                    # add errors to the UI logger
-                    classes.ErrorViewer.add(classes.UIError(message))
-                else:
-                    sb_logger.log(logLevel, out_line)
-            except ValueError:
+                sys.stderr.write("".join(consoleLines))
+            except (IOError, ValueError):
                 pass
 
+    def log(self, toLog, logLevel=MESSAGE, args=()):
+
+        if logLevel < self.log_level:
+            return
+
+        meThread = threading.currentThread().getName()
+
+        # add errors to the UI logger
+        if logLevel >= ERROR:
+            classes.ErrorViewer.add(classes.UIError(_format_message(meThread, toLog, args)))
+
+        record = (time.time(), logLevel, meThread, toLog, args)
+
+        if self.writer and len(self.log_queue) < LOG_QUEUE_SIZE:
+            with self.log_condition:
+                self.log_queue.append(record)
+                self.log_condition.notify()
+        elif self.writer and logLevel < WARNING:
+            self.dropped += 1
+        else:
+            # the writer can't keep up, warnings and errors are too important to drop so the caller writes them
+            # itself, ahead of the messages that are still waiting
+            with self.log_lock:
+                self._write([record])
+
+
+def _format_message(threadName, toLog, args):
+    """
+    Makes the line that ends up in the log out of the message and its arguments
+    """
+    if isinstance(toLog, str):
+        toLog = toLog.decode('utf-8', 'replace')
+
+    if args:
+        try:
+            toLog = toLog % args
+        except (TypeError, ValueError):
+            toLog = toLog + u" " + repr(args)
+
+    return threadName + u" :: " + toLog
+
+def _message_level(line):
+    """
+    Returns the level of the message that starts on the line of the log, None if the line continues the message
+    before it and 0 if the level isn't one we know.
+    """
+    match = log_line_regex.match(line)
+    if not match:
+        return None
+    return reverseNames.get(match.group(6), 0)
+
+def _reverse_lines(fileName, end=None):
+    """
+    Yields the lines of a log file from the last to the first, reading the file backwards a block at a time.
+
+    end: byte offset to start reading backwards from, the end of the file if it's None
+    """
+    f = open(fileName, 'rb')
+    try:
+        f.seek(0, 2)
+        pos = f.tell()
+        if end is not None:
+            pos = min(pos, end)
+
+        rest = ''
+        while pos > 0:
+            readSize = min(LOG_READ_BLOCK_SIZE, pos)
+            pos -= readSize
+            f.seek(pos)
+            lines = (f.read(readSize) + rest).split('\n')
+
+            # the first line could start in the block before this one
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.decode('utf-8', 'replace') + u'\n'
+
+        if rest:
+            yield rest.decode('utf-8', 'replace') + u'\n'
+    finally:
+        f.close()
+
 sb_log_instance = SBRotatingLogHandler('sickbeard.log', NUM_LOGS, LOG_SIZE)
 
-def log(toLog, logLevel=MESSAGE):
-    sb_log_instance.log(toLog, logLevel)
\ No newline at end of file
+def log(toLog, logLevel=MESSAGE, *args):
+    """
+    Logs toLog at logLevel, any extra arguments are %-formatted into toLog by the writer only if the message
+    is actually written. Debug messages that are expensive to build can be skipped with isEnabledFor.
+    """
+    sb_log_instance.log(toLog, logLevel, args)
+
+def isEnabledFor(logLevel):
+    return logLevel >= sb_log_instance.log_level
+
+def close():
+    sb_log_instance.close()
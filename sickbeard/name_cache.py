@@ -16,50 +16,242 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
+import threading
+import time
+
+import sickbeard
+
 from sickbeard import db
-from sickbeard.helpers import sanitizeSceneName
+from sickbeard import logger
+from sickbeard.helpers import sanitizeSceneName, full_sanitizeSceneName
+
+class NameResolver(object):
+    """
+    Process wide index that resolves show names to tvdb ids without a trip to the database.
+
+    Every name is keyed by its full_sanitizeSceneName version. The index is built from the
+    show list, the scene_exceptions table and the scene_names table the first time it's
+    needed and is then kept up to date by the code that changes those. Names added to the
+    cache are written to cache.db in batches instead of one query each.
+    """
+
+    # write the cached names to the db once there are this many or they are this many seconds old
+    FLUSH_SIZE = 50
+    FLUSH_INTERVAL = 60
+
+    def __init__(self):
+        self.lock = threading.RLock()
+
+        # goes up every time a name could resolve to a different show than before, so the provider
+        # caches know when to look at the results they couldn't match again
+        self.generation = 0
+
+        self.reset()
+
+    def reset(self):
+        """
+        Throws away the index, it will be rebuilt the next time it is used.
+        """
+        with self.lock:
+            self._built = False
+            self.generation += 1
+
+            # names and scene exceptions of the shows in the show list -> tvdb id
+            self._showNames = {}
+            # tvdb id -> the keys of that show in _showNames
+            self._showKeys = {}
+
+            # all the scene exceptions -> tvdb id
+            self._exceptions = {}
+            # tvdb id -> its scene exceptions
+            self._exceptionNames = {}
+
+            # names we've looked up before -> tvdb id (0 if we don't know the show)
+            self._cache = {}
+            # (name, tvdb id) pairs that are not in cache.db yet
+            self._pending = []
+            self._lastFlush = time.time()
+
+    def _build(self):
+
+        if self._built:
+            return
+
+        with self.lock:
+            if self._built:
+                return
+
+            logger.log(u"Building the show name index", logger.DEBUG)
+
+            myDB = db.DBConnection("cache.db")
+
+            for cur_exception in myDB.select("SELECT tvdb_id, show_name FROM scene_exceptions"):
+                self._addException(int(cur_exception["tvdb_id"]), cur_exception["show_name"])
+
+            for cur_name in myDB.select("SELECT tvdb_id, name FROM scene_names"):
+                self._cache.setdefault(full_sanitizeSceneName(cur_name["name"]), int(cur_name["tvdb_id"]))
+
+            for show in sickbeard.showList or []:
+                self._indexShow(show)
+
+            self._built = True
+
+    def _addException(self, tvdb_id, name):
+        self._exceptions.setdefault(full_sanitizeSceneName(name), tvdb_id)
+        self._exceptionNames.setdefault(tvdb_id, []).append(name)
+
+    def _indexShow(self, show):
+        keys = set([full_sanitizeSceneName(x) for x in [show.name] + self._exceptionNames.get(show.tvdbid, [])])
+        keys.discard('')
+
+        self._showKeys[show.tvdbid] = keys
+        for key in keys:
+            self._showNames.setdefault(key, show.tvdbid)
+
+    def _unindexShow(self, tvdb_id):
+        for key in self._showKeys.pop(tvdb_id, []):
+            if self._showNames.get(key) == tvdb_id:
+                del self._showNames[key]
+
+    def findShow(self, name):
+        """
+        Returns the tvdb id of the show in the show list that goes by the given name (or has it
+        as a scene exception), None if there is none.
+        """
+        self._build()
+        return self._showNames.get(full_sanitizeSceneName(name))
+
+    def findException(self, name):
+        """
+        Returns the tvdb id of the scene exception matching the given name, None if there is none.
+        """
+        self._build()
+        return self._exceptions.get(full_sanitizeSceneName(name))
+
+    def findCached(self, name):
+        """
+        Returns the tvdb id we cached for the given name, 0 if we know we don't know the show
+        and None if the name was never cached.
+        """
+        self._build()
+        return self._cache.get(full_sanitizeSceneName(name))
+
+    def addShow(self, show):
+        with self.lock:
+            self.generation += 1
+            if self._built:
+                self._indexShow(show)
+
+    def removeShow(self, tvdb_id):
+        with self.lock:
+            self.generation += 1
+            if self._built:
+                self._unindexShow(tvdb_id)
+
+    def updateShow(self, show):
+        """
+        Re-indexes a show that is already in the index, e.g. after its name changed.
+        """
+        with self.lock:
+            if self._built and show.tvdbid in self._showKeys:
+                oldKeys = self._showKeys[show.tvdbid]
+                self._unindexShow(show.tvdbid)
+                self._indexShow(show)
+                if self._showKeys[show.tvdbid] != oldKeys:
+                    self.generation += 1
+
+    def addExceptions(self, exceptions):
+        """
+        Adds new scene exceptions to the index.
+
+        exceptions: a list of (tvdb_id, show_name) tuples
+        """
+        with self.lock:
+            self.generation += 1
+            if not self._built:
+                return
+
+            for tvdb_id, name in exceptions:
+                self._addException(tvdb_id, name)
+
+            for tvdb_id in set([x[0] for x in exceptions]):
+                show = sickbeard.helpers.findCertainShow(sickbeard.showList, tvdb_id)
+                if show and tvdb_id in self._showKeys:
+                    self._indexShow(show)
+
+    def addCached(self, name, tvdb_id):
+        self._build()
+
+        with self.lock:
+            self._cache[full_sanitizeSceneName(name)] = tvdb_id
+            self._pending.append((sanitizeSceneName(name), tvdb_id))
+
+            if len(self._pending) >= self.FLUSH_SIZE or time.time() - self._lastFlush >= self.FLUSH_INTERVAL:
+                self.flush()
+
+    def clearUnknown(self):
+        """
+        Forgets all the names that were cached without a show.
+        """
+        with self.lock:
+            self.generation += 1
+            for key in [x for x in self._cache if not self._cache[x]]:
+                del self._cache[key]
+            self._pending = [x for x in self._pending if x[1]]
+
+            cacheDB = db.DBConnection('cache.db')
+            cacheDB.action("DELETE FROM scene_names WHERE tvdb_id = ?", [0])
+
+    def flush(self):
+        """
+        Writes the cached names that are only in memory to cache.db.
+        """
+        with self.lock:
+            pending, self._pending = self._pending, []
+            self._lastFlush = time.time()
+
+            if pending:
+                logger.log(u"Writing "+str(len(pending))+" cached show names to the database", logger.DEBUG)
+                cacheDB = db.DBConnection('cache.db')
+                cacheDB.mass_action([["INSERT INTO scene_names (tvdb_id, name) VALUES (?, ?)", [tvdb_id, name]] for (name, tvdb_id) in pending])
+
+resolver = NameResolver()
 
 def addNameToCache(name, tvdb_id):
     """
-    Adds the show & tvdb id to the scene_names table in cache.db.
+    Adds the show & tvdb id to the name cache, it is written to the scene_names table
+    in cache.db with the next batch.
     
     name: The show name to cache
     tvdb_id: The tvdb id that this show should be cached with (can be None/0 for unknown)
     """
     
-    # standardize the name we're using to account for small differences in providers (aka NZBMatrix sucks)
-    name = sanitizeSceneName(name)
-    
     if not tvdb_id:
         tvdb_id = 0
     
-    cacheDB = db.DBConnection('cache.db')
-    cacheDB.action("INSERT INTO scene_names (tvdb_id, name) VALUES (?, ?)", [tvdb_id, name])
+    resolver.addCached(name, tvdb_id)
 
 def retrieveNameFromCache(name):
     """
-    Looks up the given name in the scene_names table in cache.db.
+    Looks up the given name in the name cache.
     
     name: The show name to look up.
     
     Returns: the tvdb id that resulted from the cache lookup or None if the show wasn't found in the cache
     """
     
-    # standardize the name we're using to account for small differences in providers (aka NZBMatrix sucks)
-    name = sanitizeSceneName(name)
-    
-    cacheDB = db.DBConnection('cache.db')
-    cache_results = cacheDB.select("SELECT * FROM scene_names WHERE name = ?", [name])
-
-    if not cache_results:
-        return None
-    
-    return int(cache_results[0]["tvdb_id"])
+    return resolver.findCached(name)
 
 def clearCache():
     """
     Deletes all "unknown" entries from the cache (names with tvdb_id of 0).
     """
-    cacheDB = db.DBConnection('cache.db')
-    cacheDB.action("DELETE FROM scene_names WHERE tvdb_id = ?", [0])
+    resolver.clearUnknown()
 
+def flushCache():
+    """
+    Writes the names that haven't been saved yet to cache.db.
+    """
+    resolver.flush()
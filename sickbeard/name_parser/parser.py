@@ -16,9 +16,14 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 import datetime
 import os.path
 import re
+import threading
+
+from collections import deque
 
 import regexes
 
@@ -26,17 +31,25 @@ import sickbeard
 
 from sickbeard import logger
 
+# regexMode -> list of (name, compiled regex), shared by all NameParser objects
+_compiled_regexes = {}
+_compile_lock = threading.Lock()
+
+# regex name -> compiled prefilter, patterns with the same prefilter share the compiled object
+_compiled_prefilters = {}
+
 class NameParser(object):
     
     ALL_REGEX = -1   # all available regexs
     NORMAL_REGEX = 0 # normal regexs only
     ANIME_REGEX = 1  # anime only
     
-    def __init__(self, file_name=True, regexMode=0):
+    def __init__(self, file_name=True, regexMode=0, usePrefilter=True):
         
         self.file_name = file_name
-        self.compiled_regexes = []
-        self._compile_regexes(regexMode)
+        self.regexMode = regexMode
+        self.usePrefilter = usePrefilter
+        self.compiled_regexes = self._compile_regexes(regexMode)
 
     def clean_series_name(self, series_name):
         """Cleans up series name by removing any . and _
@@ -62,7 +75,25 @@ class NameParser(object):
         return series_name.strip()
 
     def _compile_regexes(self,regexMode):
+        """
+        Returns the compiled regexes for the given mode, they are only compiled the first
+        time a mode is used.
+        """
+
+        if regexMode in _compiled_regexes:
+            return _compiled_regexes[regexMode]
+
+        with _compile_lock:
+            if regexMode not in _compiled_regexes:
+                if not _compiled_prefilters:
+                    self._build_prefilters()
+                _compiled_regexes[regexMode] = self._build_regexes(regexMode)
+
+        return _compiled_regexes[regexMode]
+
+    def _build_regexes(self,regexMode):
         
+        compiled_regexes = []
         
         if regexMode <= self.ALL_REGEX:
             logger.log(u"Using ALL regexs" , logger.DEBUG)
@@ -87,14 +118,43 @@ class NameParser(object):
             except re.error, errormsg:
                 logger.log(u"WARNING: Invalid episode_pattern, %s. %s" % (errormsg, cur_regex.pattern))
             else:
-                self.compiled_regexes.append((cur_pattern_name, cur_regex))
+                compiled_regexes.append((cur_pattern_name, cur_regex))
+
+        return compiled_regexes
+
+    def _build_prefilters(self):
+
+        by_pattern = {}
+        for (cur_regex_name, cur_pattern) in regexes.ep_prefilters.items():
+            if cur_pattern not in by_pattern:
+                by_pattern[cur_pattern] = re.compile(cur_pattern, re.IGNORECASE | re.DOTALL)
+            _compiled_prefilters[cur_regex_name] = by_pattern[cur_pattern]
+
+    def _passes_prefilter(self, regex_name, name, checked):
+        """
+        Returns False if the regex with the given name can't possibly match the name.
+        
+        checked holds the prefilters already run against this name so each is only searched once.
+        """
+        prefilter = _compiled_prefilters.get(regex_name)
+        if not prefilter:
+            return True
+
+        if prefilter not in checked:
+            checked[prefilter] = prefilter.search(name) is not None
+
+        return checked[prefilter]
 
     def _parse_string(self, name):
         
         if not name:
             return None
         
+        checked = {}
         for (cur_regex_name, cur_regex) in self.compiled_regexes:
+            if self.usePrefilter and not self._passes_prefilter(cur_regex_name, name, checked):
+                continue
+
             match = cur_regex.match(name)
 
             if not match:
@@ -216,9 +276,31 @@ class NameParser(object):
         return int(number)
 
     def parse(self, name):
-        
+        """
+        Returns a ParseResult for the given name or raises an InvalidNameException.
+
+        The results are cached so parsing the same name again is just a lookup, every
+        caller gets its own copy of the result.
+        """
+
         name = self._unicodify(name)
 
+        cache_key = (self.regexMode, self.file_name, name)
+        cached_result = name_parser_cache.get(cache_key)
+        if cached_result is None:
+            try:
+                cached_result = self._parse(name)
+            except InvalidNameException, e:
+                cached_result = e
+            name_parser_cache.add(cache_key, cached_result)
+
+        if isinstance(cached_result, InvalidNameException):
+            raise InvalidNameException(*cached_result.args)
+
+        return cached_result.copy()
+
+    def _parse(self, name):
+
         # break it into parts if there are any (dirname, file name, extension)
         dir_name, file_name = os.path.split(name)
         ext_match = re.match('(.*)\.\w{3,4}$', file_name)
@@ -303,6 +385,16 @@ class ParseResult(object):
         self.air_date = air_date
         
         self.which_regex = None
+
+    def copy(self):
+        """
+        Returns a copy of this result that can be changed without affecting this one.
+        """
+        result = ParseResult(self.original_name, self.series_name, self.season_number, list(self.episode_numbers),
+                             self.extra_info, self.release_group, self.air_date, list(self.ab_episode_numbers))
+        if self.which_regex != None:
+            result.which_regex = list(self.which_regex)
+        return result
         
     def __eq__(self, other):
         if not other:
@@ -361,5 +453,52 @@ class ParseResult(object):
         return False
     is_anime = property(_is_anime)
 
+class NameParserCache(object):
+    """
+    A size limited cache of the most recently used parse results (or InvalidNameExceptions).
+    """
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        # key -> (result, when it was last used)
+        self._cache = {}
+        # (key, when it was used) for every use, oldest first, the entries for keys that were used again since are stale
+        self._order = deque()
+        self._uses = 0
+        self._lock = threading.Lock()
+
+    def _use(self, key, result):
+        self._uses += 1
+        self._cache[key] = (result, self._uses)
+        self._order.append((key, self._uses))
+
+        # don't let the stale entries pile up when the same names are looked up over and over
+        if len(self._order) > 2 * self.max_size:
+            self._order = deque(sorted([(x, self._cache[x][1]) for x in self._cache], key=lambda x: x[1]))
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._cache:
+                return None
+            # it's now the last one to be thrown out
+            result = self._cache[key][0]
+            self._use(key, result)
+            return result
+
+    def add(self, key, result):
+        with self._lock:
+            self._use(key, result)
+            while len(self._cache) > self.max_size:
+                oldKey, used = self._order.popleft()
+                if self._cache[oldKey][1] == used:
+                    del self._cache[oldKey]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._order.clear()
+
+name_parser_cache = NameParserCache()
+
 class InvalidNameException(Exception):
     "The given name is not valid"
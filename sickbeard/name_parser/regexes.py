@@ -297,3 +297,28 @@ anime_ep_regexes = [
                .*?                                                         # Separator and EOL
                ''')
                ]
+
+# a cheap search for something each pattern can't match without, patterns are only tried
+# on names their prefilter finds something in. Patterns without one are always tried.
+ep_prefilters = {
+                 'standard_repeat': r's\d+[. _-]*e\d',
+                 'fov_repeat': r'\dx\d',
+                 'standard': r's\d+[. _-]*e\d',
+                 'fov': r'\dx\d',
+                 'scene_date_format': r'\d{4}[. _-]+\d{2}[. _-]+\d{2}',
+                 'stupid': r'\d{3}$',
+                 'verbose': r'season[. _-]+\d+[. _-]+episode[. _-]+\d',
+                 'season_only': r's(eason[. _-])?\d',
+                 'no_season_multi_ep': r'(e(p(isode)?)?|part|pt)[. _-]?(\d|[ivx])',
+                 'no_season_general': r'(e(p(isode)?)?|part|pt)[. _-]?(\d|[ivx])',
+                 'bare': r'\d{3}',
+                 'no_season': r'\d{2}',
+                 'anime_standard': r'\d[ ._-]+\[',
+                 'anime_standard_round': r'\d[ ._-]+\(',
+                 'anime_slash': r'\d[ ._-]+\[\d{3,4}p',
+                 'anime_standard_codec': r'\d.*\[',
+                 'anime_and_normal': r's\d+[. _-]*e\d',
+                 'anime_and_normal_reverse': r's\d+[. _-]*e\d',
+                 'anime_and_normal_front': r'^\d.*s\d+[. _-]*e\d',
+                 'anime_bare': r'\d{3}',
+                 }
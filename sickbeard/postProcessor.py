@@ -290,7 +290,16 @@ class PostProcessor(object):
         myDB = db.DBConnection()
     
         for curName in names:
-            sql_results = myDB.select("SELECT * FROM history WHERE resource LIKE ?", [re.sub("[\.\-\ ]", "_", curName)])
+            pattern = re.sub("[\.\-\ ]", "_", curName)
+
+            # sqlite won't use the resource index for a LIKE with a bound pattern so narrow
+            # it down to the range of the (case insensitive) text in front of the first wildcard
+            prefix = re.split("[_%]", pattern)[0].lower()
+            if prefix and max(map(ord, prefix)) < 127:
+                sql_results = myDB.select("SELECT * FROM history WHERE resource >= ? COLLATE NOCASE AND resource < ? COLLATE NOCASE AND resource LIKE ?",
+                                          [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1), pattern])
+            else:
+                sql_results = myDB.select("SELECT * FROM history WHERE resource LIKE ?", [pattern])
     
             self._log("Found NO result in history for '"+str(curName)+"'", logger.DEBUG)
             if len(sql_results) == 0:
@@ -432,6 +441,15 @@ class PostProcessor(object):
             raise InvalidNameException
         else:
             self.anidbEpisode = ep
+
+        # the anime list maps most anidb episodes straight to their tvdb show, season and episode
+        if ep.aid:
+            tvdbMap = adba.TvDBMap()
+            tvdb_id = tvdbMap.get_tvdb_for_anidb(ep.aid)
+            (season, episode) = tvdbMap.get_season_episode_for_anidb_absoluteNumber(ep.aid, ep.epno)
+            if tvdb_id and season and helpers.findCertainShow(sickbeard.showList, tvdb_id):
+                self._log(u"Lookup successful from the anidb to tvdb list", logger.DEBUG)
+                return (tvdb_id, season, [episode])
         
         #TODO: clean code. it looks like it's from hell
         for name in ep.allNames:
@@ -460,7 +478,7 @@ class PostProcessor(object):
     
     def _build_anidb_episode(self,connection,filePath):
         ep = adba.Episode(connection,filePath=filePath,
-             paramsF=["quality","anidb_file_name","crc32"],
+             paramsF=["aid","quality","anidb_file_name","crc32"],
              paramsA=["epno","english_name","short_name_list","other_name","synonym_list"])
 
         return ep
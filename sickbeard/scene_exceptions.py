@@ -19,13 +19,15 @@
 import re
 import urllib
 
-from sickbeard.helpers import sanitizeSceneName
 from sickbeard import name_cache, helpers
 from sickbeard import logger
 from sickbeard import db
 import sickbeard
 from lib import adba
 
+# bumped every time new scene exceptions are stored so anything built from them knows to rebuild itself
+exceptionsVersion = 0
+
 def get_scene_exceptions(tvdb_id):
     """
     Given a tvdb_id, return a list of all the scene exceptions.
@@ -43,24 +45,11 @@ def get_scene_exception_by_name(show_name):
     is present.
     """
 
-    myDB = db.DBConnection("cache.db")
-    
-    # try the obvious case first
-    exception_result = myDB.select("SELECT tvdb_id FROM scene_exceptions WHERE LOWER(show_name) = ?", [show_name.lower()])
-    if exception_result:
-        return int(exception_result[0]["tvdb_id"])
-
-    all_exception_results = myDB.select("SELECT show_name, tvdb_id FROM scene_exceptions")
-    for cur_exception in all_exception_results:
+    tvdb_id = name_cache.resolver.findException(show_name)
+    if tvdb_id != None:
+        logger.log(u"Scene exception lookup got tvdb id "+str(tvdb_id)+u", using that", logger.DEBUG)
 
-        cur_exception_name = cur_exception["show_name"]
-        cur_tvdb_id = int(cur_exception["tvdb_id"])
-
-        if show_name.lower() in (cur_exception_name.lower(), sanitizeSceneName(cur_exception_name).lower().replace('.',' ')):
-            logger.log(u"Scene exception lookup got tvdb id "+str(cur_tvdb_id)+u", using that", logger.DEBUG)
-            return cur_tvdb_id
-
-    return None
+    return tvdb_id
 
 def retrieve_exceptions(localOnly=False):
     """
@@ -79,22 +68,28 @@ def retrieve_exceptions(localOnly=False):
 
     myDB = db.DBConnection("cache.db")
 
-    changed_exceptions = False
+    # get the existing exceptions for all IDs at once
+    existing_exceptions = {}
+    for cur_exception in myDB.select("SELECT tvdb_id, show_name FROM scene_exceptions"):
+        existing_exceptions.setdefault(int(cur_exception["tvdb_id"]), set()).add(cur_exception["show_name"])
+
+    queries = []
 
     # write all the exceptions we got off the net into the database
     for cur_tvdb_id in exception_dict:
 
-        # get a list of the existing exceptions for this ID
-        existing_exceptions = [x["show_name"] for x in myDB.select("SELECT * FROM scene_exceptions WHERE tvdb_id = ?", [cur_tvdb_id])]
-        
         for cur_exception in exception_dict[cur_tvdb_id]:
             # if this exception isn't already in the DB then add it
-            if cur_exception not in existing_exceptions:
-                myDB.action("INSERT INTO scene_exceptions (tvdb_id, show_name) VALUES (?,?)", [cur_tvdb_id, cur_exception])
-                changed_exceptions = True
+            if cur_exception not in existing_exceptions.get(cur_tvdb_id, ()):
+                queries.append(["INSERT INTO scene_exceptions (tvdb_id, show_name) VALUES (?,?)", [cur_tvdb_id, cur_exception]])
+                existing_exceptions.setdefault(cur_tvdb_id, set()).add(cur_exception)
 
     # since this could invalidate the results of the cache we clear it out after updating
-    if changed_exceptions:
+    if queries:
+        global exceptionsVersion
+        exceptionsVersion += 1
+        myDB.mass_action(queries)
+        name_cache.resolver.addExceptions([tuple(x[1]) for x in queries])
         name_cache.clearCache()
     
 def _retrieve_exceptions_fetcher(url):
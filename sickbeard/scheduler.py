@@ -16,33 +16,183 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 import datetime
-import time
+import heapq
+import itertools
+import os
+import select
 import threading
+import time
 import traceback
 
 from sickbeard import logger
 from sickbeard.exceptions import ex
 
-class Scheduler:
+def _seconds(delta):
+    return delta.days * 86400 + delta.seconds + delta.microseconds / 1000000.0
+
+class Waker:
+    """
+    Sleeps until a timeout runs out or another thread wakes it up. Python 2's Condition.wait(timeout)
+    polls every few milliseconds while it waits, so where we can we block in select() on a pipe instead.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.woken = False
+
+        if os.name != 'nt':
+            self.pipe = os.pipe()
+        else:
+            self.pipe = None
+            self.event = threading.Event()
+
+    def sleep(self, timeout=None):
+        if self.pipe:
+            if select.select([self.pipe[0]], [], [], timeout)[0]:
+                os.read(self.pipe[0], 1)
+        else:
+            self.event.wait(timeout)
+            self.event.clear()
+
+        with self.lock:
+            self.woken = False
+
+    def wake(self):
+        with self.lock:
+            if self.woken:
+                return
+            self.woken = True
+
+        if self.pipe:
+            os.write(self.pipe[1], 'x')
+        else:
+            self.event.set()
+
+class SchedulerThread:
+    """
+    One thread that keeps the next run of every Scheduler in a heap and sleeps until the first one is due,
+    then tells that Scheduler's thread to run its action.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.heap = []
+        self.counter = itertools.count()
+        self.waker = Waker()
+        self.thread = None
+
+    def schedule(self, scheduler):
+        """
+        (Re)schedules the given scheduler for its next run, any earlier entry for it is dropped.
+        """
+        entry = [time.time() + _seconds(scheduler.timeLeft()), self.counter.next(), scheduler]
+
+        with self.lock:
+            scheduler._entry = entry
+            heapq.heappush(self.heap, entry)
+
+            if self.thread == None or not self.thread.isAlive():
+                self.thread = threading.Thread(None, self.run, "SCHEDULER")
+                self.thread.setDaemon(True)
+                self.thread.start()
+
+        self.waker.wake()
+
+    def unschedule(self, scheduler):
+        with self.lock:
+            scheduler._entry = None
+
+    def run(self):
+
+        while True:
+
+            with self.lock:
+                timeout = None
+                while self.heap:
+                    dueTime, x, scheduler = self.heap[0]
+
+                    # entries for schedulers that were rescheduled or stopped since are skipped
+                    if scheduler._entry is not self.heap[0]:
+                        heapq.heappop(self.heap)
+                        continue
+
+                    timeout = dueTime - time.time()
+                    if timeout > 0:
+                        break
+
+                    heapq.heappop(self.heap)
+                    scheduler._entry = None
+                    scheduler._runDue()
+                    timeout = None
+
+            self.waker.sleep(timeout)
+
+_schedulerThread = SchedulerThread()
+
+class Scheduler(object):
 
     def __init__(self, action, cycleTime=datetime.timedelta(minutes=10), runImmediately=True, threadName="ScheduledThread", silent=False):
 
         if runImmediately:
-            self.lastRun = datetime.datetime.fromordinal(1)
+            self._lastRun = datetime.datetime.fromordinal(1)
         else:
-            self.lastRun = datetime.datetime.now()
+            self._lastRun = datetime.datetime.now()
 
         self.action = action
-        self.cycleTime = cycleTime
+        self._cycleTime = cycleTime
 
         self.thread = None
         self.threadName = threadName
         self.silent = silent
 
+        # set by the scheduler thread when it's time to run the action
+        self._condition = threading.Condition()
+        self._due = False
+        self._abort = False
+        self._running = False
+        self._entry = None
+
         self.initThread()
 
-        self.abort = False
+    def _getLastRun(self):
+        return self._lastRun
+
+    def _setLastRun(self, lastRun):
+        self._lastRun = lastRun
+        self._reschedule()
+
+    lastRun = property(_getLastRun, _setLastRun)
+
+    def _getCycleTime(self):
+        return self._cycleTime
+
+    def _setCycleTime(self, cycleTime):
+        self._cycleTime = cycleTime
+        self._reschedule()
+
+    cycleTime = property(_getCycleTime, _setCycleTime)
+
+    def _getAbort(self):
+        return self._abort
+
+    def _setAbort(self, abort):
+        with self._condition:
+            self._abort = abort
+            self._condition.notify()
+
+    abort = property(_getAbort, _setAbort)
+
+    def _reschedule(self):
+        if self._running:
+            _schedulerThread.schedule(self)
+
+    def _runDue(self):
+        with self._condition:
+            self._due = True
+            self._condition.notify()
 
     def initThread(self):
         if self.thread == None or not self.thread.isAlive():
@@ -59,12 +209,20 @@ class Scheduler:
 
     def runAction(self):
 
+        self._running = True
+        _schedulerThread.schedule(self)
+
         while True:
 
-            currentTime = datetime.datetime.now()
+            # sleep until the scheduler thread says it's time (or we're told to stop)
+            with self._condition:
+                while not self._due and not self._abort:
+                    self._condition.wait()
+                runNow = self._due
+                self._due = False
 
-            if currentTime - self.lastRun > self.cycleTime:
-                self.lastRun = currentTime
+            if runNow and not self._abort:
+                self.lastRun = datetime.datetime.now()
                 try:
                     if not self.silent:
                         logger.log(u"Starting new thread: "+self.threadName, logger.DEBUG)
@@ -74,8 +232,8 @@ class Scheduler:
                     logger.log(traceback.format_exc(), logger.DEBUG)
 
             if self.abort:
+                self._running = False
+                _schedulerThread.unschedule(self)
                 self.abort = False
                 self.thread = None
                 return
-
-            time.sleep(1)
@@ -19,6 +19,9 @@
 from __future__ import with_statement
 
 import os
+import Queue
+import threading
+import time
 import traceback
 
 import sickbeard
@@ -37,6 +40,120 @@ from sickbeard.exceptions import ex
 from sickbeard import providers
 from sickbeard.blackandwhitelist import *
 
+# the most providers that are searched at the same time
+MAX_PROVIDER_THREADS = 5
+
+# how long (in seconds) a search waits for a provider before giving up on it
+PROVIDER_TIMEOUT = 300
+
+# after this many failed searches in a row a provider is left out for PROVIDER_RETRY_DELAY seconds
+PROVIDER_MAX_FAILURES = 3
+PROVIDER_RETRY_DELAY = 15 * 60
+
+# provider id -> [failed searches in a row, time of the last failure]
+providerFailures = {}
+providerFailuresLock = threading.Lock()
+
+def _providerAvailable(provider):
+    """
+    Returns False if the provider failed too often recently and should be left out of this search.
+    """
+    with providerFailuresLock:
+        if provider.getID() not in providerFailures:
+            return True
+
+        failures, lastFailure = providerFailures[provider.getID()]
+
+    if failures < PROVIDER_MAX_FAILURES or time.time() - lastFailure > PROVIDER_RETRY_DELAY:
+        return True
+
+    logger.log(u"Skipping "+provider.name+" because it failed "+str(failures)+" times in a row, trying again in "+str(int(PROVIDER_RETRY_DELAY - (time.time() - lastFailure)))+" seconds", logger.DEBUG)
+    return False
+
+def _providerFinished(provider, succeeded):
+
+    with providerFailuresLock:
+        if succeeded:
+            providerFailures.pop(provider.getID(), None)
+        else:
+            failures = providerFailures.get(provider.getID(), [0, 0])[0] + 1
+            providerFailures[provider.getID()] = [failures, time.time()]
+
+def _searchProviders(searchFunc):
+    """
+    Runs searchFunc(provider) for all the active providers at the same time (at most MAX_PROVIDER_THREADS
+    at once) and waits up to PROVIDER_TIMEOUT seconds for them to finish.
+    
+    Returns a list of (provider, result) for the providers that finished without an error, in the
+    same order as providers.sortedProviderList() no matter which one finished first.
+    """
+
+    providerList = [x for x in providers.sortedProviderList() if x.isActive() and _providerAvailable(x)]
+    if not providerList:
+        return []
+
+    todo = Queue.Queue()
+    for curIndex, curProvider in enumerate(providerList):
+        todo.put((curIndex, curProvider))
+
+    results = {}
+    started = {}
+    parentName = threading.currentThread().getName()
+    deadline = time.time() + PROVIDER_TIMEOUT
+
+    def worker():
+        while True:
+            # the providers that are still waiting when we stop waiting aren't searched at all
+            if time.time() >= deadline:
+                return
+
+            try:
+                curIndex, curProvider = todo.get_nowait()
+            except Queue.Empty:
+                return
+
+            threading.currentThread().setName(parentName+"-"+curProvider.getID().upper())
+            started[curIndex] = True
+
+            try:
+                results[curIndex] = searchFunc(curProvider)
+            except exceptions.AuthException, e:
+                results[curIndex] = e
+                logger.log(u"Authentication error: "+ex(e), logger.ERROR)
+            except Exception, e:
+                results[curIndex] = e
+                logger.log(u"Error while searching "+curProvider.name+", skipping: "+ex(e), logger.ERROR)
+                logger.log(traceback.format_exc(), logger.DEBUG)
+
+    threads = []
+    for x in range(min(MAX_PROVIDER_THREADS, len(providerList))):
+        curThread = threading.Thread(None, worker, parentName+"-PROVIDER"+str(x))
+        # don't let a provider that never answers keep sickbeard from shutting down
+        curThread.setDaemon(True)
+        curThread.start()
+        threads.append(curThread)
+
+    for curThread in threads:
+        curThread.join(max(deadline - time.time(), 0))
+
+    finished = []
+    for curIndex, curProvider in enumerate(providerList):
+        if curIndex not in results:
+            if curIndex in started:
+                logger.log(u"Gave up on "+curProvider.name+" after waiting "+str(PROVIDER_TIMEOUT)+" seconds for it", logger.WARNING)
+                _providerFinished(curProvider, False)
+            continue
+
+        curResult = results[curIndex]
+        if isinstance(curResult, Exception):
+            _providerFinished(curProvider, False)
+            continue
+
+        _providerFinished(curProvider, True)
+        finished.append((curProvider, curResult))
+
+    return finished
+
 def _downloadResult(result):
     """
     Downloads a result to the appropriate black hole folder.
@@ -144,24 +261,9 @@ def searchForNeededEpisodes():
 
     didSearch = False
 
-    # ask all providers for any episodes it finds
-    for curProvider in providers.sortedProviderList():
-
-        # is curProvider active 
-        if not curProvider.isActive():
-            continue
-
-        curFoundResults = {}
-
-        try:
-            curFoundResults = curProvider.searchRSS()
-        except exceptions.AuthException, e:
-            logger.log(u"Authentication error: "+ex(e), logger.ERROR)
-            continue
-        except Exception, e:
-            logger.log(u"Error while searching "+curProvider.name+", skipping: "+ex(e), logger.ERROR)
-            logger.log(traceback.format_exc(), logger.DEBUG)
-            continue
+    # ask all providers for any episodes it finds, they're searched at the same time but we go
+    # through the results in the usual provider order so the order they finish in doesn't matter
+    for curProvider, curFoundResults in _searchProviders(lambda x: x.searchRSS()):
 
         didSearch = True
 
@@ -199,7 +301,7 @@ def pickBestResult(results, quality_list=None,show=None):
     # build the black And white list
     bwl = None
     if show:
-        bwl = BlackAndWhiteList(show.tvdbid)
+        bwl = get_black_and_white_list(show.tvdbid)
     else:
         logger.log("Could not create black and white list no show was given", logger.DEBUG)
         
@@ -244,7 +346,7 @@ def isFinalResult(result):
     
     show_obj = result.episodes[0].show
     
-    bwl = BlackAndWhiteList(show_obj.tvdbid)
+    bwl = get_black_and_white_list(show_obj.tvdbid)
 
     any_qualities, best_qualities = Quality.splitQuality(show_obj.quality)
     
@@ -279,14 +381,13 @@ def findEpisode(episode, manualSearch=False):
 
     logger.log(u"Searching for " + episode.prettyName(True))
 
-    foundResults = []
-
-    didSearch = False
+    def searchProvider(curProvider):
+        """
+        Returns (results, done_searching, bestResult) for the given provider. The bestResult is only set for
+        anime where we take the first result that's good enough.
+        """
 
-    for curProvider in providers.sortedProviderList():
-
-        if not curProvider.isActive():
-            continue
+        curProviderResults = []
 
         # we check our results after every search string
         # this is done because in the future we will have a ordered list of all show aliases and release_group aliases
@@ -301,16 +402,14 @@ def findEpisode(episode, manualSearch=False):
         for searchString in searchStrings:
             try:
                 curFoundResults = curProvider.findEpisode(episode, manualSearch=manualSearch, searchString=searchString)
-            except exceptions.AuthException, e:
-                logger.log(u"Authentication error: "+ex(e), logger.ERROR)
-                break # break the while loop
             except Exception, e:
-                logger.log(u"Error while searching "+curProvider.name+", skipping: "+ex(e), logger.ERROR)
+                # if the earlier search strings worked we keep what they found
+                if not curProviderResults:
+                    raise
+                logger.log(u"Error while searching "+curProvider.name+", using what we found so far: "+ex(e), logger.ERROR)
                 logger.log(traceback.format_exc(), logger.DEBUG)
                 break # break the while loop
 
-            didSearch = True
-
             # skip non-tv crap
             curFoundResults = filter(lambda x: show_name_helpers.filterBadReleases(x.name) and show_name_helpers.isGoodResult(x.name, episode.show), curFoundResults)
 
@@ -330,14 +429,31 @@ def findEpisode(episode, manualSearch=False):
                 logger.log(u"We are searching an anime. i am checking if we got a good result with search provider "+curProvider.name, logger.DEBUG)
                 bestResult = pickBestResult(curFoundResults,show=episode.show)
                 if bestResult:
-                    return bestResult
+                    return (curProviderResults + curFoundResults, True, bestResult)
 
-            foundResults += curFoundResults
+            curProviderResults += curFoundResults
             # if we did find a result that's good enough to stop then don't continue
             # this breaks the turn loop
             if done_searching:
                 break
 
+        return (curProviderResults, done_searching, None)
+
+    foundResults = []
+
+    didSearch = False
+
+    # all the providers are searched at the same time but the results are used in the usual provider
+    # order, so we end up with the same result as if we searched them one after the other
+    for curProvider, (curProviderResults, done_searching, bestResult) in _searchProviders(searchProvider):
+
+        didSearch = True
+
+        if bestResult:
+            return bestResult
+
+        foundResults += curProviderResults
+
         # if we did find a result that's good enough to stop then don't continue
         # this breaks the for each provider loop
         if done_searching:
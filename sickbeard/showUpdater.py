@@ -17,19 +17,29 @@
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
 import datetime
+import time
 
 import sickbeard
 
+from sickbeard import db
 from sickbeard import logger
 from sickbeard import exceptions
 from sickbeard import ui
+from sickbeard import coming_episodes
 from sickbeard.exceptions import ex
 
+from lib.tvdb_api import tvdb_api, tvdb_exceptions
+
 class ShowUpdater():
 
     def __init__(self):
         self.updateInterval = datetime.timedelta(hours=1)
 
+        # the last TVDB update time the last run brought the shows up to and the updates it queued,
+        # the time is only written to the DB once those all went through
+        self.pendingTime = None
+        self.pendingItems = []
+
     def run(self, force=False):
 
         # update at 3 AM
@@ -40,22 +50,48 @@ class ShowUpdater():
         hourDiff = datetime.datetime.today().time().hour - updateTime.hour
 
         # if it's less than an interval after the update time then do an update (or if we're forcing it)
-        if hourDiff >= 0 and hourDiff < self.updateInterval.seconds/3600 or force:
+        if not (hourDiff >= 0 and hourDiff < self.updateInterval.seconds/3600 or force):
+            return
+
+        # drop the episodes that aired since the last update from the coming episodes, the queued updates patch the rest
+        coming_episodes.comingEpisodes.rebuild()
+
+        self._finishPending()
+
+        startTime = int(time.time())
+        lastUpdate = self._get_lastTVDB()
+        updates = self._getUpdates(lastUpdate)
+
+        if updates == None:
             logger.log(u"Doing full update on all shows")
         else:
-            return
+            logger.log(u"Updating the shows that changed on TVDB since " + str(datetime.datetime.fromtimestamp(lastUpdate)))
 
         piList = []
+        updateItems = []
 
         for curShow in sickbeard.showList:
 
             try:
 
-                if curShow.status != "Ended":
-                    curQueueItem = sickbeard.showQueueScheduler.action.updateShow(curShow, True) #@UndefinedVariable
+                if updates == None:
+                    if curShow.status != "Ended":
+                        curQueueItem = sickbeard.showQueueScheduler.action.updateShow(curShow, True) #@UndefinedVariable
+                        updateItems.append(curQueueItem)
+                    else:
+                        #TODO: maybe I should still update specials?
+                        logger.log(u"Not updating episodes for show "+curShow.name+" because it's marked as ended.", logger.DEBUG)
+                        curQueueItem = sickbeard.showQueueScheduler.action.refreshShow(curShow, True) #@UndefinedVariable
+
+                elif curShow.tvdbid in updates.series:
+                    logger.log(u"Show "+curShow.name+" changed on TVDB, updating it", logger.DEBUG)
+                    # make sure nothing older than the change is used for the update
+                    tvdb_api.showStore.setUpdated(curShow.tvdbid, updates.series[curShow.tvdbid])
+                    curQueueItem = sickbeard.showQueueScheduler.action.updateShow(curShow, True, updates.changedEpisodes(curShow.tvdbid)) #@UndefinedVariable
+                    updateItems.append(curQueueItem)
+
                 else:
-                    #TODO: maybe I should still update specials?
-                    logger.log(u"Not updating episodes for show "+curShow.name+" because it's marked as ended.", logger.DEBUG)
+                    logger.log(u"Show "+curShow.name+" didn't change on TVDB, only refreshing it", logger.DEBUG)
                     curQueueItem = sickbeard.showQueueScheduler.action.refreshShow(curShow, True) #@UndefinedVariable
 
                 piList.append(curQueueItem)
@@ -63,4 +99,66 @@ class ShowUpdater():
             except (exceptions.CantUpdateException, exceptions.CantRefreshException), e:
                 logger.log(u"Automatic update failed: " + ex(e), logger.ERROR)
 
+        # a full update brings the shows up to the time it started
+        if updates != None and updates.time:
+            self.pendingTime = updates.time
+        else:
+            self.pendingTime = startTime
+        self.pendingItems = updateItems
+
         ui.ProgressIndicators.setIndicator('dailyUpdate', ui.QueueProgressIndicator("Daily Update", piList))
+
+    def _finishPending(self):
+        """
+        Writes the TVDB update time the last run brought the shows up to to the DB if all its updates went
+        through. Otherwise the old time is kept so the next updates are fetched from there again and include
+        the shows that failed, the same goes for updates that never ran because sickbeard was shut down.
+        """
+        if self.pendingTime == None:
+            return
+
+        failed = [x.show.name for x in self.pendingItems if not x.success]
+        if failed:
+            logger.log(u"Not moving the last TVDB update forward because these shows weren't updated: " + ", ".join(failed), logger.WARNING)
+        else:
+            self._set_lastTVDB(self.pendingTime)
+
+        self.pendingTime = None
+        self.pendingItems = []
+
+    def _getUpdates(self, lastUpdate):
+        """
+        Returns the tvdb_api.Updates with everything that changed on TVDB since lastUpdate, or None if
+        the shows have never been updated or TVDB's updates couldn't be retrieved.
+        """
+        if not lastUpdate:
+            return None
+
+        try:
+            t = tvdb_api.Tvdb(**sickbeard.TVDB_API_PARMS.copy())
+            return t.getUpdates(lastUpdate)
+        except tvdb_exceptions.tvdb_exception, e:
+            logger.log(u"Unable to get the updates from TVDB, updating all shows: " + ex(e), logger.WARNING)
+            return None
+
+    def _get_lastTVDB(self):
+
+        myDB = db.DBConnection()
+        sqlResults = myDB.select("SELECT * FROM info")
+
+        if len(sqlResults) == 0 or sqlResults[0]["last_tvdb"] == None or sqlResults[0]["last_tvdb"] == "":
+            return 0
+
+        return int(sqlResults[0]["last_tvdb"])
+
+    def _set_lastTVDB(self, when):
+
+        logger.log(u"Setting the last TVDB update in the DB to " + str(when), logger.DEBUG)
+
+        myDB = db.DBConnection()
+        sqlResults = myDB.select("SELECT * FROM info")
+
+        if len(sqlResults) == 0:
+            myDB.action("INSERT INTO info (last_backlog, last_TVDB) VALUES (?,?)", [0, str(when)])
+        else:
+            myDB.action("UPDATE info SET last_tvdb = ?", [str(when)])
@@ -21,6 +21,7 @@ import sickbeard
 from sickbeard.common import countryList
 from sickbeard.helpers import sanitizeSceneName, parse_result_wrapper
 from sickbeard.scene_exceptions import get_scene_exceptions
+from sickbeard import scene_exceptions
 from sickbeard import logger
 from sickbeard import db
 from sickbeard.blackandwhitelist import *
@@ -220,12 +221,6 @@ def makeSceneSearchString (episode):
     if numseasons == 1 and not episode.show.is_anime:
         epStrings = ['']
 
-
-        
-    bwl = BlackAndWhiteList(episode.show.tvdbid)
-    bwl.whiteList
-
-
     showNames = set(makeSceneShowSearchStrings(episode.show))
 
 
@@ -241,30 +236,62 @@ def makeSceneSearchString (episode):
 
     return toReturn
 
-def isGoodResult(name, show, log=True):
+class NameMatcher(object):
     """
-    Use an automatically-created regex to make sure the result actually is the show it claims to be
+    Every name variant of a show compiled into a single regex, used by isGoodResult.
     """
 
-    all_show_names = allPossibleShowNames(show)
-    showNames = map(sanitizeSceneName, all_show_names) + all_show_names
+    def __init__(self, show):
+        self.key = NameMatcher.makeKey(show)
+
+        all_show_names = allPossibleShowNames(show)
+        showNames = map(sanitizeSceneName, all_show_names) + all_show_names
+
+        # longest first so the regex in the log reads sensibly, the order doesn't change what matches
+        escaped_names = [re.sub('\\\\[\\s.-]', '\W+', re.escape(x)) for x in sorted(set(showNames), key=lambda x: (-len(x), x))]
+        names_regex = '(?:' + '|'.join(escaped_names) + ')'
 
-    for curName in set(showNames):
-        escaped_name = re.sub('\\\\[\\s.-]', '\W+', re.escape(curName))
         if not show.is_anime:
-            curRegex = '^' + escaped_name + '\W+(?:(?:S\d[\dE._ -])|(?:\d\d?x)|(?:\d{4}\W\d\d\W\d\d)|(?:(?:part|pt)[\._ -]?(\d|[ivx]))|Season\W+\d+\W+|E\d+\W+)'
+            self.regex = '^' + names_regex + '\W+(?:(?:S\d[\dE._ -])|(?:\d\d?x)|(?:\d{4}\W\d\d\W\d\d)|(?:(?:part|pt)[\._ -]?(\d|[ivx]))|Season\W+\d+\W+|E\d+\W+)'
         else:
-            curRegex = '^.*?'+escaped_name + '.*'# FIXME: find a "automatically-created" regex for anime releases
-            
-        
-        if log:
-            logger.log(u"Checking if show "+name+" matches " + curRegex, logger.DEBUG)
+            self.regex = '^.*?' + names_regex + '.*'# FIXME: find a "automatically-created" regex for anime releases
+
+        self.compiled = re.compile(self.regex, re.I)
+
+    @staticmethod
+    def makeKey(show):
+        """
+        Everything the names in the matcher come from, if any of it changes the matcher has to be rebuilt.
+        """
+        return (show.tvdbid, show.name, show.tvrname, show.is_anime, scene_exceptions.exceptionsVersion)
 
-        match = re.search(curRegex, name, re.I)
+    def match(self, name):
+        return self.compiled.search(name) != None
 
-        if match:
-            logger.log(u"Matched "+curRegex+" to "+name, logger.DEBUG)
-            return True
+def getNameMatcher(show):
+    """
+    Returns the NameMatcher of the show, building it first if the show doesn't have one yet or its names changed.
+    """
+
+    matcher = getattr(show, 'nameMatcher', None)
+    if not matcher or matcher.key != NameMatcher.makeKey(show):
+        matcher = NameMatcher(show)
+        show.nameMatcher = matcher
+    return matcher
+
+def isGoodResult(name, show, log=True):
+    """
+    Use an automatically-created regex to make sure the result actually is the show it claims to be
+    """
+
+    matcher = getNameMatcher(show)
+
+    if log:
+        logger.log(u"Checking if show "+name+" matches " + matcher.regex, logger.DEBUG)
+
+    if matcher.match(name):
+        logger.log(u"Matched "+matcher.regex+" to "+name, logger.DEBUG)
+        return True
 
     if log:
         logger.log(u"Provider gave result "+name+" but that doesn't seem like a valid result for "+show.name+" so I'm ignoring it")
@@ -289,7 +316,7 @@ def allPossibleShowNames(show):
 
     newShowNames = []
 
-    country_list = countryList
+    country_list = dict(countryList)
     country_list.update(dict(zip(countryList.values(), countryList.keys())))
 
     # if we have "Show Name Australia" or "Show Name (Australia)" this will add "Show Name (AU)" for
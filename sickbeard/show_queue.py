@@ -31,6 +31,7 @@ from sickbeard import exceptions, logger, ui, db
 from sickbeard import generic_queue
 from sickbeard import name_cache
 from sickbeard import scene_exceptions
+from sickbeard import episode_caches
 from sickbeard.exceptions import ex
 
 class ShowQueue(generic_queue.GenericQueue):
@@ -73,7 +74,7 @@ class ShowQueue(generic_queue.GenericQueue):
 
     loadingShowList = property(_getLoadingShowList)
 
-    def updateShow(self, show, force=False):
+    def updateShow(self, show, force=False, changedEpisodes=None):
 
         if self.isBeingAdded(show):
             raise exceptions.CantUpdateException("Show is still being added, wait until it is finished before you update.")
@@ -85,9 +86,9 @@ class ShowQueue(generic_queue.GenericQueue):
             raise exceptions.CantUpdateException("This show is already being updated, can't update again until it's done.")
 
         if not force:
-            queueItemObj = QueueItemUpdate(show)
+            queueItemObj = QueueItemUpdate(show, changedEpisodes)
         else:
-            queueItemObj = QueueItemForceUpdate(show)
+            queueItemObj = QueueItemForceUpdate(show, changedEpisodes)
 
         self.add_item(queueItemObj)
 
@@ -275,6 +276,7 @@ class QueueItemAdd(ShowQueueItem):
 
         # add it to the show list
         sickbeard.showList.append(self.show)
+        name_cache.resolver.addShow(self.show)
         
         try:
             self.show.loadEpisodesFromTVDB()
@@ -304,6 +306,7 @@ class QueueItemAdd(ShowQueueItem):
             logger.log(u"Setting all episodes to the specified default status: "+str(self.default_status))
             myDB = db.DBConnection();
             myDB.action("UPDATE tv_episodes SET status = ? WHERE status = ? AND showid = ? AND season != 0", [self.default_status, SKIPPED, self.show.tvdbid])
+            episode_caches.reloadShow(self.show.tvdbid)
 
         # before we run the backlog lets update the local aliases if the new show is an anime
         if self.show.is_anime:
@@ -359,9 +362,13 @@ class QueueItemRename(ShowQueueItem):
         self.inProgress = False
 
 class QueueItemUpdate(ShowQueueItem):
-    def __init__(self, show=None):
+    def __init__(self, show=None, changedEpisodes=None):
         ShowQueueItem.__init__(self, ShowQueueActions.UPDATE, show)
         self.force = False
+        # TVDB ids of the episodes that changed, None to update all of them
+        self.changedEpisodes = changedEpisodes
+        # if the show and its episodes were brought up to date from TVDB, the show updater checks this
+        self.success = False
 
     def execute(self):
 
@@ -383,7 +390,7 @@ class QueueItemUpdate(ShowQueueItem):
         # get episode list from TVDB
         logger.log(u"Loading all episodes from theTVDB", logger.DEBUG)
         try:
-            TVDBEpList = self.show.loadEpisodesFromTVDB(cache=not self.force)
+            TVDBEpList = self.show.loadEpisodesFromTVDB(cache=not self.force, changedEpisodes=self.changedEpisodes)
         except tvdb_exceptions.tvdb_exception, e:
             logger.log(u"Unable to get info from TVDB, the show info will not be refreshed: "+ex(e), logger.ERROR)
             TVDBEpList = None
@@ -410,6 +417,8 @@ class QueueItemUpdate(ShowQueueItem):
                     except exceptions.EpisodeDeletedException:
                         pass
 
+            self.success = True
+
         # now that we've updated the DB from TVDB see if there's anything we can add from TVRage
         with self.show.lock:
             logger.log(u"Attempting to supplement show info with info from TVRage", logger.DEBUG)
@@ -420,6 +429,8 @@ class QueueItemUpdate(ShowQueueItem):
         sickbeard.showQueueScheduler.action.refreshShow(self.show, True) #@UndefinedVariable
 
 class QueueItemForceUpdate(QueueItemUpdate):
-    def __init__(self, show=None):
+    def __init__(self, show=None, changedEpisodes=None):
         ShowQueueItem.__init__(self, ShowQueueActions.FORCEUPDATE, show)
         self.force = True
+        self.changedEpisodes = changedEpisodes
+        self.success = False
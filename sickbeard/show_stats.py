@@ -0,0 +1,183 @@
+# Author: Nic Wolfe <nic@wolfeden.ca>
+# URL: http://code.google.com/p/sickbeard/
+#
+# This file is part of Sick Beard.
+#
+# Sick Beard is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sick Beard is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import with_statement
+
+import datetime
+import threading
+
+from sickbeard import db
+from sickbeard.common import Quality, Overview, ARCHIVED, IGNORED, UNAIRED, WANTED
+
+# the statuses the home page counts as downloaded, the snatched ones only once they have a file
+_downloadedStatuses = frozenset(Quality.DOWNLOADED + [ARCHIVED])
+_snatchedStatuses = frozenset(Quality.SNATCHED + Quality.SNATCHED_PROPER)
+_haveStatuses = frozenset(Quality.DOWNLOADED + Quality.SNATCHED + Quality.SNATCHED_PROPER + [ARCHIVED])
+
+class ShowStats(object):
+    """
+    Process wide episode statistics for every show, kept in memory so the pages that show them don't
+    have to query tv_episodes.
+
+    Every episode's name, airdate, status and whether it has a file is read from the database in one
+    query the first time they're needed and is then kept up to date by the code that changes
+    tv_episodes. The counts of a show are worked out from its episodes when they're asked for and are
+    kept until one of its episodes changes, the show's quality changes or the day changes.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+
+        # tvdbid -> {(season, episode): (name, airdate ordinal, status, has a file)}
+        self.episodes = None
+
+        # tvdbid -> ((today, show quality), counts)
+        self.counts = {}
+
+    def _load(self):
+        """
+        Reads all the episodes from the database, has to be called with the lock held.
+        """
+        episodes = {}
+
+        myDB = db.DBConnection()
+        for curEp in myDB.select("SELECT showid, season, episode, name, airdate, status, location FROM tv_episodes"):
+            episodes.setdefault(int(curEp["showid"]), {})[(int(curEp["season"]), int(curEp["episode"]))] = \
+                (curEp["name"], int(curEp["airdate"]), int(curEp["status"]), bool(curEp["location"]))
+
+        self.episodes = episodes
+        self.counts = {}
+
+    def _getEpisodes(self, tvdbid):
+        if self.episodes == None:
+            self._load()
+        return self.episodes.get(tvdbid, {})
+
+    def reset(self):
+        """
+        Forgets everything, it's read from the database again when it's next needed.
+        """
+        with self.lock:
+            self.episodes = None
+            self.counts = {}
+
+    def updateEpisode(self, tvdbid, season, episode, name, description, airdate, status, location):
+        """
+        Records the new values of an episode that was saved to the database.
+        """
+        with self.lock:
+            if self.episodes == None:
+                return
+            self.episodes.setdefault(tvdbid, {})[(season, episode)] = (name, airdate, status, bool(location))
+            self.counts.pop(tvdbid, None)
+
+    def removeEpisode(self, tvdbid, season, episode):
+        with self.lock:
+            if self.episodes == None:
+                return
+            self.episodes.get(tvdbid, {}).pop((season, episode), None)
+            self.counts.pop(tvdbid, None)
+
+    def removeShow(self, tvdbid):
+        with self.lock:
+            if self.episodes == None:
+                return
+            self.episodes.pop(tvdbid, None)
+            self.counts.pop(tvdbid, None)
+
+    def reloadShow(self, tvdbid):
+        """
+        Reads the episodes of the show from the database again, for code that changes them with its own SQL.
+        """
+        with self.lock:
+            if self.episodes == None:
+                return
+
+            showEpisodes = {}
+            myDB = db.DBConnection()
+            for curEp in myDB.select("SELECT season, episode, name, airdate, status, location FROM tv_episodes WHERE showid = ?", [tvdbid]):
+                showEpisodes[(int(curEp["season"]), int(curEp["episode"]))] = \
+                    (curEp["name"], int(curEp["airdate"]), int(curEp["status"]), bool(curEp["location"]))
+
+            self.episodes[tvdbid] = showEpisodes
+            self.counts.pop(tvdbid, None)
+
+    def getCounts(self, show):
+        """
+        Returns a dict with the number of downloaded, snatched, wanted, unaired and total episodes of the show
+        (leaving out specials) and under 'overview' the number of its episodes in every Overview category.
+        """
+        key = (datetime.date.today().toordinal(), show.quality)
+
+        with self.lock:
+            cached = self.counts.get(show.tvdbid)
+            if cached and cached[0] == key:
+                return cached[1]
+
+            today = key[0]
+            counts = {'downloaded': 0, 'snatched': 0, 'wanted': 0, 'unaired': 0, 'total': 0,
+                      'overview': dict((x, 0) for x in Overview.overviewStrings)}
+            overviews = {}
+
+            for (season, episode), (name, airdate, status, hasFile) in self._getEpisodes(show.tvdbid).iteritems():
+
+                if status not in overviews:
+                    overviews[status] = show.getOverview(status)
+                if overviews[status] != None:
+                    counts['overview'][overviews[status]] += 1
+
+                if season == 0 or episode == 0:
+                    continue
+
+                if status in _snatchedStatuses:
+                    counts['snatched'] += 1
+                elif status == WANTED:
+                    counts['wanted'] += 1
+                elif status == UNAIRED:
+                    counts['unaired'] += 1
+
+                if airdate > today:
+                    continue
+
+                if status in _downloadedStatuses or (status in _snatchedStatuses and hasFile):
+                    counts['downloaded'] += 1
+
+                if status != IGNORED and (airdate != 1 or status in _haveStatuses):
+                    counts['total'] += 1
+
+            self.counts[show.tvdbid] = (key, counts)
+            return counts
+
+    def getEpisodes(self, show, overviews):
+        """
+        Returns dicts with the season, episode, name, airdate and overview of the show's episodes that are in
+        one of the overviews, newest first.
+        """
+        with self.lock:
+            showEpisodes = self._getEpisodes(show.tvdbid).items()
+
+        results = []
+        for (season, episode), (name, airdate, status, hasFile) in showEpisodes:
+            overview = show.getOverview(status)
+            if overview in overviews:
+                results.append({'season': season, 'episode': episode, 'name': name, 'airdate': airdate, 'overview': overview})
+
+        results.sort(key=lambda x: x['season'] * 1000 + x['episode'], reverse=True)
+        return results
+
+showStats = ShowStats()
@@ -23,6 +23,7 @@ import datetime
 import threading
 import re
 import glob
+import traceback
 
 import sickbeard
 
@@ -33,12 +34,14 @@ from name_parser.parser import InvalidNameException
 from lib.tvdb_api import tvdb_api, tvdb_exceptions
 
 from sickbeard import db
-from sickbeard import helpers, exceptions, logger
+from sickbeard import helpers, exceptions, logger, classes
 from sickbeard.exceptions import ex
 from sickbeard import tvrage
 from sickbeard import config
 from sickbeard import image_cache
 from sickbeard import postProcessor
+from sickbeard import name_cache
+from sickbeard import episode_caches
 
 from sickbeard import encodingKludge as ek
 
@@ -46,9 +49,12 @@ from sickbeard.helpers import parse_result_wrapper
 from common import Quality, Overview
 from common import DOWNLOADED, SNATCHED, SNATCHED_PROPER, ARCHIVED, IGNORED, UNAIRED, WANTED, SKIPPED, UNKNOWN
 
+# most episodes saved in one transaction when a show is loaded from TVDB
+EPISODE_SAVE_CHUNK = 100
+
 class TVShow(object):
 
-    def __init__ (self, tvdbid, lang=""):
+    def __init__ (self, tvdbid, lang="", sqlShow=None):
 
         self.tvdbid = tvdbid
 
@@ -73,12 +79,20 @@ class TVShow(object):
         self.lock = threading.Lock()
         self._isDirGood = False
 
+        # built by show_name_helpers.getNameMatcher the first time a result is checked against this show
+        self.nameMatcher = None
+
         self.episodes = {}
         
         otherShow = helpers.findCertainShow(sickbeard.showList, self.tvdbid)
         if otherShow != None:
             raise exceptions.MultipleShowObjectsException("Can't create a show if it already exists")
 
+        # a show loaded with the others at startup comes with its row and is already in the database as it is
+        if sqlShow != None:
+            self._loadFromRow(sqlShow)
+            return
+
         self.loadFromDB()
         
         self.saveToDB()
@@ -285,7 +299,14 @@ class TVShow(object):
         return scannedEps
 
 
-    def loadEpisodesFromTVDB(self, cache=True):
+    def loadEpisodesFromTVDB(self, cache=True, changedEpisodes=None):
+        """
+        Loads the episodes of the show from TVDB into the DB, returns {season: {episode: True}} for every
+        episode TVDB has or None if TVDB couldn't be reached.
+
+        changedEpisodes: TVDB ids of the episodes that changed since the last update, episodes we already
+        have that aren't in it are left alone. None loads every episode.
+        """
 
         # There's gotta be a better way of doing this but we don't wanna
         # change the cache value elsewhere
@@ -308,12 +329,23 @@ class TVShow(object):
 
         scannedEps = {}
 
+        # the episodes are loaded first and saved afterwards, so the database isn't locked while TVDB is read
+        dirtyEps = []
+
         for season in showObj:
             scannedEps[season] = {}
             for episode in showObj[season]:
                 # need some examples of wtf episode 0 means to decide if we want it or not
                 if episode == 0:
                     continue
+                if changedEpisodes is not None and self.getEpisode(season, episode, noCreate=True) != None:
+                    try:
+                        unchanged = int(showObj[season][episode]['id']) not in changedEpisodes
+                    except (TypeError, ValueError):
+                        unchanged = False
+                    if unchanged:
+                        scannedEps[season][episode] = True
+                        continue
                 try:
                     #ep = TVEpisode(self, season, episode)
                     ep = self.getEpisode(season, episode)
@@ -331,12 +363,35 @@ class TVShow(object):
                     logger.log(str(self.tvdbid) + ": Loading info from theTVDB for episode " + str(season) + "x" + str(episode), logger.DEBUG)
                     ep.loadFromTVDB(season, episode, tvapi=t)
                     if ep.dirty:
-                        ep.saveToDB()
+                        dirtyEps.append(ep)
 
                 scannedEps[season][episode] = True
 
+        self.saveEpisodes(dirtyEps)
+
         return scannedEps
 
+    def saveEpisodes(self, episodes):
+        """
+        Saves the episodes to the DB, EPISODE_SAVE_CHUNK of them per transaction. If a transaction is rolled back
+        its episodes are marked dirty again and the episode caches are read from the DB again before the
+        exception is passed on.
+        """
+        myDB = db.DBConnection()
+
+        for i in range(0, len(episodes), EPISODE_SAVE_CHUNK):
+            chunk = episodes[i:i+EPISODE_SAVE_CHUNK]
+            try:
+                with myDB.transaction():
+                    for curEp in chunk:
+                        with curEp.lock:
+                            curEp.saveToDB()
+            except:
+                for curEp in chunk:
+                    curEp.dirty = True
+                episode_caches.reloadShow(self.tvdbid)
+                raise
+
     def setTVRID(self, force=False):
 
         if self.tvrid != 0 and not force:
@@ -543,45 +598,51 @@ class TVShow(object):
             logger.log(str(self.tvdbid) + ": Unable to find the show in the database")
             return
         else:
-            if self.name == "":
-                self.name = sqlResults[0]["show_name"]
-            self.tvrname = sqlResults[0]["tvr_name"]
-            if self.network == "":
-                self.network = sqlResults[0]["network"]
-            if self.genre == "":
-                self.genre = sqlResults[0]["genre"]
-
-            self.runtime = sqlResults[0]["runtime"]
-
-            self.status = sqlResults[0]["status"]
-            if self.status == None:
-                self.status = ""
-            self.airs = sqlResults[0]["airs"]
-            if self.airs == None:
-                self.airs = ""
-            self.startyear = sqlResults[0]["startyear"]
-            if self.startyear == None:
-                self.startyear = 0
-
-            self.air_by_date = sqlResults[0]["air_by_date"]
-            if self.air_by_date == None:
-                self.air_by_date = 0
-
-            self.quality = int(sqlResults[0]["quality"])
-            self.seasonfolders = int(sqlResults[0]["seasonfolders"])
-            self.paused = int(sqlResults[0]["paused"])
-
-            self._location = sqlResults[0]["location"]
-
-            if self.tvrid == 0:
-                self.tvrid = int(sqlResults[0]["tvr_id"])
-
-            if self.lang == "":
-                self.lang = sqlResults[0]["lang"]
-            
-            self.anime = sqlResults[0]["anime"]
-            if self.anime == None:
-                self.anime = 0
+            self._loadFromRow(sqlResults[0])
+
+    def _loadFromRow(self, sqlShow):
+        """
+        Sets the show's info from its row in tv_shows
+        """
+        if self.name == "":
+            self.name = sqlShow["show_name"]
+        self.tvrname = sqlShow["tvr_name"]
+        if self.network == "":
+            self.network = sqlShow["network"]
+        if self.genre == "":
+            self.genre = sqlShow["genre"]
+
+        self.runtime = sqlShow["runtime"]
+
+        self.status = sqlShow["status"]
+        if self.status == None:
+            self.status = ""
+        self.airs = sqlShow["airs"]
+        if self.airs == None:
+            self.airs = ""
+        self.startyear = sqlShow["startyear"]
+        if self.startyear == None:
+            self.startyear = 0
+
+        self.air_by_date = sqlShow["air_by_date"]
+        if self.air_by_date == None:
+            self.air_by_date = 0
+
+        self.quality = int(sqlShow["quality"])
+        self.seasonfolders = int(sqlShow["seasonfolders"])
+        self.paused = int(sqlShow["paused"])
+
+        self._location = sqlShow["location"]
+
+        if self.tvrid == 0:
+            self.tvrid = int(sqlShow["tvr_id"])
+
+        if self.lang == "":
+            self.lang = sqlShow["lang"]
+        
+        self.anime = sqlShow["anime"]
+        if self.anime == None:
+            self.anime = 0
 
 
     def loadFromTVDB(self, cache=True, tvapi=None, cachedSeason=None):
@@ -716,9 +777,11 @@ class TVShow(object):
         myDB = db.DBConnection()
         myDB.action("DELETE FROM tv_episodes WHERE showid = ?", [self.tvdbid])
         myDB.action("DELETE FROM tv_shows WHERE tvdb_id = ?", [self.tvdbid])
+        episode_caches.removeShow(self.tvdbid)
 
         # remove self from show list
-        sickbeard.showList = [x for x in sickbeard.showList if x.tvdbid != self.tvdbid]
+        sickbeard.showList = classes.ShowList([x for x in sickbeard.showList if x.tvdbid != self.tvdbid])
+        name_cache.resolver.removeShow(self.tvdbid)
         
         # clear the cache
         image_cache_dir = ek.ek(os.path.join, sickbeard.CACHE_DIR, 'images')
@@ -873,6 +936,11 @@ class TVShow(object):
         myDB.upsert("tv_shows", newValueDict, controlValueDict)
         helpers.update_anime_support()
 
+        # the name or the tvrage id might have changed
+        name_cache.resolver.updateShow(self)
+        if isinstance(sickbeard.showList, classes.ShowList):
+            sickbeard.showList.updateShow(self)
+
 
     def __str__(self):
         toReturn = ""
@@ -894,11 +962,11 @@ class TVShow(object):
 
     def wantEpisode(self, season, episode, quality, manualSearch=False):
 
-        logger.log(u"Checking if we want episode "+str(season)+"x"+str(episode)+" at quality "+Quality.qualityStrings[quality], logger.DEBUG)
+        logger.log(u"Checking if we want episode %sx%s at quality %s", logger.DEBUG, season, episode, Quality.qualityStrings[quality])
 
         # if the quality isn't one we want under any circumstances then just say no
         anyQualities, bestQualities = Quality.splitQuality(self.quality)
-        logger.log(u"any,best = "+str(anyQualities)+" "+str(bestQualities)+" and we are "+str(quality), logger.DEBUG)
+        logger.log(u"any,best = %s %s and we are %s", logger.DEBUG, anyQualities, bestQualities, quality)
 
         if quality not in anyQualities + bestQualities:
             logger.log(u"I know for sure I don't want this episode, saying no", logger.DEBUG)
@@ -913,7 +981,7 @@ class TVShow(object):
 
         epStatus = int(sqlResults[0]["status"])
 
-        logger.log(u"current episode status: "+str(epStatus), logger.DEBUG)
+        logger.log(u"current episode status: %s", logger.DEBUG, epStatus)
 
         # if we know we don't want it then just say no
         if epStatus in (SKIPPED, IGNORED, ARCHIVED) and not manualSearch:
@@ -1381,6 +1449,7 @@ class TVEpisode(object):
         myDB = db.DBConnection()
         sql = "DELETE FROM tv_episodes WHERE showid="+str(self.show.tvdbid)+" AND season="+str(self.season)+" AND episode="+str(self.episode)
         myDB.action(sql)
+        episode_caches.removeEpisode(self.show.tvdbid, self.season, self.episode)
 
         raise exceptions.EpisodeDeletedException()
 
@@ -1409,6 +1478,11 @@ class TVEpisode(object):
 
         # use a custom update/insert method to get the data into the DB
         myDB.upsert("tv_episodes", newValueDict, controlValueDict)
+        self.dirty = False
+
+        # keep the episode counts of the show and the coming episodes up to date
+        episode_caches.updateEpisode(self.show.tvdbid, self.season, self.episode, self.name, self.description,
+                                     newValueDict["airdate"], self.status, self.location)
 
 
     def fullPath (self):
@@ -1548,3 +1622,27 @@ class TVEpisode(object):
 
         return finalName
 
+
+def loadShowsFromDB():
+    """
+    Adds every show in the database to the showList. The shows are read with one query and aren't saved back,
+    whether there's an anime among them is worked out once they're all in.
+
+    Returns: the shows that were added
+    """
+    shows = []
+
+    myDB = db.DBConnection()
+    for sqlShow in myDB.select("SELECT * FROM tv_shows"):
+        try:
+            curShow = TVShow(int(sqlShow["tvdb_id"]), sqlShow=sqlShow)
+            sickbeard.showList.append(curShow)
+            name_cache.resolver.addShow(curShow)
+            shows.append(curShow)
+        except Exception, e:
+            logger.log(u"There was an error creating the show in "+sqlShow["location"]+": "+str(e).decode('utf-8'), logger.ERROR)
+            logger.log(traceback.format_exc(), logger.DEBUG)
+
+    helpers.update_anime_support()
+
+    return shows
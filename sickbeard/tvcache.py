@@ -16,6 +16,8 @@
 # You should have received a copy of the GNU General Public License
 # along with Sick Beard.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 import time
 import datetime
 import sqlite3
@@ -38,28 +40,42 @@ from name_parser.parser import NameParser, InvalidNameException
 from sickbeard.helpers import parse_result_wrapper
 
 
+# the cache tables (and their index) that have been checked in this process, (db path, provider) tuples
+_initializedProviders = set()
+
 class CacheDBConnection(db.DBConnection):
 
     def __init__(self, providerName):
         db.DBConnection.__init__(self, "cache.db")
 
-        # Create the table if it's not already there
-        try:
-            sql = "CREATE TABLE "+providerName+" (name TEXT, season NUMERIC, episodes TEXT, tvrid NUMERIC, tvdbid NUMERIC, url TEXT, time NUMERIC, quality TEXT);"
-            self.connection.execute(sql)
-            self.connection.commit()
-        except sqlite3.OperationalError, e:
-            if str(e) != "table "+providerName+" already exists":
-                raise
+        if (self.path, providerName) in _initializedProviders:
+            return
 
-        # Create the table if it's not already there
-        try:
-            sql = "CREATE TABLE lastUpdate (provider TEXT, time NUMERIC);"
-            self.connection.execute(sql)
+        with db.db_lock:
+
+            # Create the table if it's not already there
+            try:
+                sql = "CREATE TABLE "+providerName+" (name TEXT, season NUMERIC, episodes TEXT, tvrid NUMERIC, tvdbid NUMERIC, url TEXT, time NUMERIC, quality TEXT);"
+                self.connection.execute(sql)
+                self.connection.commit()
+            except sqlite3.OperationalError, e:
+                if str(e) != "table "+providerName+" already exists":
+                    raise
+
+            # findNeededEpisodes looks the results up by show and season
+            self.connection.execute("CREATE INDEX IF NOT EXISTS idx_"+providerName+"_tvdbid_season ON "+providerName+"(tvdbid, season);")
             self.connection.commit()
-        except sqlite3.OperationalError, e:
-            if str(e) != "table lastUpdate already exists":
-                raise
+
+            # Create the table if it's not already there
+            try:
+                sql = "CREATE TABLE lastUpdate (provider TEXT, time NUMERIC);"
+                self.connection.execute(sql)
+                self.connection.commit()
+            except sqlite3.OperationalError, e:
+                if str(e) != "table lastUpdate already exists":
+                    raise
+
+            _initializedProviders.add((self.path, providerName))
 
 class TVCache():
 
@@ -69,6 +85,15 @@ class TVCache():
         self.providerID = self.provider.getID()
         self.minTime = 10
 
+        # how long items stay in the cache after they were added
+        self.maxAge = datetime.timedelta(days=2)
+
+        # the urls in the cache, items with these urls are skipped when updating
+        self._cachedURLs = set()
+
+        # the name_cache.resolver generation the items we couldn't match to a show were last dropped at
+        self._unmatchedGeneration = None
+
     def _getDB(self):
 
         return CacheDBConnection(self.providerID)
@@ -79,6 +104,26 @@ class TVCache():
 
         myDB.action("DELETE FROM "+self.providerID+" WHERE 1")
 
+    def _pruneCache(self):
+        """
+        Deletes the expired items and returns the urls of the ones that are left. The items we couldn't
+        match to a show are only deleted (so they get another chance) when a show was added or its
+        names changed since the last time.
+        """
+
+        myDB = self._getDB()
+
+        minTimestamp = int(time.mktime((datetime.datetime.today() - self.maxAge).timetuple()))
+
+        generation = name_cache.resolver.generation
+        if generation != self._unmatchedGeneration:
+            myDB.action("DELETE FROM "+self.providerID+" WHERE time < ? OR tvdbid = 0 OR tvdbid IS NULL", [minTimestamp])
+            self._unmatchedGeneration = generation
+        else:
+            myDB.action("DELETE FROM "+self.providerID+" WHERE time < ?", [minTimestamp])
+
+        return set(x["url"] for x in myDB.select("SELECT url FROM "+self.providerID))
+
     def _getRSSData(self):
 
         data = None
@@ -104,9 +149,9 @@ class TVCache():
         else:
             return []
 
-        # now that we've loaded the current RSS feed lets delete the old cache
-        logger.log(u"Clearing "+self.provider.name+" cache and updating with new information")
-        self._clearCache()
+        # now that we've loaded the current RSS feed lets drop the old items, the ones we already have are kept as they are
+        logger.log(u"Pruning "+self.provider.name+" cache and updating with new information")
+        self._cachedURLs = self._pruneCache()
 
         if not self._checkAuth(data):
             raise exceptions.AuthException("Your authentication info for "+self.provider.name+" is incorrect, check your config")
@@ -148,7 +193,7 @@ class TVCache():
 
         url = self._translateLinkURL(url)
 
-        logger.log(u"Adding item from RSS to cache: "+title, logger.DEBUG)
+        logger.log(u"Adding item from RSS to cache: %s", logger.DEBUG, title)
 
         self._addCacheEntry(title, url)
 
@@ -178,7 +223,7 @@ class TVCache():
     def shouldUpdate(self):
         # if we've updated recently then skip the update
         if datetime.datetime.today() - self.lastUpdate < datetime.timedelta(minutes=self.minTime):
-            logger.log(u"Last update was too soon, using old cache: today()-"+str(self.lastUpdate)+"<"+str(datetime.timedelta(minutes=self.minTime)), logger.DEBUG)
+            logger.log(u"Last update was too soon, using old cache: today()-%s<%s", logger.DEBUG, self.lastUpdate, datetime.timedelta(minutes=self.minTime))
             return False
 
         return True
@@ -190,6 +235,11 @@ class TVCache():
         On a succesfull parse it will add the parsed infos into the cache.db
         This dosen't mean the parsed result is usefull
         """
+        # we've already got this one, don't bother parsing it again
+        if url in self._cachedURLs:
+            logger.log(u"Skipping %s, it's already in the cache", logger.DEBUG, name)
+            return None
+
         myDB = self._getDB()
 
         parse_result = None
@@ -207,15 +257,15 @@ class TVCache():
                 """
                 parse_result = parse_result_wrapper(None,curName)
             except InvalidNameException:
-                logger.log(u"tvcache: Unable to parse the filename "+curName+" into a valid episode", logger.DEBUG)
+                logger.log(u"tvcache: Unable to parse the filename %s into a valid episode", logger.DEBUG, curName)
                 continue
 
         if not parse_result:
-            logger.log(u"Giving up because I'm unable to parse this name: "+name, logger.DEBUG)
+            logger.log(u"Giving up because I'm unable to parse this name: %s", logger.DEBUG, name)
             return False
 
         if not parse_result.series_name:
-            logger.log(u"No series name retrieved from "+name+", unable to cache it", logger.DEBUG)
+            logger.log(u"No series name retrieved from %s, unable to cache it", logger.DEBUG, name)
             return False
 
         tvdb_lang = None
@@ -231,7 +281,7 @@ class TVCache():
                     tvrage_id = showObj.tvrid
                     tvdb_lang = showObj.lang
                 else:
-                    logger.log(u"We were given a TVDB id "+str(tvdb_id)+" but it doesn't match a show we have in our list, so leaving tvrage_id empty", logger.DEBUG)
+                    logger.log(u"We were given a TVDB id %s but it doesn't match a show we have in our list, so leaving tvrage_id empty", logger.DEBUG, tvdb_id)
                     tvrage_id = 0
 
             # if we have only a tvrage_id then use the database
@@ -241,14 +291,14 @@ class TVCache():
                     tvdb_id = showObj.tvdbid
                     tvdb_lang = showObj.lang
                 else:
-                    logger.log(u"We were given a TVRage id "+str(tvrage_id)+" but it doesn't match a show we have in our list, so leaving tvdb_id empty", logger.DEBUG)
+                    logger.log(u"We were given a TVRage id %s but it doesn't match a show we have in our list, so leaving tvdb_id empty", logger.DEBUG, tvrage_id)
                     tvdb_id = 0
 
             # if they're both empty then fill out as much info as possible by searching the show name
             else:
                 
                 # check the name cache and see if we already know what show this is
-                logger.log(u"Checking the cache to see if we already know the tvdb id of "+parse_result.series_name, logger.DEBUG)
+                logger.log(u"Checking the cache to see if we already know the tvdb id of %s", logger.DEBUG, parse_result.series_name)
                 tvdb_id = name_cache.retrieveNameFromCache(parse_result.series_name)
                 
                 # remember if the cache lookup worked or not so we know whether we should bother updating it later
@@ -256,7 +306,7 @@ class TVCache():
                     logger.log(u"No cache results returned, continuing on with the search", logger.DEBUG)
                     from_cache = False
                 else:
-                    logger.log(u"Cache lookup found "+repr(tvdb_id)+", using that", logger.DEBUG)
+                    logger.log(u"Cache lookup found %r, using that", logger.DEBUG, tvdb_id)
                     from_cache = True
                 
                 # if the cache failed, try looking up the show name in the database
@@ -264,7 +314,7 @@ class TVCache():
                     logger.log(u"Trying to look the show up in the show database", logger.DEBUG)
                     showResult = helpers.searchDBForShow(parse_result.series_name)
                     if showResult:
-                        logger.log(parse_result.series_name+" was found to be show "+showResult[1]+" ("+str(showResult[0])+") in our DB.", logger.DEBUG)
+                        logger.log(u"%s was found to be show %s (%s) in our DB.", logger.DEBUG, parse_result.series_name, showResult[1], showResult[0])
                         tvdb_id = showResult[0]
 
                 # if the DB lookup fails then do a comprehensive regex search
@@ -272,7 +322,7 @@ class TVCache():
                     logger.log(u"Couldn't figure out a show name straight from the DB, trying a regex search instead", logger.DEBUG)
                     for curShow in sickbeard.showList:
                         if show_name_helpers.isGoodResult(name, curShow, False):
-                            logger.log(u"Successfully matched "+name+" to "+curShow.name+" with regex", logger.DEBUG)
+                            logger.log(u"Successfully matched %s to %s with regex", logger.DEBUG, name, curShow.name)
                             tvdb_id = curShow.tvdbid
                             tvdb_lang = curShow.lang
                             break
@@ -342,6 +392,8 @@ class TVCache():
         myDB.action("INSERT INTO "+self.providerID+" (name, season, episodes, tvrid, tvdbid, url, time, quality) VALUES (?,?,?,?,?,?,?,?)",
                     [name, season, episodeText, tvrage_id, tvdb_id, url, curTimestamp, quality])
 
+        self._cachedURLs.add(url)
+
 
     def searchCache(self, episode, manualSearch=False):
         neededEps = self.findNeededEpisodes(episode, manualSearch)
@@ -396,7 +448,7 @@ class TVCache():
 
             # if the show says we want that episode then add it to the list
             if not showObj.wantEpisode(curSeason, curEp, curQuality, manualSearch):
-                logger.log(u"Skipping "+curResult["name"]+" because we don't want an episode that's "+Quality.qualityStrings[curQuality], logger.DEBUG)
+                logger.log(u"Skipping %s because we don't want an episode that's %s", logger.DEBUG, curResult["name"], Quality.qualityStrings[curQuality])
 
             else:
 
@@ -29,6 +29,7 @@ from sickbeard.common import UNAIRED
 
 from sickbeard import db
 from sickbeard import exceptions, helpers
+from sickbeard import episode_caches
 from sickbeard.exceptions import ex
 
 from lib.tvdb_api import tvdb_api, tvdb_exceptions
@@ -329,6 +330,8 @@ class TVRage:
         # insert it
         myDB.action("INSERT INTO tv_episodes (showid, tvdbid, name, season, episode, description, airdate, hasnfo, hastbn, status, location) VALUES (?,?,?,?,?,?,?,?,?,?,?)", \
                     [self.show.tvdbid, -1, self.nextEpInfo['name'], self.nextEpInfo['season'], self.nextEpInfo['episode'], '', self.nextEpInfo['airdate'].toordinal(), 0, 0, UNAIRED, ''])
+        episode_caches.updateEpisode(self.show.tvdbid, self.nextEpInfo['season'], self.nextEpInfo['episode'], self.nextEpInfo['name'],
+                                     '', self.nextEpInfo['airdate'].toordinal(), UNAIRED, '')
 
         # once it's in the DB make an object and return it
         ep = None
@@ -157,7 +157,7 @@ class QueueProgressIndicator():
         return len([x for x in self.queueItemList if x.isInQueue()])
 
     def nextName(self):
-        for curItem in [sickbeard.showQueueScheduler.action.currentItem]+sickbeard.showQueueScheduler.action.queue: #@UndefinedVariable
+        for curItem in [sickbeard.showQueueScheduler.action.currentItem]+sorted(sickbeard.showQueueScheduler.action.queue): #@UndefinedVariable
             if curItem in self.queueItemList:
                 return curItem.name
 
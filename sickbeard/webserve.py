@@ -38,6 +38,8 @@ from sickbeard import logger, helpers, exceptions, classes, db
 from sickbeard import encodingKludge as ek
 from sickbeard import search_queue
 from sickbeard import image_cache
+from sickbeard import show_stats
+from sickbeard import coming_episodes
 
 from sickbeard.providers import newznab
 from sickbeard.common import Quality, Overview, statusStrings
@@ -58,6 +60,24 @@ import xml.etree.cElementTree as etree
 from sickbeard import browser
 
 
+# how long browsers can use the show images they have before asking if they changed, in seconds
+IMAGE_MAX_AGE = 86400
+
+def precompileTemplates():
+    """
+    Compiles all the page templates so the first view of a page doesn't have to. Cheetah keeps the classes
+    it compiled by their source, every PageTemplate made from the same file after this uses them.
+    """
+    templateDir = os.path.join(sickbeard.PROG_DIR, "data/interfaces/default/")
+    for fileName in sorted(os.listdir(templateDir)):
+        # the inc_ templates are compiled by Cheetah when a page includes them
+        if not fileName.endswith(".tmpl") or fileName.startswith("inc_"):
+            continue
+        try:
+            PageTemplate(file=fileName)
+        except Exception, e:
+            logger.log(u"Unable to compile template " + fileName + ": " + ex(e), logger.ERROR)
+
 class PageTemplate (Template):
     def __init__(self, *args, **KWs):
         KWs['file'] = os.path.join(sickbeard.PROG_DIR, "data/interfaces/default/", KWs['file'])
@@ -99,6 +119,22 @@ class TVDBWebUI:
 def _munge(string):
     return unicode(string).encode('utf-8', 'xmlcharrefreplace')
 
+def _serveImage(path):
+    """
+    Serves an image so the browser keeps it for a day and afterwards asks if it changed (answered with
+    a 304 if it didn't) instead of downloading it again.
+    """
+    try:
+        image_stat = ek.ek(os.stat, path)
+    except OSError:
+        raise cherrypy.NotFound()
+
+    cherrypy.response.headers['Cache-Control'] = 'public, max-age=' + str(IMAGE_MAX_AGE)
+    cherrypy.response.headers['ETag'] = '"%x-%x"' % (int(image_stat.st_mtime), image_stat.st_size)
+    cherrypy.lib.cptools.validate_etags()
+
+    return cherrypy.lib.static.serve_file(path, content_type="image/jpeg")
+
 def _genericMessage(subject, message):
     t = PageTemplate(file="genericMessage.tmpl")
     t.submenu = HomeMenu()
@@ -300,37 +336,20 @@ class Manage:
         t = PageTemplate(file="manage_backlogOverview.tmpl")
         t.submenu = ManageMenu
 
-        myDB = db.DBConnection()
-
         showCounts = {}
-        showCats = {}
-        showSQLResults = {}
+        showEps = {}
 
         for curShow in sickbeard.showList:
 
-            epCounts = {}
-            epCats = {}
-            epCounts[Overview.SKIPPED] = 0
-            epCounts[Overview.WANTED] = 0
-            epCounts[Overview.QUAL] = 0
-            epCounts[Overview.GOOD] = 0
-            epCounts[Overview.UNAIRED] = 0
-
-            sqlResults = myDB.select("SELECT * FROM tv_episodes WHERE showid = ? ORDER BY season*1000+episode DESC", [curShow.tvdbid])
-
-            for curResult in sqlResults:
-
-                curEpCat = curShow.getOverview(int(curResult["status"]))
-                epCats[str(curResult["season"])+"x"+str(curResult["episode"])] = curEpCat
-                epCounts[curEpCat] += 1
-
+            epCounts = show_stats.showStats.getCounts(curShow)['overview']
             showCounts[curShow.tvdbid] = epCounts
-            showCats[curShow.tvdbid] = epCats
-            showSQLResults[curShow.tvdbid] = sqlResults
+
+            # only the episodes of shows that have some are listed
+            if epCounts[Overview.WANTED] + epCounts[Overview.QUAL]:
+                showEps[curShow.tvdbid] = show_stats.showStats.getEpisodes(curShow, (Overview.WANTED, Overview.QUAL))
 
         t.showCounts = showCounts
-        t.showCats = showCats
-        t.showSQLResults = showSQLResults
+        t.showEps = showEps
 
         return _munge(t)
 
@@ -1827,52 +1846,21 @@ class ErrorLogs:
 
         minLevel = int(minLevel)
 
-        data = []
-        if os.path.isfile(logger.sb_log_instance.log_file):
-            f = ek.ek(open, logger.sb_log_instance.log_file)
-            data = f.readlines()
-            f.close()
-
-        regex =  "^(\w{3})\-(\d\d)\s*(\d\d)\:(\d\d):(\d\d)\s*([A-Z]+)\s*(.+?)\s*\:\:\s*(.*)$"
-
-        finalData = []
-
-        numLines = 0
-        lastLine = False
-        numToShow = min(maxLines, len(data))
-
-        for x in reversed(data):
-
-            x = x.decode('utf-8')
-            match = re.match(regex, x)
-
-            if match:
-                level = match.group(6)
-                if level not in logger.reverseNames:
-                    lastLine = False
-                    continue
-
-                if logger.reverseNames[level] >= minLevel:
-                    lastLine = True
-                    finalData.append(x)
-                else:
-                    lastLine = False
-                    continue
-
-            elif lastLine:
-                finalData.append("AA"+x)
+        messages, offset = logger.sb_log_instance.read_log(minLevel, int(maxLines))
 
-            numLines += 1
+        t.logLines = u"".join(messages)
+        t.logOffset = offset
+        t.minLevel = minLevel
 
-            if numLines >= numToShow:
-                break
+        return _munge(t)
 
-        result = "".join(finalData)
+    @cherrypy.expose
+    def getLogLines(self, offset=0, minLevel=logger.MESSAGE):
+        cherrypy.response.headers['Cache-Control'] = "max-age=0,no-cache,no-store"
 
-        t.logLines = result
-        t.minLevel = minLevel
+        messages, offset = logger.sb_log_instance.read_log_since(int(offset), int(minLevel))
 
-        return _munge(t)
+        return json.dumps({'offset': offset, 'lines': messages})
 
 
 class Home:
@@ -2171,7 +2159,7 @@ class Home:
             
             if showObj.is_anime:
 
-                bwl = BlackAndWhiteList(showObj.tvdbid)
+                bwl = get_black_and_white_list(showObj.tvdbid)
                 t.whitelist = []
                 if bwl.whiteDict.has_key("release_group"):
                     t.whitelist = bwl.whiteDict["release_group"]
@@ -2547,7 +2535,7 @@ class WebInterface:
         redirect("/home")
 
     @cherrypy.expose
-    def showPoster(self, show=None, which=None):
+    def showPoster(self, show=None, which=None, size=None):
 
         if which == 'poster':
             default_image_name = 'poster.png'
@@ -2556,12 +2544,12 @@ class WebInterface:
 
         default_image_path = ek.ek(os.path.join, sickbeard.PROG_DIR, 'data', 'images', default_image_name)
         if show == None:
-            return cherrypy.lib.static.serve_file(default_image_path, content_type="image/jpeg")
+            return _serveImage(default_image_path)
         else:
             showObj = sickbeard.helpers.findCertainShow(sickbeard.showList, int(show))
 
         if showObj == None:
-            return cherrypy.lib.static.serve_file(default_image_path, content_type="image/jpeg")
+            return _serveImage(default_image_path)
 
         cache_obj = image_cache.ImageCache()
         
@@ -2571,28 +2559,16 @@ class WebInterface:
         else:
             image_file_name = cache_obj.banner_path(showObj.tvdbid)
 
-        if ek.ek(os.path.isfile, image_file_name):
-            try:
-                from PIL import Image
-                from cStringIO import StringIO
-            except ImportError: # PIL isn't installed
-                return cherrypy.lib.static.serve_file(image_file_name, content_type="image/jpeg")
-            else:
-                im = Image.open(image_file_name)
-                if im.mode == 'P': # Convert GIFs to RGB
-                    im = im.convert('RGB')
-                if which == 'banner':
-                    size = 600, 112
-                elif which == 'poster':
-                    size = 136, 200
-                else:
-                    return cherrypy.lib.static.serve_file(image_file_name, content_type="image/jpeg")
-                im.thumbnail(size, Image.ANTIALIAS)
-                buffer = StringIO()
-                im.save(buffer, 'JPEG')
-                return buffer.getvalue()
-        else:
-            return cherrypy.lib.static.serve_file(default_image_path, content_type="image/jpeg")
+        if not ek.ek(os.path.isfile, image_file_name):
+            return _serveImage(default_image_path)
+
+        # only the sizes we know are made, anything else gets the usual one
+        if which != 'poster':
+            which = 'banner'
+        thumbSize = image_cache.THUMBNAIL_NAMED_SIZES[which].get(size, image_cache.THUMBNAIL_SIZES[which])
+        image_file_name = cache_obj.get_thumbnail(image_file_name, thumbSize)
+
+        return _serveImage(image_file_name)
 
     @cherrypy.expose
     def setComingEpsLayout(self, layout):
@@ -2622,35 +2598,10 @@ class WebInterface:
     @cherrypy.expose
     def comingEpisodes(self, layout="None"):
 
-        myDB = db.DBConnection()
-        
         today = datetime.date.today().toordinal()
-        next_week = (datetime.date.today() + datetime.timedelta(days=7)).toordinal()
-        recently = (datetime.date.today() - datetime.timedelta(days=3)).toordinal()
-
-        done_show_list = []
-        qualList = Quality.DOWNLOADED + Quality.SNATCHED + [ARCHIVED, IGNORED]
-        sql_results = myDB.select("SELECT *, tv_shows.status as show_status FROM tv_episodes, tv_shows WHERE season != 0 AND airdate >= ? AND airdate < ? AND tv_shows.tvdb_id = tv_episodes.showid AND tv_episodes.status NOT IN ("+','.join(['?']*len(qualList))+")", [today, next_week] + qualList)
-        for cur_result in sql_results:
-            done_show_list.append(int(cur_result["showid"]))
-
-        more_sql_results = myDB.select("SELECT *, tv_shows.status as show_status FROM tv_episodes outer_eps, tv_shows WHERE season != 0 AND showid NOT IN ("+','.join(['?']*len(done_show_list))+") AND tv_shows.tvdb_id = outer_eps.showid AND airdate = (SELECT airdate FROM tv_episodes inner_eps WHERE inner_eps.showid = outer_eps.showid AND inner_eps.airdate >= ? ORDER BY inner_eps.airdate ASC LIMIT 1) AND outer_eps.status NOT IN ("+','.join(['?']*len(Quality.DOWNLOADED+Quality.SNATCHED))+")", done_show_list + [next_week] + Quality.DOWNLOADED + Quality.SNATCHED)
-        sql_results += more_sql_results
-
-        more_sql_results = myDB.select("SELECT *, tv_shows.status as show_status FROM tv_episodes, tv_shows WHERE season != 0 AND tv_shows.tvdb_id = tv_episodes.showid AND airdate < ? AND airdate >= ? AND tv_episodes.status = ? AND tv_episodes.status NOT IN ("+','.join(['?']*len(qualList))+")", [today, recently, WANTED] + qualList)
-        sql_results += more_sql_results
+        next_week = (datetime.date.today() + datetime.timedelta(days=coming_episodes.ComingEpisodes.COMING_DAYS)).toordinal()
 
-        #epList = sickbeard.comingList
-
-        # sort by air date
-        sorts = {
-            'date': (lambda x, y: cmp(int(x["airdate"]), int(y["airdate"]))),
-            'show': (lambda a, b: cmp(a["show_name"], b["show_name"])),
-            'network': (lambda a, b: cmp(a["network"], b["network"])),
-        }
-
-        #epList.sort(sorts[sort])
-        sql_results.sort(sorts[sickbeard.COMING_EPS_SORT])
+        sql_results = coming_episodes.comingEpisodes.getEpisodes(sickbeard.COMING_EPS_SORT)
 
         t = PageTemplate(file="comingEpisodes.tmpl")
         paused_item = { 'title': '', 'path': 'toggleComingEpsDisplayPaused' }
@@ -2681,6 +2632,17 @@ class WebInterface:
 
         return _munge(t)
 
+    @cherrypy.expose
+    def getComingEpisodes(self, sort=None):
+        if sort not in coming_episodes.sorts:
+            sort = sickbeard.COMING_EPS_SORT
+
+        results = coming_episodes.comingEpisodes.getEpisodes(sort)
+        for cur_result in results:
+            cur_result["airdate"] = str(datetime.date.fromordinal(cur_result["airdate"]))
+
+        return json.dumps({'results': results})
+
     manage = Manage()
 
     history = History()
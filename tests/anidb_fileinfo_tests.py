@@ -0,0 +1,102 @@
+# coding=UTF-8
+import hashlib
+import os
+import time
+import unittest
+import test_lib as test
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+from lib.adba import aniDBfileInfo
+
+try:
+    hashlib.new('md4')
+    HAVE_MD4 = True
+except ValueError:
+    HAVE_MD4 = False
+
+
+class FileInfoTests(unittest.TestCase):
+
+    def setUp(self):
+        self.filePath = os.path.join(test.TESTDIR, "ed2k_test.bin")
+        self.cachePath = os.path.join(test.TESTDIR, aniDBfileInfo.HashCache.FILE_NAME)
+        aniDBfileInfo.indexDir = test.TESTDIR
+        aniDBfileInfo.hashCache = aniDBfileInfo.HashCache()
+
+        self.hashed = []
+        self._calculate_ed2k = aniDBfileInfo.calculate_ed2k
+        def counting_calculate_ed2k(filePath):
+            self.hashed.append(filePath)
+            return "hash%d" % len(self.hashed)
+        aniDBfileInfo.calculate_ed2k = counting_calculate_ed2k
+
+    def tearDown(self):
+        aniDBfileInfo.calculate_ed2k = self._calculate_ed2k
+        aniDBfileInfo.indexDir = None
+        aniDBfileInfo.hashCache = aniDBfileInfo.HashCache()
+        for path in (self.filePath, self.cachePath):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _writeFile(self, data):
+        f = open(self.filePath, "wb")
+        f.write(data)
+        f.close()
+
+    def test_file_size(self):
+        # a sparse file, the size has to come without reading it
+        f = open(self.filePath, "wb")
+        f.seek(3 * 1024 * 1024 * 1024 - 1)
+        f.write("x")
+        f.close()
+        self.assertEqual(aniDBfileInfo.get_file_size(self.filePath), 3 * 1024 * 1024 * 1024)
+
+    def test_hash_cache(self):
+        self._writeFile("some data")
+        self.assertEqual(aniDBfileInfo.get_file_hash(self.filePath), "hash1")
+        self.assertEqual(aniDBfileInfo.get_file_hash(self.filePath), "hash1")
+        self.assertEqual(len(self.hashed), 1)
+
+        # the cache survives a restart
+        aniDBfileInfo.hashCache = aniDBfileInfo.HashCache()
+        self.assertEqual(aniDBfileInfo.get_file_hash(self.filePath), "hash1")
+        self.assertEqual(len(self.hashed), 1)
+
+        # a changed file is hashed again
+        self._writeFile("other data")
+        os.utime(self.filePath, (time.time() + 10, time.time() + 10))
+        self.assertEqual(aniDBfileInfo.get_file_hash(self.filePath), "hash2")
+
+    def test_hash_cache_size(self):
+        aniDBfileInfo.indexDir = None
+        cache = aniDBfileInfo.HashCache()
+        for x in range(cache.MAX_SIZE + 5):
+            cache.add(("file%d" % x, 1, 1, 1), "hash")
+        self.assertEqual(len(cache.hashes), cache.MAX_SIZE)
+        self.assertEqual(cache.get(("file0", 1, 1, 1)), None)
+        self.assertEqual(cache.get(("file%d" % cache.MAX_SIZE, 1, 1, 1)), "hash")
+
+    @unittest.skipUnless(HAVE_MD4, "md4 isn't available in this python")
+    def test_ed2k(self):
+        self._writeFile("")
+        self.assertEqual(self._calculate_ed2k(self.filePath), "31d6cfe0d16ae931b73c59d7e0c089c0")
+        self._writeFile("abc")
+        self.assertEqual(self._calculate_ed2k(self.filePath), "a448017aaf21d8525fc10ae87aa6729d")
+
+        # more than one piece
+        data = "x" * (aniDBfileInfo.ED2K_CHUNK_SIZE + 10)
+        self._writeFile(data)
+        pieces = hashlib.new('md4', data[:aniDBfileInfo.ED2K_CHUNK_SIZE]).digest() + hashlib.new('md4', data[aniDBfileInfo.ED2K_CHUNK_SIZE:]).digest()
+        self.assertEqual(self._calculate_ed2k(self.filePath), hashlib.new('md4', pieces).hexdigest())
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - ANIDB FILE INFO TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(FileInfoTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
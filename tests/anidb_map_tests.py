@@ -0,0 +1,111 @@
+# coding=UTF-8
+import os
+import unittest
+import test_lib as test
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+from lib.adba import aniDBfileInfo
+from lib.adba.aniDBtvDBmaper import TvDBMap
+
+ANIME_LIST_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<anime-list>
+  <anime anidbid="24" tvdbid="79099" defaulttvdbseason="1">
+    <name>.hack//Sign</name>
+    <mapping-list>
+      <mapping anidbseason="0" tvdbseason="1">;1-27;2-28;</mapping>
+    </mapping-list>
+  </anime>
+  <anime anidbid="2" tvdbid="70973" defaulttvdbseason="1">
+    <name>3x3 Eyes</name>
+  </anime>
+  <anime anidbid="3" tvdbid="70973" defaulttvdbseason="2">
+    <name>3x3 Eyes Seima Densetsu</name>
+  </anime>
+  <anime anidbid="28" tvdbid="unknown" defaulttvdbseason="1">
+    <name>Unknown</name>
+  </anime>
+  <anime anidbid="239" tvdbid="78857" defaulttvdbseason="1">
+    <name>Naruto</name>
+    <mapping-list>
+      <mapping anidbseason="1" tvdbseason="1">;1-1;2-2;3-3;</mapping>
+      <mapping anidbseason="1" tvdbseason="2">;4-1;5-2+3;</mapping>
+    </mapping-list>
+  </anime>
+  <anime anidbid="240" tvdbid="78857" defaulttvdbseason="0">
+    <name>Naruto Specials</name>
+  </anime>
+  <anime anidbid="300" tvdbid="80000" defaulttvdbseason="1">
+    <name>Offsets</name>
+    <mapping-list>
+      <mapping anidbseason="1" tvdbseason="2" start="13" end="24" offset="-12"/>
+    </mapping-list>
+  </anime>
+</anime-list>
+'''
+
+
+class TvDBMapTests(unittest.TestCase):
+
+    def setUp(self):
+        self.xmlPath = os.path.join(test.TESTDIR, "anime-list.xml")
+        self.indexPath = self.xmlPath + ".idx"
+        f = open(self.xmlPath, "w")
+        f.write(ANIME_LIST_XML)
+        f.close()
+        aniDBfileInfo.indexDir = None
+        aniDBfileInfo._indexes.clear()
+        self.tvdbMap = TvDBMap(self.xmlPath)
+
+    def tearDown(self):
+        aniDBfileInfo._indexes.clear()
+        for path in (self.xmlPath, self.indexPath):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_ids(self):
+        self.assertEqual(self.tvdbMap.get_tvdb_for_anidb(3), 70973)
+        self.assertEqual(self.tvdbMap.get_tvdb_for_anidb("24"), 79099)
+        self.assertEqual(self.tvdbMap.get_tvdb_for_anidb(28), 0)
+        self.assertEqual(self.tvdbMap.get_tvdb_for_anidb(1), 0)
+        # the first anime of the show
+        self.assertEqual(self.tvdbMap.get_anidb_for_tvdb(70973), 2)
+        self.assertEqual(self.tvdbMap.get_anidb_for_tvdb(1), 0)
+
+    def test_shared(self):
+        self.assertTrue(os.path.isfile(self.indexPath))
+        self.assertTrue(TvDBMap(self.xmlPath).animeList is self.tvdbMap.animeList)
+
+    def test_anidb_episodes(self):
+        # episodes of the default season
+        self.assertEqual(self.tvdbMap.get_season_episode_for_anidb_absoluteNumber(24, 5), (1, 5))
+        self.assertEqual(self.tvdbMap.get_season_episode_for_anidb_absoluteNumber(3, 4), (2, 4))
+        # listed episodes
+        self.assertEqual(self.tvdbMap.get_season_episode_for_anidb_absoluteNumber(239, 2), (1, 2))
+        self.assertEqual(self.tvdbMap.get_season_episode_for_anidb_absoluteNumber(239, 5), (2, 2))
+        # the anime is spread over several seasons and the episode isn't listed
+        self.assertEqual(self.tvdbMap.get_season_episode_for_anidb_absoluteNumber(239, 6), (0, 0))
+        # offsets
+        self.assertEqual(self.tvdbMap.get_season_episode_for_anidb_absoluteNumber(300, 14), (2, 2))
+        self.assertEqual(self.tvdbMap.get_season_episode_for_anidb_absoluteNumber(300, 30), (0, 0))
+        # specials and unknown anime
+        self.assertEqual(self.tvdbMap.get_season_episode_for_anidb_absoluteNumber(24, "S1"), (0, 0))
+        self.assertEqual(self.tvdbMap.get_season_episode_for_anidb_absoluteNumber(1, 1), (0, 0))
+
+    def test_tvdb_episodes(self):
+        # the specials don't count
+        self.assertEqual(self.tvdbMap.get_season_episode_for_tvdb_absoluteNumber(78857, 4), (2, 1))
+        self.assertEqual(self.tvdbMap.get_season_episode_for_tvdb_absoluteNumber(79099, 3), (1, 3))
+        # the second season doesn't start at absolute number 1 but we don't know where it does
+        self.assertEqual(self.tvdbMap.get_season_episode_for_tvdb_absoluteNumber(70973, 3), (0, 0))
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - ANIDB MAP TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(TvDBMapTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,101 @@
+# coding=UTF-8
+import os
+import unittest
+import test_lib as test
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+from lib.adba import aniDBfileInfo, aniDBtitles
+
+TITLES_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<animetitles>
+	<anime aid="1">
+		<title type="short" xml:lang="en">CotS</title>
+		<title type="official" xml:lang="en">Crest of the Stars</title>
+		<title type="main" xml:lang="x-jat">Seikai no Monshou</title>
+	</anime>
+	<anime aid="2">
+		<title type="official" xml:lang="ja">3\xc3\x973EYES</title>
+		<title type="main" xml:lang="x-jat">3x3 Eyes</title>
+		<title type="official" xml:lang="en">3x3 Eyes</title>
+	</anime>
+	<anime aid="3">
+		<title type="main" xml:lang="x-jat">Crest of the Stars</title>
+	</anime>
+</animetitles>
+'''
+
+
+class AnimeTitlesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.xmlPath = os.path.join(test.TESTDIR, "animetitles.xml")
+        self.indexPath = self.xmlPath + ".idx"
+        self._writeXML(TITLES_XML)
+        aniDBfileInfo.indexDir = None
+        aniDBfileInfo._indexes.clear()
+
+    def tearDown(self):
+        aniDBfileInfo._indexes.clear()
+        for path in (self.xmlPath, self.indexPath):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _writeXML(self, data, mtime=None):
+        f = open(self.xmlPath, "w")
+        f.write(data)
+        f.close()
+        if mtime:
+            os.utime(self.xmlPath, (mtime, mtime))
+
+    def test_lookups(self):
+        titles = aniDBtitles.get_anime_titles(self.xmlPath)
+        self.assertEqual(titles.get_aid("Seikai no Monshou"), 1)
+        self.assertEqual(titles.get_aid("seikai no monshou!"), 1)
+        # the first anime with the title wins
+        self.assertEqual(titles.get_aid("Crest of the Stars"), 1)
+        self.assertEqual(titles.get_aid(u"3\xd73EYES"), 2)
+        self.assertEqual(titles.get_aid("Nothing"), 0)
+
+        self.assertEqual(titles.get_name(1), "Seikai no Monshou")
+        self.assertEqual(titles.get_name(1, False), "CotS")
+        self.assertEqual(titles.get_name(2, False), "3x3 Eyes")
+        self.assertEqual(titles.get_name(4), "")
+
+    def test_index(self):
+        titles = aniDBtitles.get_anime_titles(self.xmlPath)
+        self.assertTrue(os.path.isfile(self.indexPath))
+        self.assertTrue(aniDBtitles.get_anime_titles(self.xmlPath) is titles)
+
+        # a new process loads the index instead of parsing the xml
+        aniDBfileInfo._indexes.clear()
+        def fail(titles):
+            raise AssertionError("the xml was parsed again")
+        build = aniDBtitles._build_anime_titles
+        aniDBtitles._build_anime_titles = fail
+        try:
+            self.assertEqual(aniDBtitles.get_anime_titles(self.xmlPath).get_aid("CotS"), 1)
+        finally:
+            aniDBtitles._build_anime_titles = build
+
+    def test_xml_changed(self):
+        titles = aniDBtitles.get_anime_titles(self.xmlPath)
+        self._writeXML(TITLES_XML.replace("CotS", "Crest"), titles.mtime + 10)
+
+        titles = aniDBtitles.get_anime_titles(self.xmlPath)
+        self.assertEqual(titles.get_aid("Crest"), 1)
+        self.assertEqual(titles.get_aid("CotS"), 0)
+
+        aniDBfileInfo._indexes.clear()
+        self.assertEqual(aniDBtitles.get_anime_titles(self.xmlPath).get_aid("Crest"), 1)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - ANIDB TITLES TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(AnimeTitlesTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
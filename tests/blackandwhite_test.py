@@ -6,6 +6,7 @@ import sys, os.path
 sys.path.append(os.path.abspath('..'))
 sys.path.append(os.path.abspath('../lib'))
 
+from sickbeard import blackandwhitelist
 from sickbeard.blackandwhitelist import *
 from sickbeard.name_parser.parser import ParseResult
 
@@ -14,9 +15,11 @@ class BlackAndWhiteListTests(test.SickbeardTestDBCase):
 
     def setUp(self):
         super(BlackAndWhiteListTests, self).setUp()
+        blackandwhitelist._bwl_cache.clear()
     
     def tearDown(self):
         super(BlackAndWhiteListTests, self).tearDown()
+        blackandwhitelist._bwl_cache.clear()
         
     def test_insert(self):
         bwl = BlackAndWhiteList(1337)
@@ -133,6 +136,35 @@ class BlackAndWhiteListTests(test.SickbeardTestDBCase):
         result.name = result.original_name
         
         self.assertFalse(bwl.is_valid_for_black(result))
+
+    def test_keyword_characters(self):
+        bwl = BlackAndWhiteList(1337)
+        bwl.set_black_keywords_for("global", ["(1280x720", "h.264"])
+
+        result = ParseResult("[SGKK] Bleach - 326 (1280x720 h264 AAC) [3E33616B]",release_group="SGKK")
+        result.name = result.original_name
+        self.assertFalse(bwl.is_valid_for_black(result))
+
+        result.name = "[SGKK] Bleach - 326 (1920x1080 h264 AAC) [3E33616B]"
+        self.assertTrue(bwl.is_valid_for_black(result))
+
+    def test_cache(self):
+        bwl = get_black_and_white_list(1337)
+        self.assertTrue(get_black_and_white_list(1337) is bwl)
+        self.assertEqual(bwl.blackDict, {})
+
+        # changing the keywords through another object updates the cached list
+        BlackAndWhiteList(1337).set_black_keywords_for("global", ["taka"])
+        bwl = get_black_and_white_list(1337)
+        self.assertEqual(bwl.blackDict["global"], ["taka"])
+
+        result = ParseResult("[taka] Bleach - 326 (1280x720 h264 AAC) [3E33616B]",release_group="taka")
+        result.name = result.original_name
+        self.assertFalse(bwl.is_valid(result))
+
+        bwl.add_white_keyword("release_group", "SGKK")
+        self.assertFalse(get_black_and_white_list(1337).is_valid(result))
+        self.assertEqual(get_black_and_white_list(1337).whiteDict["release_group"], ["SGKK"])
         
     
 if __name__ == '__main__':
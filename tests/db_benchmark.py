@@ -0,0 +1,65 @@
+# coding=UTF-8
+# Measures how fast a 5,000 episode show import can be written to the database,
+# committing every statement (the old behaviour) versus one transaction.
+from __future__ import with_statement
+
+import time
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import test_lib as test
+
+NUM_EPISODES = 5000
+EPS_PER_SEASON = 25
+
+
+def _episodes():
+    for x in range(NUM_EPISODES):
+        yield ({"name": u"Episode %d" % x, "description": u"", "airdate": 733000 + x, "status": 3, "location": u""},
+               {"showid": 1, "season": x / EPS_PER_SEASON + 1, "episode": x % EPS_PER_SEASON + 1})
+
+
+def _report(label, commits, seconds):
+    print "%-32s %6d commits in %6.2fs  %8.1f episodes/sec  %8.1f commits/sec" % (label, commits, seconds, NUM_EPISODES / seconds, commits / seconds)
+
+
+def bench_autocommit(myDB):
+    # what upsert() used to do: an UPDATE and an INSERT, each committed on its own
+    genParams = lambda myDict: [x + " = ?" for x in myDict.keys()]
+    start = time.time()
+    for valueDict, keyDict in _episodes():
+        myDB.action("UPDATE tv_episodes SET " + ", ".join(genParams(valueDict)) + " WHERE " + " AND ".join(genParams(keyDict)), valueDict.values() + keyDict.values())
+        myDB.action("INSERT INTO tv_episodes (" + ", ".join(valueDict.keys() + keyDict.keys()) + ") VALUES (" + ", ".join(["?"] * len(valueDict.keys() + keyDict.keys())) + ")",
+                    valueDict.values() + keyDict.values())
+    _report("commit per statement", NUM_EPISODES * 2, time.time() - start)
+
+
+def bench_transaction(myDB):
+    start = time.time()
+    with myDB.transaction():
+        for valueDict, keyDict in _episodes():
+            myDB.upsert("tv_episodes", valueDict, keyDict)
+    _report("upsert in one transaction", 1, time.time() - start)
+
+
+def bench_mass_action(myDB):
+    start = time.time()
+    myDB.mass_action([["INSERT INTO tv_episodes (" + ", ".join(valueDict.keys() + keyDict.keys()) + ") VALUES (" + ", ".join(["?"] * len(valueDict.keys() + keyDict.keys())) + ")",
+                       valueDict.values() + keyDict.values()] for valueDict, keyDict in _episodes()])
+    _report("mass_action insert", 1, time.time() - start)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - DB BENCHMARK"
+    print "=================="
+    # keep the debug logging of every query out of the measurement
+    test.db.logger.log = lambda *args, **kwargs: None
+    for bench in (bench_autocommit, bench_transaction, bench_mass_action):
+        test.setUp_test_db()
+        try:
+            bench(test.db.DBConnection())
+        finally:
+            test.tearDown_test_db()
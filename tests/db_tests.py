@@ -1,5 +1,7 @@
 # coding=UTF-8
+from __future__ import with_statement
 import unittest
+import threading
 import test_lib as test
 
 import sys, os.path
@@ -17,11 +19,91 @@ class DBBasicTests(test.SickbeardTestDBCase):
     def test_select(self):
         self.db.select("SELECT * FROM tv_episodes WHERE showid = ? AND location != ''", [0000])
 
-    
+    def test_connection_pool(self):
+        # the same thread keeps using one connection, other threads get their own
+        self.assertTrue(self.db.connection is test.db.DBConnection().connection)
+
+        otherConnection = []
+        thread = threading.Thread(target=lambda: otherConnection.append(test.db.DBConnection().connection))
+        thread.start()
+        thread.join()
+        self.assertFalse(otherConnection[0] is self.db.connection)
+
+        self.assertEqual(self.db.select("PRAGMA journal_mode")[0][0], "wal")
+
+    def test_select_without_lock(self):
+        # readers must not wait for a writer holding the lock
+        with test.db.db_lock:
+            self.db.select("SELECT * FROM tv_episodes")
+
+    def test_mass_action(self):
+        self.db.mass_action([["INSERT INTO tv_episodes (showid, season, episode) VALUES (?,?,?)", [1, 1, x]] for x in range(1, 11)] +
+                            [["DELETE FROM tv_episodes WHERE episode > ?", [5]]])
+        self.assertEqual(len(self.db.select("SELECT * FROM tv_episodes WHERE showid = ?", [1])), 5)
+
+    def test_transaction_rollback(self):
+        try:
+            with self.db.transaction():
+                test.db.DBConnection().upsert("tv_episodes", {"name": "ep"}, {"showid": 1, "season": 1, "episode": 1})
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual(len(self.db.select("SELECT * FROM tv_episodes WHERE showid = ?", [1])), 0)
+
+        with self.db.transaction():
+            test.db.DBConnection().upsert("tv_episodes", {"name": "ep"}, {"showid": 1, "season": 1, "episode": 1})
+        self.assertEqual(len(self.db.select("SELECT * FROM tv_episodes WHERE showid = ?", [1])), 1)
+
+
+class DBQueryPlanTests(test.SickbeardTestDBCase):
+    """
+    Makes sure the hot queries keep using an index instead of scanning the whole table.
+    """
+
+    hot_queries = [
+        # TVEpisode.loadFromDB, TVShow.wantEpisode
+        ("SELECT * FROM tv_episodes WHERE showid = ? AND season = ? AND episode = ?", [1, 1, 1]),
+        ("SELECT status FROM tv_episodes WHERE showid = ? AND season = ? AND episode = ?", [1, 1, 1]),
+        # TVShow.getEpisode for anime
+        ("SELECT * FROM tv_episodes WHERE showid = ? and absolute_number = ? and season != 0", [1, 1]),
+        # RSSSearchQueueItem._changeMissingEpisodes
+        ("SELECT * FROM tv_episodes WHERE status = ? AND airdate < ?", [1, 734000]),
+        # WebInterface.comingEpisodes
+        ("SELECT * FROM tv_episodes WHERE season != 0 AND airdate >= ? AND airdate < ?", [734000, 734007]),
+        # PostProcessor._history_lookup
+        ("SELECT * FROM history WHERE resource >= ? COLLATE NOCASE AND resource < ? COLLATE NOCASE AND resource LIKE ?", ["show", "shox", "Show_Name_S01E02_Source_Quality_Etc_Group"]),
+    ]
+
+    def setUp(self):
+        super(DBQueryPlanTests, self).setUp()
+        self.db = test.db.DBConnection()
+
+    def test_hot_queries(self):
+        for query, args in self.hot_queries:
+            for row in self.db.select("EXPLAIN QUERY PLAN " + query, args):
+                self.assertTrue(row["detail"].startswith("SEARCH"), query + " -> " + row["detail"])
+
+    def test_upsert_replace(self):
+        self.assertTrue(frozenset(["showid", "season", "episode"]) in self.db._tableKeys("tv_episodes")[0])
+
+        valueDict = {"tvdbid": 1, "name": "ep", "description": "", "airdate": 1, "hasnfo": 0, "hastbn": 0, "status": 1, "location": "", "absolute_number": 1}
+        keyDict = {"showid": 1, "season": 1, "episode": 1}
+        self.db.upsert("tv_episodes", valueDict, keyDict)
+        valueDict["name"] = "new name"
+        self.db.upsert("tv_episodes", valueDict, keyDict)
+
+        sqlResults = self.db.select("SELECT name FROM tv_episodes WHERE showid = ?", [1])
+        self.assertEqual(len(sqlResults), 1)
+        self.assertEqual(sqlResults[0]["name"], "new name")
+
 if __name__ == '__main__':
     print "=================="
     print "STARTING - DB TESTS"
     print "=================="
     print "######################################################################"
     suite = unittest.TestLoader().loadTestsFromTestCase(DBBasicTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(DBQueryPlanTests)
     unittest.TextTestRunner(verbosity=2).run(suite)
\ No newline at end of file
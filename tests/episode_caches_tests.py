@@ -0,0 +1,139 @@
+# coding=UTF-8
+import datetime
+import unittest
+import test_lib as test
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import sickbeard
+from sickbeard import db, exceptions, episode_caches
+from sickbeard.show_stats import showStats
+from sickbeard.coming_episodes import comingEpisodes
+from sickbeard.tv import TVShow, TVEpisode
+from sickbeard.common import Quality, Overview, SKIPPED, WANTED, DOWNLOADED
+
+sickbeard.SYS_ENCODING = 'UTF-8'
+
+
+class DBOnlyEpisode(TVEpisode):
+    """An episode that is only loaded from the database, never from theTVDB
+    """
+    def loadFromTVDB(self, *args, **kwargs):
+        return False
+
+
+class EpisodeCachesTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(EpisodeCachesTests, self).setUp()
+        for cache in episode_caches.caches:
+            cache.reset()
+        self.shows = []
+        for tvdbid in (1, 2, 3, 4, 5):
+            show = TVShow(tvdbid, "en")
+            show.name = u"Show %d" % tvdbid
+            show.network = u"Network %d" % (tvdbid % 2)
+            show.quality = Quality.combineQualities([Quality.SDTV], [Quality.HDTV])
+            show.saveToDB()
+            self.shows.append(show)
+        sickbeard.showList = self.shows
+
+        # show 5 has no episodes
+        today = datetime.date.today().toordinal()
+        test.fill_test_episodes([x.tvdbid for x in self.shows[:4]], [1, today - 10, today - 2, today, today + 3, today + 20, today + 30],
+                                [u"", u"file.avi"])
+
+        # a show that only has episodes after the coming week
+        db.DBConnection().action("UPDATE tv_episodes SET airdate = ? WHERE showid = 4 AND airdate > 1 AND airdate < ?", [today + 20, today + 7])
+
+    def tearDown(self):
+        for cache in episode_caches.caches:
+            cache.reset()
+        sickbeard.showList = []
+        super(EpisodeCachesTests, self).tearDown()
+
+    def _check(self):
+        """Checks both caches against the queries the pages used to run
+        """
+        for show in sickbeard.showList:
+            counts = showStats.getCounts(show)
+            self.assertEqual((counts['downloaded'], counts['total']), test.legacy_show_counts(show.tvdbid))
+            self.assertEqual(counts['overview'], test.legacy_show_overview(show))
+
+        results = comingEpisodes.getEpisodes()
+        self.assertEqual(sorted((x["showid"], x["season"], x["episode"], x["name"], x["airdate"], x["status"], x["show_name"]) for x in results),
+                         test.legacy_coming_episodes())
+        return results
+
+    def test_show_stats(self):
+        self._check()
+        counts = showStats.getCounts(self.shows[4])
+        self.assertEqual((counts['downloaded'], counts['total'], counts['wanted']), (0, 0, 0))
+
+        show = self.shows[0]
+        episodes = showStats.getEpisodes(show, (Overview.WANTED, Overview.QUAL))
+        self.assertEqual(len(episodes), test.legacy_show_overview(show)[Overview.WANTED] + test.legacy_show_overview(show)[Overview.QUAL])
+        self.assertEqual(episodes, sorted(episodes, key=lambda x: x['season'] * 1000 + x['episode'], reverse=True))
+        for curEp in episodes:
+            self.assertTrue(curEp['overview'] in (Overview.WANTED, Overview.QUAL))
+
+        # quality changes are picked up without telling the cache
+        show.quality = Quality.combineQualities([Quality.SDTV], [])
+        self._check()
+
+    def test_coming_episodes(self):
+        results = self._check()
+        self.assertTrue([x for x in results if x["showid"] == 4])
+
+        self.assertEqual(results, sorted(results, key=lambda x: x["airdate"]))
+        results = comingEpisodes.getEpisodes('show')
+        self.assertEqual([x["show_name"] for x in results], sorted(x["show_name"] for x in results))
+        results = comingEpisodes.getEpisodes('network')
+        self.assertEqual([x["network"] for x in results], sorted(x["network"] for x in results))
+
+    def test_episode_changes(self):
+        self._check()
+
+        # saving and deleting episodes updates both caches
+        today = datetime.date.today()
+        ep = DBOnlyEpisode(self.shows[0], 1, 1)
+        ep.status = WANTED
+        ep.location = u""
+        ep.airdate = today + datetime.timedelta(days=1)
+        ep.saveToDB()
+        ep = DBOnlyEpisode(self.shows[0], 1, 2)
+        ep.status = Quality.compositeStatus(DOWNLOADED, Quality.HDTV)
+        ep.location = u"file.avi"
+        ep.airdate = today - datetime.timedelta(days=100)
+        ep.saveToDB()
+        self._check()
+
+        for episode in range(1, 11):
+            ep = DBOnlyEpisode(self.shows[1], 2, episode)
+            self.assertRaises(exceptions.EpisodeDeletedException, ep.deleteEpisode)
+        self._check()
+
+        # so do changes made with SQL once the show is reloaded
+        db.DBConnection().action("UPDATE tv_episodes SET status = ? WHERE showid = 3", [WANTED])
+        episode_caches.reloadShow(3)
+        self._check()
+        db.DBConnection().action("UPDATE tv_episodes SET status = ? WHERE showid = 1", [SKIPPED])
+        episode_caches.reloadShow(1)
+        self._check()
+
+        db.DBConnection().action("DELETE FROM tv_episodes WHERE showid = 4")
+        db.DBConnection().action("DELETE FROM tv_shows WHERE tvdb_id = 4")
+        episode_caches.removeShow(4)
+        sickbeard.showList = self.shows[:3] + self.shows[4:]
+        self._check()
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - EPISODE CACHES TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(EpisodeCachesTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -6,7 +6,8 @@ sys.path.append(os.path.abspath('..'))
 sys.path.append(os.path.abspath('../lib'))
 
 import sickbeard # we need to import this so we can override the SYS_ENCODING which is needed by the parser
-from sickbeard import helpers, scene_exceptions
+from sickbeard import helpers, scene_exceptions, classes
+from sickbeard.exceptions import MultipleShowObjectsException
 
 
 DEBUG = VERBOSE = False
@@ -18,6 +19,7 @@ sickbeard.SEASON_FOLDERS_DEFAULT = 0
 class DumyTVShow(object):
     name = ""
     tvdbid = 0
+    tvrid = 0
     
     def __init__(self, id, name, anime):
         self.name = name
@@ -59,6 +61,29 @@ def generator_get_tvdbid(show,sceneName,list):
 class HelperTests(unittest.TestCase):
     def setUP(self):
         pass
+
+    def test_show_list(self):
+        myShowList = classes.ShowList(showList)
+        self.assertEqual(len(myShowList), len(showList))
+        for show in showList:
+            self.assertTrue(helpers.findCertainShow(myShowList, show.tvdbid) is show)
+        self.assertEqual(helpers.findCertainShow(myShowList, 99), None)
+
+        # a show can only be in the list once
+        self.assertRaises(MultipleShowObjectsException, myShowList.append, DumyTVShow(1, "Other Show", False))
+
+        newShow = DumyTVShow(5, "New Show", False)
+        myShowList.append(newShow)
+        self.assertTrue(helpers.findCertainShow(myShowList, 5) is newShow)
+        self.assertEqual(helpers.findCertainTVRageShow(myShowList, 50), None)
+
+        newShow.tvrid = 50
+        myShowList.updateShow(newShow)
+        self.assertTrue(helpers.findCertainTVRageShow(myShowList, 50) is newShow)
+
+        myShowList.remove(newShow)
+        self.assertEqual(helpers.findCertainShow(myShowList, 5), None)
+        self.assertEqual(helpers.findCertainTVRageShow(myShowList, 50), None)
       
 for show in showList:
     sceneName = showDict[show.tvdbid][2]
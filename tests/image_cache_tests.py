@@ -0,0 +1,85 @@
+# coding=UTF-8
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import sickbeard
+from sickbeard import image_cache
+
+sickbeard.SYS_ENCODING = 'UTF-8'
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class ImageCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.oldCacheDir = sickbeard.CACHE_DIR
+        sickbeard.CACHE_DIR = tempfile.mkdtemp()
+        os.makedirs(os.path.join(sickbeard.CACHE_DIR, 'images'))
+        self.cache = image_cache.ImageCache()
+        self.bannerPath = self.cache.banner_path(1)
+
+    def tearDown(self):
+        shutil.rmtree(sickbeard.CACHE_DIR)
+        sickbeard.CACHE_DIR = self.oldCacheDir
+
+    def _writeImage(self, size, color):
+        Image.new('RGB', size, color).save(self.bannerPath, 'JPEG')
+
+    def test_thumbnail_path(self):
+        self.assertEqual(self.cache.thumbnail_path(self.bannerPath, (600, 112)),
+                         os.path.join(sickbeard.CACHE_DIR, 'images', '1.banner.600x112.jpg'))
+
+    def test_missing_image(self):
+        self.assertEqual(self.cache.get_thumbnail(self.bannerPath, (600, 112)), self.bannerPath)
+
+    @unittest.skipIf(Image != None, "PIL is installed")
+    def test_without_pil(self):
+        open(self.bannerPath, 'wb').write('not an image')
+        self.assertEqual(self.cache.get_thumbnail(self.bannerPath, (600, 112)), self.bannerPath)
+
+    @unittest.skipIf(Image == None, "PIL isn't installed")
+    def test_thumbnail(self):
+        self._writeImage((758, 140), 'red')
+        thumbPath = self.cache.get_thumbnail(self.bannerPath, (600, 112))
+        self.assertEqual(thumbPath, self.cache.thumbnail_path(self.bannerPath, (600, 112)))
+        width, height = Image.open(thumbPath).size
+        self.assertTrue(width == 600 and height <= 112)
+
+        # it's only made once
+        made = os.path.getmtime(thumbPath)
+        os.utime(thumbPath, (made, made))
+        self.assertEqual(self.cache.get_thumbnail(self.bannerPath, (600, 112)), thumbPath)
+
+        # and made again when the image changes
+        self._writeImage((379, 70), 'blue')
+        newTime = time.time() + 10
+        os.utime(self.bannerPath, (newTime, newTime))
+        self.assertEqual(self.cache.get_thumbnail(self.bannerPath, (600, 112)), thumbPath)
+        self.assertEqual(Image.open(thumbPath).size, (379, 70))
+        self.assertEqual(int(os.path.getmtime(thumbPath)), int(newTime))
+
+    @unittest.skipIf(Image == None, "PIL isn't installed")
+    def test_broken_image(self):
+        open(self.bannerPath, 'wb').write('not an image')
+        self.assertEqual(self.cache.get_thumbnail(self.bannerPath, (600, 112)), self.bannerPath)
+        self.assertFalse(os.path.exists(self.cache.thumbnail_path(self.bannerPath, (600, 112))))
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - IMAGE CACHE TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(ImageCacheTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,128 @@
+# coding=UTF-8
+# Measures how many messages per second callers can hand to the logger when it writes
+# to the log file itself versus through the writer thread, and how much of an RSS
+# cache update is spent in the logger.
+import cProfile
+import pstats
+import shutil
+import time
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import test_lib as test
+
+import sickbeard
+from sickbeard import db, logger, name_cache, tvcache
+from sickbeard.databases import cache_db
+
+sickbeard.SYS_ENCODING = 'UTF-8'
+
+NUM_MESSAGES = 50000
+NUM_ITEMS = 2000
+
+LOG_DIR = os.path.join(test.TESTDIR, "Logs")
+
+shows = ['Mythbusters', 'The Big Bang Theory', 'Law and Order SVU', 'Doctor Who 2005', 'Top Gear']
+
+
+class DummyProvider(object):
+    name = 'Dummy'
+
+    def getID(self):
+        return 'dummy'
+
+
+class DummyShow(object):
+    def __init__(self, tvdbid, name):
+        self.tvdbid = tvdbid
+        self.tvrid = 0
+        self.tvrname = None
+        self.name = name
+        self.lang = 'en'
+        self.is_anime = False
+
+
+class DummyCache(tvcache.TVCache):
+
+    def __init__(self, provider):
+        tvcache.TVCache.__init__(self, provider)
+        self.minTime = 0
+
+    def _getDB(self):
+        return db.DBConnection("cache.db")
+
+    def _getRSSData(self):
+        items = []
+        for x in range(NUM_ITEMS):
+            title = '%s.S%02dE%02d.720p.HDTV.x264-Group' % (shows[x % len(shows)].replace(' ', '.'), x / 100 + 1, x % 100)
+            items.append('<item><title>%s</title><link>http://example.com/%d</link></item>' % (title, x))
+        return '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>Test</title>%s</channel></rss>' % "".join(items)
+
+
+def _handler(useWriter, debugLogging=True):
+    handler = logger.SBRotatingLogHandler('sickbeard.log', logger.NUM_LOGS, logger.LOG_SIZE)
+    handler.initLogging(consoleLogging=False, debugLogging=debugLogging)
+    if not useWriter:
+        # what the logger used to do, write the message before returning
+        handler.close()
+        handler._open_log()
+    return handler
+
+
+def bench_callers(label, useWriter, debugLogging=True):
+    handler = _handler(useWriter, debugLogging)
+    start = time.time()
+    for x in range(NUM_MESSAGES):
+        handler.log(u"Checking if we want episode %sx%s at quality %s", logger.DEBUG, (x / 100, x % 100, "HD TV"))
+    seconds = time.time() - start
+    handler.close()
+    print "%-24s %6d messages in %6.3fs  %10.1f messages/sec" % (label, NUM_MESSAGES, seconds, NUM_MESSAGES / seconds)
+
+
+def bench_rss(label, useWriter, debugLogging=True):
+    test.setUp_test_db()
+    cacheDB = db.DBConnection("cache.db")
+    db.upgradeDatabase(cacheDB, cache_db.InitialSchema)
+    cacheDB.action("CREATE TABLE dummy (name TEXT, season NUMERIC, episodes TEXT, tvrid NUMERIC, tvdbid NUMERIC, url TEXT, time NUMERIC, quality TEXT)")
+
+    sickbeard.showList = [DummyShow(x + 1, name) for (x, name) in enumerate(shows)]
+    name_cache.resolver.reset()
+    for curShow in sickbeard.showList:
+        name_cache.addNameToCache(curShow.name, curShow.tvdbid)
+
+    logger.sb_log_instance = _handler(useWriter, debugLogging)
+    profile = cProfile.Profile()
+    try:
+        start = time.time()
+        profile.runcall(DummyCache(DummyProvider()).updateCache)
+        seconds = time.time() - start
+    finally:
+        logger.sb_log_instance.close()
+        test.tearDown_test_db()
+        if os.path.exists(os.path.join(test.TESTDIR, "cache.db")):
+            os.remove(os.path.join(test.TESTDIR, "cache.db"))
+
+    stats = pstats.Stats(profile)
+    total = sum(x[2] for x in stats.stats.values())
+    inLogger = sum(stats.stats[x][2] for x in stats.stats if x[0].endswith("logger.py"))
+    print "%-24s %6d items in %6.3fs  %5.1f%% of the time in the logger" % (label, NUM_ITEMS, seconds, 100 * inLogger / total)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - LOGGER BENCHMARK"
+    print "=================="
+    if not os.path.isdir(LOG_DIR):
+        os.makedirs(LOG_DIR)
+    sickbeard.LOG_DIR = LOG_DIR
+    try:
+        bench_callers("written by the caller", False)
+        bench_callers("writer thread", True)
+        bench_callers("debug logging off", True, False)
+        bench_rss("rss, written by caller", False)
+        bench_rss("rss, writer thread", True)
+        bench_rss("rss, debug logging off", True, False)
+    finally:
+        shutil.rmtree(LOG_DIR)
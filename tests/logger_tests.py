@@ -0,0 +1,216 @@
+# coding=UTF-8
+import re
+import shutil
+import threading
+import time
+import unittest
+import test_lib as test
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import sickbeard
+from sickbeard import logger
+
+sickbeard.SYS_ENCODING = 'UTF-8'
+
+# the regex the log viewer reads the log with
+LOG_REGEX = "^(\w{3})\-(\d\d)\s*(\d\d)\:(\d\d):(\d\d)\s*([A-Z]+)\s*(.+?)\s*\:\:\s*(.*)$"
+
+
+class CountingArg(object):
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "arg"
+
+
+class LoggerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.logDir = os.path.join(test.TESTDIR, "Logs")
+        if not os.path.isdir(self.logDir):
+            os.makedirs(self.logDir)
+        self._LOG_DIR = sickbeard.LOG_DIR
+        self._LOG_QUEUE_SIZE = logger.LOG_QUEUE_SIZE
+        self._LOG_BATCH_SIZE = logger.LOG_BATCH_SIZE
+        self._LOG_READ_BLOCK_SIZE = logger.LOG_READ_BLOCK_SIZE
+        sickbeard.LOG_DIR = self.logDir
+        self.handler = logger.SBRotatingLogHandler('test.log', 3, 1000000)
+
+    def tearDown(self):
+        self.handler.close()
+        sickbeard.LOG_DIR = self._LOG_DIR
+        logger.LOG_QUEUE_SIZE = self._LOG_QUEUE_SIZE
+        logger.LOG_BATCH_SIZE = self._LOG_BATCH_SIZE
+        logger.LOG_READ_BLOCK_SIZE = self._LOG_READ_BLOCK_SIZE
+        shutil.rmtree(self.logDir)
+
+    def _lines(self, i=0):
+        f = open(self.handler._log_file_name(i))
+        try:
+            return [x.decode('utf-8') for x in f.readlines()]
+        finally:
+            f.close()
+
+    def test_format(self):
+        self.handler.initLogging(consoleLogging=False)
+        self.handler.log(u"Found %s in %s", logger.MESSAGE, (u"Show Näme", 5))
+        self.handler.log("Byte string \xc3\xa4", logger.DEBUG)
+        self.handler.log(u"100% done", logger.WARNING)
+        self.handler.log(u"Missing %d", logger.ERROR, ("five",))
+        self.handler.close()
+
+        lines = self._lines()
+        self.assertEqual(len(lines), 4)
+        matches = [re.match(LOG_REGEX, x) for x in lines]
+        self.assertEqual([x.group(6) for x in matches], ['INFO', 'DEBUG', 'WARNING', 'ERROR'])
+        self.assertEqual([x.group(8) for x in matches], [u"Found Show Näme in 5", u"Byte string ä", u"100% done", u"Missing %d ('five',)"])
+        self.assertEqual(matches[0].group(7), 'MainThread')
+
+    def test_level(self):
+        self.handler.initLogging(consoleLogging=False, debugLogging=False)
+        self.assertFalse(self.handler.log_level <= logger.DEBUG)
+
+        arg = CountingArg()
+        self.handler.log(u"Debug %s", logger.DEBUG, (arg,))
+        self.handler.log(u"Message %s", logger.MESSAGE, (arg,))
+        self.handler.close()
+
+        # the debug message was never formatted
+        self.assertEqual(arg.formatted, 1)
+        self.assertEqual(len(self._lines()), 1)
+
+    def test_rotation(self):
+        # the size is checked after every batch
+        logger.LOG_BATCH_SIZE = 5
+        self.handler.num_bytes = 1000
+        self.handler.initLogging(consoleLogging=False)
+        for x in range(200):
+            self.handler.log(u"Line number %d", logger.MESSAGE, (x,))
+        self.handler.close()
+
+        self.assertFalse(os.path.isfile(self.handler._log_file_name(4)))
+        self.assertTrue(os.path.isfile(self.handler._log_file_name(3)))
+        lastLines = self._lines(0) or self._lines(1)
+        self.assertTrue(lastLines[-1].endswith(u"Line number 199\n"))
+
+    def test_full_queue(self):
+        logger.LOG_QUEUE_SIZE = 10
+        self.handler.initLogging(consoleLogging=False)
+
+        # while the writer is stuck the callers carry on
+        self.handler.log_lock.acquire()
+        try:
+            start = time.time()
+            for x in range(100):
+                self.handler.log(u"Line number %d", logger.MESSAGE, (x,))
+            self.assertTrue(time.time() - start < 1)
+            self.assertTrue(self.handler.dropped > 0)
+        finally:
+            self.handler.log_lock.release()
+        self.handler.close()
+
+        lines = self._lines()
+        self.assertTrue(len(lines) < 100)
+        self.assertTrue([x for x in lines if "messages were dropped" in x])
+
+    def test_full_queue_warnings(self):
+        logger.LOG_QUEUE_SIZE = 10
+        self.handler.initLogging(consoleLogging=False)
+
+        def logMessages():
+            for x in range(20):
+                self.handler.log(u"Line number %d", logger.MESSAGE, (x,))
+            for x in range(5):
+                self.handler.log(u"Warning number %d", logger.WARNING, (x,))
+
+        # the warnings wait for the writer instead of being dropped
+        self.handler.log_lock.acquire()
+        try:
+            caller = threading.Thread(target=logMessages)
+            caller.start()
+            time.sleep(0.2)
+            self.assertTrue(caller.isAlive())
+        finally:
+            self.handler.log_lock.release()
+        caller.join()
+        self.handler.close()
+
+        lines = self._lines()
+        self.assertEqual(len([x for x in lines if "Warning number" in x]), 5)
+        self.assertTrue([x for x in lines if "messages were dropped" in x])
+
+    def test_read_log(self):
+        logger.LOG_BATCH_SIZE = 5
+        logger.LOG_READ_BLOCK_SIZE = 100
+        self.handler.num_bytes = 2000
+        self.handler.initLogging(consoleLogging=False)
+        for x in range(100):
+            self.handler.log(u"Line number %d", logger.DEBUG if x % 2 else logger.MESSAGE, (x,))
+        self.handler.log(u"Traceback:\n  line one\n  line twö", logger.ERROR)
+        self.handler.log(u"Last one", logger.DEBUG)
+        self.handler.close()
+
+        # the newest messages come first, a message's lines stay in order
+        messages, offset = self.handler.read_log(logger.MESSAGE, 10)
+        self.assertEqual(len(messages), 8)
+        self.assertTrue(messages[0].endswith(u"Traceback:\n  line one\n  line twö\n"))
+        self.assertTrue(messages[1].endswith(u"Line number 98\n"))
+        self.assertTrue(messages[-1].endswith(u"Line number 86\n"))
+        self.assertEqual(offset, os.path.getsize(self.handler._log_file_name(0)))
+
+        # older messages are read from the rotated logs
+        self.assertTrue(os.path.isfile(self.handler._log_file_name(1)))
+        messages, offset = self.handler.read_log(logger.DEBUG, 1000)
+        self.assertEqual(messages[0], [x for x in self._lines() if x.endswith(u"Last one\n")][0])
+        numbers = [int(re.match(LOG_REGEX, x).group(8).split()[-1]) for x in messages[2:]]
+        self.assertEqual(numbers, range(99, 99 - len(numbers), -1))
+        self.assertTrue(len(self._lines(0)) < len(messages))
+
+    def test_read_log_since(self):
+        self.handler.initLogging(consoleLogging=False)
+        self.handler.log(u"Before", logger.MESSAGE)
+        self.handler.close()
+        messages, offset = self.handler.read_log()
+        self.assertEqual(len(messages), 1)
+
+        self.handler.initLogging(consoleLogging=False)
+        self.handler.log(u"Debug", logger.DEBUG)
+        self.handler.log(u"After\nmore", logger.MESSAGE)
+        self.handler.close()
+
+        messages, offset = self.handler.read_log_since(offset)
+        self.assertEqual(len(messages), 1)
+        self.assertTrue(messages[0].endswith(u"After\nmore\n"))
+        self.assertEqual(offset, os.path.getsize(self.handler._log_file_name(0)))
+        self.assertEqual(self.handler.read_log_since(offset), ([], offset))
+
+        # a line that's still being written is left for later
+        f = open(self.handler._log_file_name(0), 'a')
+        f.write(self._lines()[0].encode('utf-8')[:20])
+        f.close()
+        self.assertEqual(self.handler.read_log_since(offset), ([], offset))
+
+        # after a rotation it starts over
+        self.assertEqual(len(self.handler.read_log_since(offset + 1000, logger.DEBUG)[0]), 3)
+
+    def test_before_init(self):
+        # until logging is set up only errors are looked at, they still make it to the UI
+        self.assertEqual(self.handler.log_level, logger.ERROR)
+        self.handler.log(u"Not written anywhere", logger.MESSAGE)
+        self.handler.log(u"Broken %s", logger.ERROR, ("thing",))
+        self.assertEqual(logger.classes.ErrorViewer.errors[-1].message, u"MainThread :: Broken thing")
+        self.assertFalse(os.path.isfile(self.handler._log_file_name(0)))
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - LOGGER TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(LoggerTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
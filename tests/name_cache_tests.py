@@ -0,0 +1,99 @@
+# coding=UTF-8
+import unittest
+import test_lib as test
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import sickbeard
+from sickbeard import db, helpers, name_cache, scene_exceptions
+from sickbeard.databases import cache_db
+
+
+class DummyShow(object):
+    def __init__(self, tvdbid, name):
+        self.tvdbid = tvdbid
+        self.name = name
+
+
+class NameResolverTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(NameResolverTests, self).setUp()
+        db.upgradeDatabase(db.DBConnection("cache.db"), cache_db.InitialSchema)
+        self.cacheDB = db.DBConnection("cache.db")
+        self.cacheDB.action("INSERT INTO scene_exceptions (tvdb_id, show_name) VALUES (?,?)", [2, 'IS'])
+        self.cacheDB.action("INSERT INTO scene_exceptions (tvdb_id, show_name) VALUES (?,?)", [70726, 'Babylon 5'])
+
+        sickbeard.showList = [DummyShow(1, "Dance in the Vampire Bund"), DummyShow(2, "Infinite Stratos")]
+        name_cache.resolver.reset()
+
+    def tearDown(self):
+        name_cache.resolver.reset()
+        super(NameResolverTests, self).tearDown()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(os.path.join(test.TESTDIR, "cache.db" + suffix)):
+                os.remove(os.path.join(test.TESTDIR, "cache.db" + suffix))
+
+    def test_show_names(self):
+        self.assertEqual(helpers.get_tvdbid("Dance.in.the.Vampire.Bund", sickbeard.showList), 1)
+        self.assertEqual(helpers.get_tvdbid("dance in the vampire bund", sickbeard.showList), 1)
+        self.assertEqual(helpers.get_tvdbid("IS", sickbeard.showList), 2)
+        # exceptions of shows we don't have don't count
+        self.assertEqual(helpers.get_tvdbid("Babylon 5", sickbeard.showList), 0)
+
+    def test_show_changes(self):
+        self.assertEqual(helpers.get_tvdbid("Infinite Stratos", sickbeard.showList), 2)
+
+        newShow = DummyShow(3, "Blue Exorcist")
+        sickbeard.showList.append(newShow)
+        self.assertEqual(helpers.get_tvdbid("Blue Exorcist", sickbeard.showList), 0)
+        name_cache.resolver.addShow(newShow)
+        self.assertEqual(helpers.get_tvdbid("Blue Exorcist", sickbeard.showList), 3)
+
+        newShow.name = "Ao no Exorcist"
+        name_cache.resolver.updateShow(newShow)
+        self.assertEqual(helpers.get_tvdbid("Blue Exorcist", sickbeard.showList), 0)
+        self.assertEqual(helpers.get_tvdbid("Ao no Exorcist", sickbeard.showList), 3)
+
+        name_cache.resolver.removeShow(3)
+        self.assertEqual(helpers.get_tvdbid("Ao no Exorcist", sickbeard.showList), 0)
+
+    def test_scene_exception_by_name(self):
+        self.assertEqual(scene_exceptions.get_scene_exception_by_name('Babylon.5'), 70726)
+        self.assertEqual(scene_exceptions.get_scene_exception_by_name('babylon 5'), 70726)
+        self.assertEqual(scene_exceptions.get_scene_exception_by_name('nothing useful'), None)
+
+        name_cache.resolver.addExceptions([(1, 'Vampire Bund')])
+        self.assertEqual(scene_exceptions.get_scene_exception_by_name('Vampire Bund'), 1)
+        self.assertEqual(helpers.get_tvdbid("Vampire.Bund", sickbeard.showList), 1)
+
+    def test_name_cache(self):
+        name_cache.addNameToCache('Cached Name', 5)
+        name_cache.addNameToCache('Unknown Name', None)
+        self.assertEqual(name_cache.retrieveNameFromCache('Cached.Name'), 5)
+        self.assertEqual(name_cache.retrieveNameFromCache('Unknown Name'), 0)
+        self.assertEqual(name_cache.retrieveNameFromCache('Never Seen'), None)
+
+        # the names are only written to the db in batches
+        self.assertEqual(len(self.cacheDB.select("SELECT * FROM scene_names")), 0)
+        name_cache.flushCache()
+        self.assertEqual(len(self.cacheDB.select("SELECT * FROM scene_names")), 2)
+
+        name_cache.clearCache()
+        self.assertEqual(name_cache.retrieveNameFromCache('Unknown Name'), None)
+        self.assertEqual(len(self.cacheDB.select("SELECT * FROM scene_names")), 1)
+
+        # a fresh index is built from the db
+        name_cache.resolver.reset()
+        self.assertEqual(name_cache.retrieveNameFromCache('Cached Name'), 5)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - NAME CACHE TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(NameResolverTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
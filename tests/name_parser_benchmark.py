@@ -0,0 +1,109 @@
+# coding=UTF-8
+# Measures how many release names per second the NameParser gets through, creating a
+# parser for every name like the search code does, with and without the parse cache,
+# and with and without the regex prefilter over a large synthetic corpus.
+import random
+import time
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import sickbeard
+sickbeard.SYS_ENCODING = 'UTF-8'
+
+from sickbeard.name_parser import parser
+
+NUM_PASSES = 5
+CORPUS_SIZE = 20000
+
+names = ['Show.Name.S01E02.Source.Quality.Etc-Group',
+         'Show Name - S06E01 - 2009-12-20 - Ep Name',
+         'Show_Name.1x02.Source_Quality_Etc-Group',
+         'Show.Name.2010.11.23.Source.Quality.Etc-Group',
+         'Show.Name.Season.2.Source.Quality.Etc-Group',
+         'Show.Name.102.Source.Quality.Etc-Group',
+         '[SGKK] Bleach - 312v2 (1280x720 h264 AAC) [F501C9BE]',
+         '[Ayako]_Infinite_Stratos_-_IS_-_07_[H264][720p][EB7838FC]',
+         'Not.A.Release.Name.At.All',
+         'Show.Name.S01E02E03.720p.HDTV.x264-Group.mkv']
+
+shows = ['Mythbusters', 'The Big Bang Theory', 'Law and Order SVU', 'Doctor Who 2005', 'Bleach',
+         'Naruto Shippuuden', 'Infinite Stratos', 'How I Met Your Mother', 'The Daily Show', 'Top Gear']
+qualities = ['720p.HDTV.x264', 'HDTV.XviD', '1080p.BluRay.x264', 'WEB-DL.AAC2.0.H.264', 'DVDRip.XviD', 'PROPER.HDTV.x264']
+groups = ['LOL', 'DIMENSION', 'aAF', 'FQM', 'CtrlHD', 'SiNNERS']
+formats = [lambda s, se, ep, q, g: '%s.S%02dE%02d.%s-%s' % (s, se, ep, q, g),
+           lambda s, se, ep, q, g: '%s.S%02dE%02dE%02d.%s-%s' % (s, se, ep, ep + 1, q, g),
+           lambda s, se, ep, q, g: '%s - %dx%02d - Episode Name' % (s, se, ep),
+           lambda s, se, ep, q, g: '%s.%d%02d.%s-%s' % (s, se, ep, q, g),
+           lambda s, se, ep, q, g: '%s.2011.%02d.%02d.%s-%s' % (s, se, ep, q, g),
+           lambda s, se, ep, q, g: '%s.S%02d.%s-%s' % (s, se, q, g),
+           lambda s, se, ep, q, g: '%s Season %d Episode %d %s' % (s, se, ep, q),
+           lambda s, se, ep, q, g: '[%s] %s - %03d [720p][ABCD1234]' % (g, s, se * 10 + ep),
+           lambda s, se, ep, q, g: '[%s]_%s_-_%02d_(1280x720_H.264_AAC)_[379759DB]' % (g, s, ep),
+           lambda s, se, ep, q, g: '%s - s%02de%02d - %03d' % (s, se, ep, se * 10 + ep),
+           lambda s, se, ep, q, g: '%s.Part.%d.%s-%s' % (s, ep, q, g),
+           lambda s, se, ep, q, g: '%s.Behind.The.Scenes.%s-%s' % (s, q, g),
+           ]
+
+
+def make_corpus():
+    rand = random.Random(0)
+    corpus = []
+    for x in range(CORPUS_SIZE):
+        show = rand.choice(shows).replace(' ', rand.choice(['.', ' ', '_']))
+        corpus.append(rand.choice(formats)(show, rand.randint(1, 12), rand.randint(1, 24), rand.choice(qualities), rand.choice(groups)))
+    return corpus
+
+
+def _parse(np, name):
+    try:
+        return np._parse_string(name)
+    except parser.InvalidNameException:
+        return None
+
+
+def bench(label, clear_cache):
+    count = 0
+    start = time.time()
+    for x in range(NUM_PASSES):
+        for name in names:
+            if clear_cache:
+                parser.name_parser_cache.clear()
+            for mode in (parser.NameParser.ANIME_REGEX, parser.NameParser.NORMAL_REGEX):
+                try:
+                    parser.NameParser(regexMode=mode).parse(name)
+                except parser.InvalidNameException:
+                    pass
+                count += 1
+    seconds = time.time() - start
+    print "%-24s %6d names in %6.3fs  %10.1f names/sec" % (label, count, seconds, count / seconds)
+
+
+def bench_engine(label, corpus, usePrefilter):
+    results = []
+    start = time.time()
+    for mode in (parser.NameParser.ANIME_REGEX, parser.NameParser.NORMAL_REGEX):
+        np = parser.NameParser(False, mode, usePrefilter)
+        for name in corpus:
+            results.append(_parse(np, name))
+    seconds = time.time() - start
+    print "%-24s %6d names in %6.3fs  %10.1f names/sec" % (label, len(results), seconds, len(results) / seconds)
+    return results
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - NAME PARSER BENCHMARK"
+    print "=================="
+    # keep the debug logging out of the measurement
+    parser.logger.log = lambda *args, **kwargs: None
+    bench("uncached", True)
+    bench("cached", False)
+
+    corpus = make_corpus()
+    slow = bench_engine("every regex", corpus, False)
+    fast = bench_engine("prefiltered", corpus, True)
+    for (slow_result, fast_result) in zip(slow, fast):
+        if not slow_result == fast_result or (slow_result and slow_result.which_regex != fast_result.which_regex):
+            print "MISMATCH:", slow_result, fast_result
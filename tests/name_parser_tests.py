@@ -399,6 +399,83 @@ class BasicTests(unittest.TestCase):
     def test_combination_names(self):
         pass
 
+class PrefilterTests(unittest.TestCase):
+
+    def _all_names(self):
+        for cur_cases in simple_test_cases.values():
+            for cur_name in cur_cases:
+                yield cur_name
+                yield cur_name + '.avi'
+        for (name, result, which_regexes) in combination_test_cases:
+            yield name
+        for (name, result) in unicode_test_cases:
+            yield name
+
+    def test_same_results(self):
+        for mode in (parser.NameParser.ALL_REGEX, parser.NameParser.NORMAL_REGEX, parser.NameParser.ANIME_REGEX):
+            fast = parser.NameParser(False, mode)
+            slow = parser.NameParser(False, mode, usePrefilter=False)
+            for name in self._all_names():
+                try:
+                    fast_result = fast._parse_string(name)
+                except parser.InvalidNameException:
+                    self.assertRaises(parser.InvalidNameException, slow._parse_string, name)
+                    continue
+                slow_result = slow._parse_string(name)
+                self.assertEqual(fast_result, slow_result, name)
+                if fast_result:
+                    self.assertEqual(fast_result.which_regex, slow_result.which_regex, name)
+
+
+class CacheTests(unittest.TestCase):
+
+    def setUp(self):
+        parser.name_parser_cache.clear()
+
+    def test_shared_regexes(self):
+        self.assertTrue(parser.NameParser().compiled_regexes is parser.NameParser(False).compiled_regexes)
+        self.assertFalse(parser.NameParser().compiled_regexes is parser.NameParser(regexMode=parser.NameParser.ANIME_REGEX).compiled_regexes)
+
+    def test_cached_results(self):
+        np = parser.NameParser()
+        result = np.parse('Show.Name.S01E02.Source.Quality.Etc-Group')
+        result.episode_numbers.append(3)
+        result.series_name = 'Changed'
+
+        # changing a result must not change what the next caller gets
+        cached = np.parse('Show.Name.S01E02.Source.Quality.Etc-Group')
+        self.assertEqual(cached, parser.ParseResult(None, 'Show Name', 1, [2], 'Source.Quality.Etc', 'Group'))
+        self.assertEqual(cached.which_regex, ['standard'])
+
+        # the file_name flag gives a different result for names with an extension
+        self.assertEqual(parser.NameParser(True).parse('Show.Name.S01E02.avi').extra_info, None)
+        self.assertEqual(parser.NameParser(False).parse('Show.Name.S01E02.avi').extra_info, 'avi')
+
+    def test_cached_failures(self):
+        np = parser.NameParser()
+        self.assertRaises(parser.InvalidNameException, np.parse, 'Nothing to see here')
+        self.assertRaises(parser.InvalidNameException, np.parse, 'Nothing to see here')
+
+    def test_cache_size(self):
+        cache = parser.NameParserCache(2)
+        cache.add('a', 1)
+        cache.add('b', 2)
+        cache.get('a')
+        cache.add('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('c'), 3)
+
+        # looking the same names up over and over doesn't lose track of which was used last
+        for x in range(10):
+            cache.get('a')
+        cache.get('c')
+        cache.add('d', 4)
+        self.assertEqual(cache.get('a'), None)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.get('d'), 4)
+
+
 if __name__ == '__main__':
     if len(sys.argv) > 1:
         suite = unittest.TestLoader().loadTestsFromName('name_parser_tests.BasicTests.test_'+sys.argv[1])
@@ -411,3 +488,9 @@ if __name__ == '__main__':
 
     suite = unittest.TestLoader().loadTestsFromTestCase(UnicodeTests)
     unittest.TextTestRunner(verbosity=2).run(suite)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(PrefilterTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(CacheTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
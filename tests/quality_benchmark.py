@@ -0,0 +1,80 @@
+# coding=UTF-8
+# Measures how many release names per second Quality.nameQuality classifies over the names in
+# quality_golden.txt, compared to the rules it had before the QualityClassifier which compiled
+# and searched every pattern again for every name.
+import re
+import time
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+from sickbeard.common import Quality
+from quality_tests import load_golden
+
+NUM_PASSES = 5
+
+
+def legacy_nameQuality(name, anime=False):
+    name = os.path.basename(name)
+    for x in Quality.qualityStrings:
+        if x == Quality.UNKNOWN:
+            continue
+        if re.search('\W'+Quality.qualityStrings[x].replace(' ','\W')+'\W', name, re.I):
+            return x
+
+    checkName = lambda list, func: func([re.search(x, name, re.I) for x in list])
+    if not anime:
+        if checkName(["pdtv.xvid", "hdtv.xvid", "dsr.xvid"], any) and not checkName(["720p"], all):
+            return Quality.SDTV
+        elif checkName(["dvdrip.xvid", "bdrip.xvid", "dvdrip.divx", "dvdrip.ws.xvid"], any) and not checkName(["720p"], all):
+            return Quality.SDDVD
+        elif checkName(["720p", "hdtv", "x264"], all) or checkName(["hr.ws.pdtv.x264"], any):
+            return Quality.HDTV
+        elif checkName(["720p", "web.dl"], all) or checkName(["720p", "itunes", "h.?264"], all):
+            return Quality.HDWEBDL
+        elif checkName(["720p", "bluray", "x264"], all) or checkName(["720p", "hddvd", "x264"], all):
+            return Quality.HDBLURAY
+        elif checkName(["1080p", "bluray", "x264"], all) or checkName(["1080p", "hddvd", "x264"], all):
+            return Quality.FULLHDBLURAY
+        else:
+            return Quality.UNKNOWN
+
+    blueRayOptions = checkName(["bluray","blu-ray"],any)
+    hdOptions = checkName(["720p","1280x720"], any)
+    if checkName(["360p","XviD"], any):
+        return Quality.SDTV
+    elif checkName(["dvd","480p","848x480"], any):
+        return Quality.SDDVD
+    elif hdOptions and not blueRayOptions:
+        return Quality.HDTV
+    elif blueRayOptions and hdOptions:
+        return Quality.HDBLURAY
+    elif blueRayOptions and checkName(["1080p", "1920x1080"],any):
+        return Quality.FULLHDBLURAY
+    else:
+        return Quality.assumeQuality(name)
+
+
+def bench(label, func, names):
+    results = []
+    start = time.time()
+    for x in range(NUM_PASSES):
+        for name in names:
+            results.append((func(name), func(name, True)))
+    seconds = time.time() - start
+    count = len(results) * 2
+    print "%-24s %6d names in %6.3fs  %10.1f names/sec" % (label, count, seconds, count / seconds)
+    return results
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - QUALITY BENCHMARK"
+    print "=================="
+    names = [x[0] for x in load_golden()]
+    slow = bench("legacy", legacy_nameQuality, names)
+    fast = bench("classifier", Quality.nameQuality, names)
+    for (name, slow_result, fast_result) in zip(names * NUM_PASSES, slow, fast):
+        if slow_result != fast_result:
+            print "MISMATCH:", name, slow_result, fast_result
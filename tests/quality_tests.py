@@ -0,0 +1,51 @@
+# coding=UTF-8
+import unittest
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+from sickbeard.common import Quality, QualityClassifier
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quality_golden.txt')
+
+
+def load_golden():
+    golden = []
+    for line in open(GOLDEN_FILE):
+        line = line.rstrip('\r\n')
+        if not line or line.startswith('#'):
+            continue
+        (name, normal, anime) = line.split('\t')
+        try:
+            name.decode('ascii')
+        except UnicodeDecodeError:
+            name = name.decode('utf-8')
+        golden.append((name, int(normal), int(anime)))
+    return golden
+
+
+class QualityTests(unittest.TestCase):
+
+    def test_golden(self):
+        golden = load_golden()
+        self.assertTrue(len(golden) > 1000)
+        for (name, normal, anime) in golden:
+            self.assertEqual(Quality.nameQuality(name), normal, name)
+            self.assertEqual(Quality.nameQuality(name, True), anime, name)
+
+    def test_separate_classifiers(self):
+        classifier = QualityClassifier()
+        self.assertEqual(classifier.nameQuality('Show.Name.S01E02.720p.HDTV.x264-Group'), Quality.HDTV)
+        self.assertEqual(classifier.nameQuality('Show.Name.S01E02.HDTV.XviD-Group'), Quality.SDTV)
+        self.assertEqual(classifier.nameQuality('[Group] Show Name - 01 [1280x720 Blu-ray FLAC]', True), Quality.HDBLURAY)
+        self.assertEqual(classifier.nameQuality('[Group] Show Name - 01.mkv', True), Quality.HDTV)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - QUALITY TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(QualityTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
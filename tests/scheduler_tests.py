@@ -0,0 +1,116 @@
+# coding=UTF-8
+import datetime
+import threading
+import time
+import unittest
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import sickbeard
+from sickbeard import generic_queue, scheduler
+
+sickbeard.SYS_ENCODING = 'UTF-8'
+
+
+class DummyAction(object):
+    def __init__(self):
+        self.amActive = False
+        self.runs = 0
+        self.ran = threading.Event()
+
+    def run(self):
+        self.runs += 1
+        self.ran.set()
+
+
+class DummyQueueItem(generic_queue.QueueItem):
+    def __init__(self, name, priority, done):
+        generic_queue.QueueItem.__init__(self, name)
+        self.priority = priority
+        self.done = done
+
+    def execute(self):
+        generic_queue.QueueItem.execute(self)
+        self.done.append(self.name)
+
+
+class SchedulerTests(unittest.TestCase):
+
+    def _waitFor(self, check, timeout=2):
+        end = time.time() + timeout
+        while not check() and time.time() < end:
+            time.sleep(0.01)
+        return check()
+
+    def _stop(self, sched):
+        thread = sched.thread
+        sched.abort = True
+        thread.join(2)
+        self.assertFalse(thread.isAlive())
+
+    def test_run_and_force(self):
+        action = DummyAction()
+        sched = scheduler.Scheduler(action, cycleTime=datetime.timedelta(hours=1), threadName="TEST")
+        sched.thread.start()
+        try:
+            self.assertTrue(self._waitFor(lambda: action.runs == 1))
+            time.sleep(0.1)
+            self.assertEqual(action.runs, 1)
+
+            # a forced run doesn't wait for the next cycle
+            action.ran.clear()
+            start = time.time()
+            self.assertTrue(sched.forceRun())
+            action.ran.wait(2)
+            self.assertEqual(action.runs, 2)
+            self.assertTrue(time.time() - start < 0.5)
+        finally:
+            self._stop(sched)
+
+    def test_cycle_time(self):
+        action = DummyAction()
+        sched = scheduler.Scheduler(action, cycleTime=datetime.timedelta(hours=1), threadName="TEST", runImmediately=False)
+        sched.thread.start()
+        try:
+            time.sleep(0.1)
+            self.assertEqual(action.runs, 0)
+
+            # shortening the cycle reschedules the next run
+            sched.cycleTime = datetime.timedelta(seconds=0.2)
+            self.assertTrue(self._waitFor(lambda: action.runs >= 2))
+        finally:
+            self._stop(sched)
+
+    def test_queue_order(self):
+        done = []
+        queue = generic_queue.GenericQueue()
+        queue.pause()
+        queue.run()
+
+        queue.add_item(DummyQueueItem('low', generic_queue.QueuePriorities.LOW, done))
+        queue.add_item(DummyQueueItem('normal1', generic_queue.QueuePriorities.NORMAL, done))
+        queue.add_item(DummyQueueItem('high', generic_queue.QueuePriorities.HIGH, done))
+        queue.add_item(DummyQueueItem('normal2', generic_queue.QueuePriorities.NORMAL, done))
+        time.sleep(0.1)
+        self.assertEqual(done, [])
+
+        # only the items with a high enough priority are run
+        queue.min_priority = generic_queue.QueuePriorities.NORMAL
+        self.assertTrue(self._waitFor(lambda: len(done) == 3))
+        time.sleep(0.1)
+        self.assertEqual(done, ['high', 'normal1', 'normal2'])
+
+        queue.unpause()
+        self.assertTrue(self._waitFor(lambda: len(done) == 4))
+        self.assertTrue(self._waitFor(lambda: queue.currentItem == None and not queue.queue))
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - SCHEDULER TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(SchedulerTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,112 @@
+# coding=UTF-8
+import time
+import unittest
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import sickbeard
+from sickbeard import exceptions, providers, search
+
+sickbeard.SYS_ENCODING = 'UTF-8'
+
+
+class DummyProvider(object):
+    def __init__(self, name, delay=0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.searches = 0
+
+    def getID(self):
+        return self.name.lower()
+
+    def isActive(self):
+        return True
+
+    def search(self):
+        self.searches += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.name
+
+
+class ProviderSearchTests(unittest.TestCase):
+
+    def setUp(self):
+        self._sortedProviderList = providers.sortedProviderList
+        self._timeout = search.PROVIDER_TIMEOUT
+        self._maxThreads = search.MAX_PROVIDER_THREADS
+        search.providerFailures.clear()
+
+    def tearDown(self):
+        providers.sortedProviderList = self._sortedProviderList
+        search.PROVIDER_TIMEOUT = self._timeout
+        search.MAX_PROVIDER_THREADS = self._maxThreads
+        search.providerFailures.clear()
+
+    def _setProviders(self, providerList):
+        providers.sortedProviderList = lambda: providerList
+
+    def test_provider_order(self):
+        # the slowest provider comes first, the results still have to be in provider order
+        providerList = [DummyProvider('Slow', 0.3), DummyProvider('Fast'), DummyProvider('Medium', 0.1)]
+        self._setProviders(providerList)
+
+        start = time.time()
+        results = search._searchProviders(lambda x: x.search())
+        self.assertTrue(time.time() - start < 0.5)
+        self.assertEqual(results, [(x, x.name) for x in providerList])
+
+    def test_errors(self):
+        providerList = [DummyProvider('Broken', error=Exception('oops')), DummyProvider('Auth', error=exceptions.AuthException('bad key')),
+                        DummyProvider('Working')]
+        self._setProviders(providerList)
+
+        self.assertEqual(search._searchProviders(lambda x: x.search()), [(providerList[2], 'Working')])
+
+    def test_timeout(self):
+        search.PROVIDER_TIMEOUT = 0.1
+        providerList = [DummyProvider('Hanging', 0.5), DummyProvider('Working')]
+        self._setProviders(providerList)
+
+        self.assertEqual(search._searchProviders(lambda x: x.search()), [(providerList[1], 'Working')])
+        self.assertEqual(search.providerFailures['hanging'][0], 1)
+
+    def test_no_start_after_timeout(self):
+        search.PROVIDER_TIMEOUT = 0.1
+        search.MAX_PROVIDER_THREADS = 1
+        providerList = [DummyProvider('Hanging', 0.3), DummyProvider('Waiting')]
+        self._setProviders(providerList)
+
+        self.assertEqual(search._searchProviders(lambda x: x.search()), [])
+
+        # the thread that was stuck on the hanging provider doesn't go on to the next one
+        time.sleep(0.3)
+        self.assertEqual(providerList[1].searches, 0)
+        self.assertFalse('waiting' in search.providerFailures)
+
+    def test_circuit_breaker(self):
+        broken = DummyProvider('Broken', error=Exception('oops'))
+        self._setProviders([broken])
+
+        for x in range(search.PROVIDER_MAX_FAILURES + 2):
+            search._searchProviders(lambda x: x.search())
+        self.assertEqual(broken.searches, search.PROVIDER_MAX_FAILURES)
+
+        # once the delay is over it gets another chance and a success resets it
+        search.providerFailures['broken'][1] -= search.PROVIDER_RETRY_DELAY + 1
+        broken.error = None
+        self.assertEqual(search._searchProviders(lambda x: x.search()), [(broken, 'Broken')])
+        self.assertFalse('broken' in search.providerFailures)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - SEARCH TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(ProviderSearchTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
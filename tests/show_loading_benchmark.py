@@ -0,0 +1,61 @@
+# coding=UTF-8
+# Measures how long loading a generated 2,000 show database takes at startup, making
+# every show with its own query and saving it back (the old behaviour) versus reading
+# them all with one query.
+import time
+import traceback
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import test_lib as test
+
+import sickbeard
+from sickbeard import classes, db, helpers, logger, name_cache, tv
+
+sickbeard.SYS_ENCODING = 'UTF-8'
+
+NUM_SHOWS = 2000
+
+
+def _fill_db():
+    myDB = db.DBConnection()
+    myDB.mass_action([["INSERT INTO tv_shows (tvdb_id, show_name, location, network, genre, runtime, quality, airs, status, seasonfolders, paused, air_by_date, startyear, tvr_id, tvr_name, lang, anime) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                       [x + 1, u"Show %d" % x, u"/tv/Show %d" % x, u"Network", u"|Drama|", 60, 3, u"Monday 9:00 PM", u"Continuing", 1, 0, 0, 2000, 0, u"", u"en", int(x % 100 == 0)]]
+                      for x in range(NUM_SHOWS)])
+
+
+def _old_load():
+    # what SickBeard.loadShowsFromDB used to do
+    myDB = db.DBConnection()
+    for sqlShow in myDB.select("SELECT * FROM tv_shows"):
+        try:
+            curShow = tv.TVShow(int(sqlShow["tvdb_id"]))
+            sickbeard.showList.append(curShow)
+            name_cache.resolver.addShow(curShow)
+        except Exception, e:
+            logger.log(u"There was an error creating the show in "+sqlShow["location"]+": "+str(e).decode('utf-8'), logger.ERROR)
+            logger.log(traceback.format_exc(), logger.DEBUG)
+
+
+def bench(label, load):
+    test.setUp_test_db()
+    _fill_db()
+    sickbeard.showList = classes.ShowList()
+    try:
+        start = time.time()
+        load()
+        seconds = time.time() - start
+        print "%-32s %6d shows in %6.2fs  %8.1f shows/sec  anime support: %s" % (label, len(sickbeard.showList), seconds, len(sickbeard.showList) / seconds, sickbeard.ANIMESUPPORT)
+    finally:
+        sickbeard.showList = []
+        test.tearDown_test_db()
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - SHOW LOADING BENCHMARK"
+    print "=================="
+    bench("query and save per show", _old_load)
+    bench("one query, no saving", tv.loadShowsFromDB)
@@ -0,0 +1,84 @@
+# coding=UTF-8
+import unittest
+import test_lib as test
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import sickbeard
+from sickbeard import db, scene_exceptions, show_name_helpers
+from sickbeard.databases import cache_db
+
+sickbeard.SYS_ENCODING = 'UTF-8'
+
+
+class DummyShow(object):
+    def __init__(self, tvdbid, name, tvrname='', is_anime=False):
+        self.tvdbid = tvdbid
+        self.name = name
+        self.tvrname = tvrname
+        self.is_anime = is_anime
+        self.nameMatcher = None
+
+
+class NameMatcherTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(NameMatcherTests, self).setUp()
+        db.upgradeDatabase(db.DBConnection("cache.db"), cache_db.InitialSchema)
+        self.cacheDB = db.DBConnection("cache.db")
+        self.cacheDB.action("INSERT INTO scene_exceptions (tvdb_id, show_name) VALUES (?,?)", [1, 'Show Name Exception'])
+
+    def tearDown(self):
+        super(NameMatcherTests, self).tearDown()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(os.path.join(test.TESTDIR, "cache.db" + suffix)):
+                os.remove(os.path.join(test.TESTDIR, "cache.db" + suffix))
+
+    def test_good_results(self):
+        show = DummyShow(1, 'Show: Name (US)', 'TVRage Name')
+        for name in ['Show.Name.US.S01E02.Test-Test', 'Show.Name.US.1x02.Test-Test', 'Show Name (US) Season 2 Test', 
+                     'Show.Name.Exception.S01E02.Test-Test', 'TVRage.Name.Part.IV.Test-Test', 'Show.Name.USA.S01E02.Test-Test']:
+            self.assertTrue(show_name_helpers.isGoodResult(name, show, False), name)
+
+        for name in ['Other.Show.Name.S01E02.Test-Test', 'Show.Name.S01E02.Test-Test', 'Show.Name.US.Test-Test']:
+            self.assertFalse(show_name_helpers.isGoodResult(name, show, False), name)
+
+    def test_anime_results(self):
+        show = DummyShow(2, 'Infinite Stratos', is_anime=True)
+        self.assertTrue(show_name_helpers.isGoodResult('[Ayako] Infinite.Stratos - IS - 07 [H264][720p][EB7838FC]', show, False))
+        self.assertTrue(show_name_helpers.isGoodResult('[Group] Infinite Stratos - 07 [720p]', show, False))
+        self.assertFalse(show_name_helpers.isGoodResult('[Group] Other Show - 07 [720p]', show, False))
+
+    def test_rebuild(self):
+        show = DummyShow(1, 'Show Name')
+        self.assertTrue(show_name_helpers.isGoodResult('Show.Name.S01E02.Test-Test', show, False))
+        matcher = show.nameMatcher
+
+        # nothing changed so the matcher is reused
+        self.assertTrue(show_name_helpers.isGoodResult('Show.Name.Exception.S01E02.Test-Test', show, False))
+        self.assertTrue(show.nameMatcher is matcher)
+
+        show.tvrname = 'TVRage Name'
+        self.assertTrue(show_name_helpers.isGoodResult('TVRage.Name.S01E02.Test-Test', show, False))
+        self.assertFalse(show.nameMatcher is matcher)
+
+        show.name = 'New Name'
+        self.assertTrue(show_name_helpers.isGoodResult('New.Name.S01E02.Test-Test', show, False))
+        self.assertFalse(show_name_helpers.isGoodResult('Show.Name.S01E02.Test-Test', show, False))
+
+        # new scene exceptions are picked up as well
+        self.cacheDB.action("INSERT INTO scene_exceptions (tvdb_id, show_name) VALUES (?,?)", [1, 'Another Name'])
+        self.assertFalse(show_name_helpers.isGoodResult('Another.Name.S01E02.Test-Test', show, False))
+        scene_exceptions.exceptionsVersion += 1
+        self.assertTrue(show_name_helpers.isGoodResult('Another.Name.S01E02.Test-Test', show, False))
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - SHOW NAME MATCHER TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(NameMatcherTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
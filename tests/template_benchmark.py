@@ -0,0 +1,115 @@
+# coding=UTF-8
+# Measures how long the first view of the home page takes for a 500 show library when
+# Cheetah has to compile home.tmpl for it versus after precompileTemplates, and how many
+# home pages per second are rendered after that.
+import datetime
+import time
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import test_lib as test
+
+import sickbeard
+from sickbeard import show_stats, webserve
+from sickbeard.common import Quality, Overview, DOWNLOADED, WANTED
+
+from Cheetah.Template import Template
+
+sickbeard.SYS_ENCODING = 'UTF-8'
+sickbeard.PROG_DIR = os.path.abspath('..')
+
+NUM_SHOWS = 500
+EPS_PER_SHOW = 20
+NUM_REQUESTS = 20
+
+
+class DummyShow(object):
+    def __init__(self, tvdbid):
+        self.tvdbid = tvdbid
+        self.name = u"Show %d" % tvdbid
+        self.network = u"Network"
+        self.quality = Quality.SDTV
+        self.paused = 0
+        self.status = u"Continuing"
+
+    def nextEpisode(self):
+        return []
+
+    def getOverview(self, epStatus):
+        # the library only has wanted and downloaded episodes
+        if epStatus == WANTED:
+            return Overview.WANTED
+        return Overview.GOOD
+
+
+class DummyShowQueue(object):
+    loadingShowList = []
+
+
+class DummyScheduler(object):
+    def __init__(self, action=None):
+        self.action = action
+
+    def timeLeft(self):
+        return datetime.timedelta(minutes=10)
+
+    def nextRun(self):
+        return datetime.date.today()
+
+
+def setUp_library():
+    test.setUp_test_db()
+    myDB = test.db.DBConnection()
+    myDB.mass_action([["INSERT INTO tv_episodes (showid, season, episode, airdate, status, location) VALUES (?,?,?,?,?,?)",
+                       [show, 1, ep, 733000 + ep, DOWNLOADED if ep % 2 else WANTED, u""]]
+                      for show in range(1, NUM_SHOWS + 1) for ep in range(1, EPS_PER_SHOW + 1)])
+
+    sickbeard.showList = [DummyShow(x) for x in range(1, NUM_SHOWS + 1)]
+    show_stats.showStats.reset()
+    sickbeard.showQueueScheduler = DummyScheduler(DummyShowQueue())
+    sickbeard.currentSearchScheduler = DummyScheduler()
+    sickbeard.backlogSearchScheduler = DummyScheduler()
+
+
+def render():
+    t = webserve.PageTemplate(file="home.tmpl")
+    t.submenu = webserve.HomeMenu()
+    return webserve._munge(t)
+
+
+def bench_first(label, precompile):
+    # forget everything Cheetah compiled so far
+    Template._CHEETAH_compileCache.clear()
+    if precompile:
+        webserve.precompileTemplates()
+    start = time.time()
+    render()
+    print "%-32s %6.3fs" % (label, time.time() - start)
+
+
+def bench(label):
+    start = time.time()
+    for x in range(NUM_REQUESTS):
+        render()
+    seconds = time.time() - start
+    print "%-24s %4d requests in %6.3fs  %8.2f requests/sec" % (label, NUM_REQUESTS, seconds, NUM_REQUESTS / seconds)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - TEMPLATE BENCHMARK"
+    print "=================="
+    # keep the debug logging of every query out of the measurement
+    test.db.logger.log = lambda *args, **kwargs: None
+    setUp_library()
+    try:
+        # load the show stats so only the template is measured
+        render()
+        bench_first("first view, not compiled yet", False)
+        bench_first("first view, precompiled", True)
+        bench("later views")
+    finally:
+        show_stats.showStats.reset()
+        test.tearDown_test_db()
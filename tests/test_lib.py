@@ -1,5 +1,7 @@
 import unittest
 
+import datetime
+import random
 import sqlite3
 
 import sys, os.path
@@ -10,6 +12,7 @@ import sickbeard
 import shutil, time, os.path, sys
 from sickbeard import encodingKludge as ek 
 from sickbeard import db
+from sickbeard.common import Quality, Overview, ARCHIVED, IGNORED, SKIPPED, UNAIRED, WANTED, DOWNLOADED, SNATCHED
 from sickbeard.databases import mainDB
 from lib.configobj import ConfigObj
 
@@ -40,6 +43,10 @@ FILENAME = u"show name - s0"+str(SEASON)+"e0"+str(EPISODE)+".mkv"
 FILEDIR = os.path.join(TESTDIR, SHOWNAME)
 FILEPATH = os.path.join(FILEDIR,FILENAME)
 
+# the statuses fill_test_episodes picks from
+EPISODE_STATUSES = [WANTED, SKIPPED, IGNORED, UNAIRED, ARCHIVED, Quality.compositeStatus(DOWNLOADED, Quality.SDTV),
+                    Quality.compositeStatus(DOWNLOADED, Quality.HDTV), Quality.compositeStatus(SNATCHED, Quality.SDTV)]
+
 #=================
 # dummy functions
 #=================
@@ -95,7 +102,12 @@ def tearDown_test_db():
     """Deletes the test db
         although this seams not to work on my system it leaves me with an zero kb file
     """
-    os.remove(ek.ek(os.path.join, TESTDIR, TESTDBNAME))
+    # pooled connections keep the file (and its WAL journal) open
+    db.closeAllConnections()
+    for suffix in ('', '-wal', '-shm'):
+        dbPath = ek.ek(os.path.join, TESTDIR, TESTDBNAME + suffix)
+        if os.path.exists(dbPath):
+            os.remove(dbPath)
 
 def setUp_test_episode_file():
     if not os.path.exists(FILEDIR):
@@ -108,6 +120,61 @@ def setUp_test_episode_file():
 def tearDown_test_episode_file():
     shutil.rmtree(FILEDIR)
 
+def fill_test_episodes(tvdbids, airdates, locations=[u""]):
+    """Adds 10 episodes in each of the seasons 0 to 2 of the shows, their airdates, statuses and
+    locations are picked from airdates, EPISODE_STATUSES and locations the same way every run
+    """
+    rand = random.Random(0)
+    episodes = []
+    for tvdbid in tvdbids:
+        for season in range(3):
+            for episode in range(1, 11):
+                episodes.append(["INSERT INTO tv_episodes (showid, tvdbid, season, episode, name, description, airdate, status, location) VALUES (?,?,?,?,?,?,?,?,?)",
+                                 [tvdbid, tvdbid * 1000 + season * 100 + episode, season, episode, u"Episode %d" % episode, u"", rand.choice(airdates),
+                                  rand.choice(EPISODE_STATUSES), rand.choice(locations)]])
+    db.DBConnection().mass_action(episodes)
+
+#=================
+# the queries the pages used to run, to check the cached results against
+#=================
+def legacy_show_counts(tvdbid):
+    """The downloaded and total counts of the show on the home page
+    """
+    myDB = db.DBConnection()
+    today = str(datetime.date.today().toordinal())
+    downloaded = myDB.select("SELECT COUNT(*) FROM tv_episodes WHERE showid = "+str(tvdbid)+" AND (status IN ("+",".join([str(x) for x in Quality.DOWNLOADED + [ARCHIVED]])+") OR (status IN ("+",".join([str(x) for x in Quality.SNATCHED + Quality.SNATCHED_PROPER])+") AND location != '')) AND season != 0 and episode != 0 AND airdate <= "+today)
+    total = myDB.select("SELECT COUNT(*) FROM tv_episodes WHERE showid = "+str(tvdbid)+" AND season != 0 and episode != 0 AND (airdate != 1 OR status IN ("+",".join([str(x) for x in (Quality.DOWNLOADED + Quality.SNATCHED + Quality.SNATCHED_PROPER) + [ARCHIVED]])+")) AND airdate <= "+today+" AND status != "+str(IGNORED))
+    return downloaded[0][0], total[0][0]
+
+def legacy_show_overview(show):
+    """The number of episodes of the show for every overview on the backlog overview
+    """
+    myDB = db.DBConnection()
+    epCounts = dict((x, 0) for x in Overview.overviewStrings)
+    for curResult in myDB.select("SELECT * FROM tv_episodes WHERE showid = ?", [show.tvdbid]):
+        epCounts[show.getOverview(int(curResult["status"]))] += 1
+    return epCounts
+
+def legacy_coming_episodes():
+    """The episodes on the coming episodes page as sorted (showid, season, episode, name, airdate, status, show_name) tuples
+    """
+    myDB = db.DBConnection()
+
+    today = datetime.date.today().toordinal()
+    next_week = (datetime.date.today() + datetime.timedelta(days=7)).toordinal()
+    recently = (datetime.date.today() - datetime.timedelta(days=3)).toordinal()
+
+    done_show_list = []
+    qualList = Quality.DOWNLOADED + Quality.SNATCHED + [ARCHIVED, IGNORED]
+    sql_results = myDB.select("SELECT *, tv_shows.status as show_status FROM tv_episodes, tv_shows WHERE season != 0 AND airdate >= ? AND airdate < ? AND tv_shows.tvdb_id = tv_episodes.showid AND tv_episodes.status NOT IN ("+','.join(['?']*len(qualList))+")", [today, next_week] + qualList)
+    for cur_result in sql_results:
+        done_show_list.append(int(cur_result["showid"]))
+
+    sql_results += myDB.select("SELECT *, tv_shows.status as show_status FROM tv_episodes outer_eps, tv_shows WHERE season != 0 AND showid NOT IN ("+','.join(['?']*len(done_show_list))+") AND tv_shows.tvdb_id = outer_eps.showid AND airdate = (SELECT airdate FROM tv_episodes inner_eps WHERE inner_eps.showid = outer_eps.showid AND inner_eps.airdate >= ? ORDER BY inner_eps.airdate ASC LIMIT 1) AND outer_eps.status NOT IN ("+','.join(['?']*len(Quality.DOWNLOADED+Quality.SNATCHED))+")", done_show_list + [next_week] + Quality.DOWNLOADED + Quality.SNATCHED)
+    sql_results += myDB.select("SELECT *, tv_shows.status as show_status FROM tv_episodes, tv_shows WHERE season != 0 AND tv_shows.tvdb_id = tv_episodes.showid AND airdate < ? AND airdate >= ? AND tv_episodes.status = ? AND tv_episodes.status NOT IN ("+','.join(['?']*len(qualList))+")", [today, recently, WANTED] + qualList)
+
+    return sorted((int(x["showid"]), int(x["season"]), int(x["episode"]), x["name"], int(x["airdate"]), int(x["status"]), x["show_name"]) for x in sql_results)
+
 if __name__ == '__main__':
     print "=================="
     print "Dont call this directly"
@@ -1,5 +1,6 @@
 # coding=UTF-8
 import random
+import threading
 import unittest
 
 import test_lib as test
@@ -10,7 +11,21 @@ sys.path.append(os.path.abspath('../lib'))
 
 import sickbeard
 from sickbeard.tv import TVEpisode,TVShow
-from sickbeard import exceptions
+from sickbeard import classes, db, exceptions, tv
+
+
+class DummyEpisode(object):
+    def __init__(self, episode, fail=False):
+        self.episode = episode
+        self.fail = fail
+        self.lock = threading.Lock()
+        self.dirty = True
+
+    def saveToDB(self):
+        db.DBConnection().action("INSERT INTO tv_episodes (showid, season, episode) VALUES (?,?,?)", [1, 1, self.episode])
+        self.dirty = False
+        if self.fail:
+            raise ValueError("broken episode")
 
 
 class TVShowTests(test.SickbeardTestDBCase):
@@ -49,6 +64,54 @@ class TVShowTests(test.SickbeardTestDBCase):
         show.saveToDB()
         show.loadFromDB(skipNFO=True)
         self.assertEqual(show.name, "newName")
+
+    def test_save_episodes(self):
+        show = TVShow(0001, "en")
+        self.assertRaises(ValueError, show.saveEpisodes, [DummyEpisode(x) for x in range(1, 4)] + [DummyEpisode(4, True)])
+
+        # the whole transaction was rolled back and its episodes have to be saved again
+        self.assertEqual(db.DBConnection().select("SELECT COUNT(*) FROM tv_episodes")[0][0], 0)
+
+        episodes = [DummyEpisode(x) for x in range(1, 151)]
+        show.saveEpisodes(episodes)
+        self.assertEqual(db.DBConnection().select("SELECT COUNT(*) FROM tv_episodes")[0][0], 150)
+        self.assertFalse([x for x in episodes if x.dirty])
+
+    def test_save_episodes_rollback(self):
+        show = TVShow(0001, "en")
+        episodes = [DummyEpisode(x) for x in range(1, tv.EPISODE_SAVE_CHUNK + 3)]
+        episodes[-1].fail = True
+        self.assertRaises(ValueError, show.saveEpisodes, episodes)
+
+        # the first chunk was committed, the second one is dirty again
+        self.assertEqual(db.DBConnection().select("SELECT COUNT(*) FROM tv_episodes")[0][0], tv.EPISODE_SAVE_CHUNK)
+        self.assertEqual([x.episode for x in episodes if x.dirty], [tv.EPISODE_SAVE_CHUNK + 1, tv.EPISODE_SAVE_CHUNK + 2])
+
+    def test_load_shows(self):
+        for tvdbid, anime in ((0001, 0), (0002, 1)):
+            show = TVShow(tvdbid, "en")
+            show.name = "show %d" % tvdbid
+            show.network = "cbs"
+            show.quality = 3
+            show.paused = 1
+            show.anime = anime
+            show.saveToDB()
+        sickbeard.showList = classes.ShowList()
+        sickbeard.ANIMESUPPORT = False
+
+        # nothing is written back while loading
+        changes = db.DBConnection().connection.total_changes
+        shows = tv.loadShowsFromDB()
+        self.assertEqual(db.DBConnection().connection.total_changes, changes)
+
+        self.assertEqual(list(sickbeard.showList), shows)
+        self.assertEqual(sorted((x.tvdbid, x.name, x.network, x.quality, x.paused, x.lang, x.anime) for x in shows),
+                         [(0001, "show 1", "cbs", 3, 1, "en", 0), (0002, "show 2", "cbs", 3, 1, "en", 1)])
+        self.assertTrue(sickbeard.ANIMESUPPORT)
+
+        # a show can't be loaded twice
+        tv.loadShowsFromDB()
+        self.assertEqual(len(sickbeard.showList), 2)
         
     
         
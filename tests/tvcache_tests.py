@@ -0,0 +1,135 @@
+# coding=UTF-8
+import time
+import unittest
+import test_lib as test
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import sickbeard
+from sickbeard import db, name_cache, tvcache
+from sickbeard.databases import cache_db
+
+RSS_DATA = '''<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel><title>Test</title>
+<item><title>Show.Name.S01E02.720p.HDTV.x264-Group</title><link>http://example.com/1</link></item>
+<item><title>Show.Name.S01E03.720p.HDTV.x264-Group</title><link>http://example.com/2</link></item>
+<item><title>Other.Show.S01E02.720p.HDTV.x264-Group</title><link>http://example.com/3</link></item>
+</channel></rss>'''
+
+
+class DummyProvider(object):
+    name = 'Dummy'
+
+    def getID(self):
+        return 'dummy'
+
+
+class DummyShow(object):
+    def __init__(self, tvdbid, name):
+        self.tvdbid = tvdbid
+        self.tvrid = 0
+        self.tvrname = None
+        self.name = name
+        self.lang = 'en'
+        self.is_anime = False
+
+
+class DummyCache(tvcache.TVCache):
+
+    def __init__(self, provider):
+        tvcache.TVCache.__init__(self, provider)
+        self.minTime = 0
+
+    def _getDB(self):
+        # CacheDBConnection was created before test_lib replaced db.DBConnection
+        return db.DBConnection("cache.db")
+
+    def _getRSSData(self):
+        return RSS_DATA
+
+
+class TVCacheTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(TVCacheTests, self).setUp()
+        cacheDB = db.DBConnection("cache.db")
+        db.upgradeDatabase(cacheDB, cache_db.InitialSchema)
+        cacheDB.action("CREATE TABLE dummy (name TEXT, season NUMERIC, episodes TEXT, tvrid NUMERIC, tvdbid NUMERIC, url TEXT, time NUMERIC, quality TEXT)")
+        sickbeard.showList = [DummyShow(1, "Show Name")]
+        name_cache.resolver.reset()
+        name_cache.addNameToCache('Show Name', 1)
+
+        self.parsed = []
+        self._parse_result_wrapper = tvcache.parse_result_wrapper
+        def counting_wrapper(show, toParse, *args, **kwargs):
+            self.parsed.append(toParse)
+            return self._parse_result_wrapper(show, toParse, *args, **kwargs)
+        tvcache.parse_result_wrapper = counting_wrapper
+
+        self.cache = DummyCache(DummyProvider())
+
+    def tearDown(self):
+        tvcache.parse_result_wrapper = self._parse_result_wrapper
+        name_cache.resolver.reset()
+        super(TVCacheTests, self).tearDown()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(os.path.join(test.TESTDIR, "cache.db" + suffix)):
+                os.remove(os.path.join(test.TESTDIR, "cache.db" + suffix))
+
+    def _rows(self):
+        return self.cache._getDB().select("SELECT * FROM dummy ORDER BY url")
+
+    def test_incremental_update(self):
+        self.cache.updateCache()
+        self.assertEqual(len(self.parsed), 3)
+        self.assertEqual([x["tvdbid"] for x in self._rows()], [1, 1, 0])
+
+        # nothing is looked at again while the show list stays the same
+        self.parsed = []
+        self.cache.updateCache()
+        self.assertEqual(self.parsed, [])
+        self.assertEqual(len(self._rows()), 3)
+
+    def test_unmatched_items(self):
+        self.cache.updateCache()
+
+        # the item we couldn't match to a show is looked at again once a show is added (the way the show queue does it)
+        otherShow = DummyShow(2, "Other Show")
+        sickbeard.showList.append(otherShow)
+        name_cache.resolver.addShow(otherShow)
+        name_cache.clearCache()
+
+        self.parsed = []
+        self.cache.updateCache()
+        self.assertEqual(self.parsed, ['Other.Show.S01E02.720p.HDTV.x264-Group'])
+        self.assertEqual([x["tvdbid"] for x in self._rows()], [1, 1, 2])
+
+        # but not when a show is saved without its names changing
+        self.cache._getDB().action("UPDATE dummy SET tvdbid = 0 WHERE url = ?", ['http://example.com/3'])
+        name_cache.resolver.updateShow(otherShow)
+
+        self.parsed = []
+        self.cache.updateCache()
+        self.assertEqual(self.parsed, [])
+
+    def test_expired_items(self):
+        self.cache.updateCache()
+        oldTime = int(time.time()) - 3 * 24 * 60 * 60
+        self.cache._getDB().action("UPDATE dummy SET time = ? WHERE url = ?", [oldTime, 'http://example.com/1'])
+
+        self.parsed = []
+        self.cache.updateCache()
+        self.assertEqual(self.parsed, ['Show.Name.S01E02.720p.HDTV.x264-Group'])
+        self.assertEqual(len(self._rows()), 3)
+        self.assertTrue(self._rows()[0]["time"] > oldTime)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - TVCACHE TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(TVCacheTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
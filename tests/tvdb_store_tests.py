@@ -0,0 +1,138 @@
+# coding=UTF-8
+import shutil
+import time
+import unittest
+import test_lib as test
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+from lib.tvdb_api import tvdb_api, tvdb_exceptions
+
+SERIES_XML = '''<?xml version="1.0" encoding="UTF-8" ?>
+<Data><Series><id>1</id><SeriesName>Show Name</SeriesName><Status>Continuing</Status>
+<banner>graphical/1-g.jpg</banner><lastupdated>1300000000</lastupdated></Series></Data>'''
+
+EPISODES_XML = '''<?xml version="1.0" encoding="UTF-8" ?>
+<Data><Series><id>1</id><SeriesName>Show Name</SeriesName></Series>
+<Episode><id>11</id><SeasonNumber>1</SeasonNumber><EpisodeNumber>1</EpisodeNumber><EpisodeName>Pilot</EpisodeName><FirstAired>2010-01-05</FirstAired></Episode>
+<Episode><id>12</id><SeasonNumber>1</SeasonNumber><EpisodeNumber>2</EpisodeNumber><EpisodeName>Second</EpisodeName><FirstAired>2010-01-12</FirstAired></Episode>
+<Episode><id>13</id><SeasonNumber>2</SeasonNumber><EpisodeNumber>1</EpisodeNumber><EpisodeName>Third &amp; Last</EpisodeName><FirstAired>2010-01-12</FirstAired></Episode>
+</Data>'''
+
+BANNERS_XML = '''<?xml version="1.0" encoding="UTF-8" ?>
+<Banners><Banner><id>5</id><BannerPath>posters/1-1.jpg</BannerPath><BannerType>poster</BannerType><BannerType2>680x1000</BannerType2></Banner></Banners>'''
+
+loadedUrls = []
+
+
+class DummyTvdb(tvdb_api.Tvdb):
+
+    def _loadUrl(self, url, recache = False):
+        loadedUrls.append(url)
+        if url.endswith("/all/en.xml"):
+            return EPISODES_XML
+        elif url.endswith("/banners.xml"):
+            return BANNERS_XML
+        return SERIES_XML
+
+
+class ShowStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cacheDir = os.path.join(test.TESTDIR, "tvdb_cache")
+        tvdb_api.showStore.clear()
+        del loadedUrls[:]
+
+    def tearDown(self):
+        tvdb_api.showStore.clear()
+        if os.path.isdir(self.cacheDir):
+            shutil.rmtree(self.cacheDir)
+
+    def _tvdb(self, **kwargs):
+        return DummyTvdb(cache_dir=self.cacheDir, language='en', **kwargs)
+
+    def test_shared(self):
+        self.assertEqual(self._tvdb()[1][1][2]['episodename'], 'Second')
+        self.assertEqual(len(loadedUrls), 2)
+
+        # another instance gets the show from the store
+        show = self._tvdb()[1]
+        self.assertEqual(show['seriesname'], 'Show Name')
+        self.assertEqual(show[2][1]['episodename'], 'Third & Last')
+        self.assertEqual(len(loadedUrls), 2)
+
+        # a recache right after the show was fetched doesn't fetch it again
+        self._tvdb(cache='recache')[1]
+        self.assertEqual(len(loadedUrls), 2)
+
+        tvdb_api.showStore.RECACHE_WINDOW = -1
+        try:
+            self._tvdb(cache='recache')[1]
+        finally:
+            del tvdb_api.showStore.RECACHE_WINDOW
+        self.assertEqual(len(loadedUrls), 4)
+
+    def test_disk(self):
+        self._tvdb()[1]
+        self.assertEqual(len(loadedUrls), 2)
+
+        # after a restart the show comes from the disk
+        tvdb_api.showStore.clear()
+        show = self._tvdb()[1]
+        self.assertEqual(len(loadedUrls), 2)
+        self.assertEqual(show[1][1]['episodename'], 'Pilot')
+        self.assertEqual(show['banner'], 'http://www.thetvdb.com/banners/graphical/1-g.jpg')
+
+        # thetvdb.com changed the show after we fetched it
+        tvdb_api.showStore.setUpdated(1, time.time() + 10)
+        self._tvdb()[1]
+        self.assertEqual(len(loadedUrls), 4)
+
+    def test_extras(self):
+        plainShow = self._tvdb()[1]
+        show = self._tvdb(banners=True)[1]
+        self.assertEqual(loadedUrls[-1], 'http://www.thetvdb.com/api/0629B785CE550C8D/series/1/banners.xml')
+        self.assertEqual(len(loadedUrls), 3)
+        self.assertTrue('poster' in show['_banners'])
+
+        # the show the first instance has isn't changed under it
+        self.assertFalse('_banners' in plainShow.data)
+        self.assertEqual(show[1][1]['episodename'], 'Pilot')
+
+        tvdb_api.showStore.clear()
+        self.assertTrue('poster' in self._tvdb(banners=True)[1]['_banners'])
+        self.assertEqual(len(loadedUrls), 3)
+
+    def test_prune(self):
+        self._tvdb()[1]
+        storeDir = os.path.join(self.cacheDir, "shows")
+        oldFile = os.path.join(storeDir, "2-en-en.pickle")
+        open(oldFile, "wb").write("old")
+        oldTime = time.time() - tvdb_api.ShowStore.MAX_AGE - 10
+        os.utime(oldFile, (oldTime, oldTime))
+
+        # the store was pruned when the first show was written, not again within PRUNE_INTERVAL
+        tvdb_api.showStore.add((3, 'en', 'en'), tvdb_api.Show(), storeDir)
+        self.assertTrue(os.path.exists(oldFile))
+
+        tvdb_api.showStore.lastPrune = 0
+        tvdb_api.showStore.add((3, 'en', 'en'), tvdb_api.Show(), storeDir)
+        self.assertFalse(os.path.exists(oldFile))
+        self.assertEqual(sorted(os.listdir(storeDir)), ['1-en-en.pickle', '3-en-en.pickle'])
+
+    def test_aired_on(self):
+        show = self._tvdb()[1]
+        self.assertEqual([x['episodename'] for x in show.airedOn('2010-01-05')], ['Pilot'])
+        self.assertEqual(sorted([x['episodename'] for x in show.airedOn('2010-01-12')]), ['Second', 'Third & Last'])
+        self.assertRaises(tvdb_exceptions.tvdb_episodenotfound, show.airedOn, '2010-01-06')
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - TVDB STORE TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(ShowStoreTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
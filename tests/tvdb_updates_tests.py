@@ -0,0 +1,218 @@
+# coding=UTF-8
+import StringIO
+import zipfile
+import unittest
+import test_lib as test
+
+import sys, os.path
+sys.path.append(os.path.abspath('..'))
+sys.path.append(os.path.abspath('../lib'))
+
+import sickbeard
+from sickbeard import db, showUpdater
+from lib.tvdb_api import tvdb_api, tvdb_exceptions
+
+sickbeard.SYS_ENCODING = 'UTF-8'
+
+UPDATES_FILE = os.path.join(test.TESTDIR, 'tvdb_updates_day.xml')
+
+# one day before the fixture was made
+SINCE = 1300000000
+
+
+def load_updates():
+    f = open(UPDATES_FILE, 'rb')
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+
+def zip_updates(name, src):
+    data = StringIO.StringIO()
+    zipped = zipfile.ZipFile(data, 'w')
+    zipped.writestr(name, src)
+    zipped.close()
+    return data.getvalue()
+
+
+loadedUrls = []
+
+
+class DummyTvdb(tvdb_api.Tvdb):
+    response = None
+
+    def _loadUrl(self, url, recache = False):
+        loadedUrls.append(url)
+        return DummyTvdb.response
+
+
+class DummyShow(object):
+    def __init__(self, tvdbid, name, status="Continuing"):
+        self.tvdbid = tvdbid
+        self.name = name
+        self.status = status
+
+
+class DummyQueueItem(object):
+    def __init__(self, show):
+        self.show = show
+        self.success = True
+
+
+class DummyShowQueue(object):
+    def __init__(self):
+        self.updated = []
+        self.refreshed = []
+        self.items = {}
+
+    def updateShow(self, show, force=False, changedEpisodes=None):
+        self.updated.append((show.tvdbid, changedEpisodes))
+        self.items[show.tvdbid] = DummyQueueItem(show)
+        return self.items[show.tvdbid]
+
+    def refreshShow(self, show, force=False):
+        self.refreshed.append(show.tvdbid)
+        return show.tvdbid
+
+
+class DummyScheduler(object):
+    def __init__(self):
+        self.action = DummyShowQueue()
+
+
+class UpdatesFeedTests(unittest.TestCase):
+
+    def setUp(self):
+        del loadedUrls[:]
+
+    def test_parse(self):
+        updates = tvdb_api.parseUpdates(load_updates(), SINCE)
+        self.assertEqual(updates.time, 1300086400)
+        # banners aren't looked at and show 4 and 5 changed too long ago
+        self.assertEqual(updates.series, {1: 1300060000, 2: 1300080000})
+        self.assertEqual(updates.changedShows(), set([1, 2]))
+        self.assertEqual(updates.changedEpisodes(1), set([12]))
+        self.assertEqual(updates.changedEpisodes(2), set([21, 22]))
+        self.assertEqual(updates.changedEpisodes(3), set())
+
+        updates = tvdb_api.parseUpdates(load_updates())
+        self.assertEqual(updates.changedShows(), set([1, 2, 4, 5]))
+
+    def test_period(self):
+        now = 1300086400
+        self.assertEqual(tvdb_api.Updates.period(now - 60, now), "day")
+        # the daily update runs a little after a full day
+        self.assertEqual(tvdb_api.Updates.period(now - 24 * 60 * 60 - 10 * 60, now), "day")
+        self.assertEqual(tvdb_api.Updates.period(now - 26 * 60 * 60, now), "week")
+        self.assertEqual(tvdb_api.Updates.period(now - 3 * 24 * 60 * 60, now), "week")
+        self.assertEqual(tvdb_api.Updates.period(now - 20 * 24 * 60 * 60, now), "month")
+        self.assertEqual(tvdb_api.Updates.period(0, now), "all")
+
+    def test_get_updates(self):
+        DummyTvdb.response = zip_updates('updates_day.xml', load_updates())
+        updates = DummyTvdb(cache=False).getUpdates(SINCE, 1300086400)
+        self.assertEqual(updates.changedShows(), set([1, 2]))
+        self.assertEqual(len(loadedUrls), 1)
+        self.assertTrue(loadedUrls[0].endswith("/updates/updates_day.zip"))
+
+    def test_bad_zip(self):
+        DummyTvdb.response = load_updates()
+        self.assertRaises(tvdb_exceptions.tvdb_error, DummyTvdb(cache=False).getUpdates, SINCE)
+
+
+class ShowUpdaterTests(test.SickbeardTestDBCase):
+
+    def setUp(self):
+        super(ShowUpdaterTests, self).setUp()
+        del loadedUrls[:]
+        tvdb_api.showStore.clear()
+        DummyTvdb.response = zip_updates('updates_day.xml', load_updates())
+
+        self._Tvdb = tvdb_api.Tvdb
+        self._showQueueScheduler = sickbeard.showQueueScheduler
+        self._TVDB_API_PARMS = sickbeard.TVDB_API_PARMS
+        tvdb_api.Tvdb = DummyTvdb
+        sickbeard.showQueueScheduler = DummyScheduler()
+        sickbeard.TVDB_API_PARMS = {'cache': False}
+        sickbeard.showList = [DummyShow(1, "Show One"), DummyShow(2, "Show Two", "Ended"), DummyShow(3, "Show Three"),
+                              DummyShow(4, "Show Four", "Ended")]
+
+    def tearDown(self):
+        tvdb_api.Tvdb = self._Tvdb
+        sickbeard.showQueueScheduler = self._showQueueScheduler
+        sickbeard.TVDB_API_PARMS = self._TVDB_API_PARMS
+        tvdb_api.showStore.clear()
+        super(ShowUpdaterTests, self).tearDown()
+
+    def _lastTVDB(self):
+        sqlResults = db.DBConnection().select("SELECT last_tvdb FROM info")
+        if not sqlResults:
+            return None
+        return int(sqlResults[0]["last_tvdb"])
+
+    def test_first_update(self):
+        updater = showUpdater.ShowUpdater()
+        updater.run(force=True)
+
+        # without a previous update everything still running is updated
+        queue = sickbeard.showQueueScheduler.action
+        self.assertEqual(loadedUrls, [])
+        self.assertEqual(queue.updated, [(1, None), (3, None)])
+        self.assertEqual(queue.refreshed, [2, 4])
+
+        # the time is only recorded once the updates went through
+        self.assertEqual(self._lastTVDB(), None)
+        updater.run(force=True)
+        self.assertTrue(self._lastTVDB() > 0)
+
+    def test_incremental_update(self):
+        db.DBConnection().action("INSERT INTO info (last_backlog, last_tvdb) VALUES (?,?)", [0, SINCE])
+        updater = showUpdater.ShowUpdater()
+        updater.run(force=True)
+
+        # only the shows that changed are updated, the rest is refreshed
+        queue = sickbeard.showQueueScheduler.action
+        self.assertEqual(len(loadedUrls), 1)
+        self.assertEqual(queue.updated, [(1, set([12])), (2, set([21, 22]))])
+        self.assertEqual(queue.refreshed, [3, 4])
+        self.assertEqual(tvdb_api.showStore.updated, {1: 1300060000, 2: 1300080000})
+
+        self.assertEqual(self._lastTVDB(), SINCE)
+        updater.run(force=True)
+        self.assertEqual(self._lastTVDB(), 1300086400)
+
+    def test_failed_update(self):
+        db.DBConnection().action("INSERT INTO info (last_backlog, last_tvdb) VALUES (?,?)", [0, SINCE])
+        updater = showUpdater.ShowUpdater()
+        updater.run(force=True)
+        sickbeard.showQueueScheduler.action.items[2].success = False
+
+        # the next run gets the updates since the same time again so the show that failed is updated again
+        sickbeard.showQueueScheduler = DummyScheduler()
+        updater.run(force=True)
+        self.assertEqual(self._lastTVDB(), SINCE)
+        self.assertEqual(len(loadedUrls), 2)
+        self.assertEqual(sickbeard.showQueueScheduler.action.updated, [(1, set([12])), (2, set([21, 22]))])
+
+    def test_unavailable(self):
+        db.DBConnection().action("INSERT INTO info (last_backlog, last_tvdb) VALUES (?,?)", [0, SINCE])
+        DummyTvdb.response = "<html>Down for maintenance</html>"
+        showUpdater.ShowUpdater().run(force=True)
+
+        queue = sickbeard.showQueueScheduler.action
+        self.assertEqual(queue.updated, [(1, None), (3, None)])
+        self.assertEqual(queue.refreshed, [2, 4])
+        self.assertEqual(self._lastTVDB(), SINCE)
+
+
+if __name__ == '__main__':
+    print "=================="
+    print "STARTING - TVDB UPDATES TESTS"
+    print "=================="
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(UpdatesFeedTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+    print "######################################################################"
+    suite = unittest.TestLoader().loadTestsFromTestCase(ShowUpdaterTests)
+    unittest.TextTestRunner(verbosity=2).run(suite)